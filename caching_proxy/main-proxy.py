@@ -0,0 +1,414 @@
+import argparse
+import hashlib
+import http.client
+import json
+import logging
+import os
+import re
+import select
+import socket
+import ssl
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class AssetCache:
+    """
+    LRU cache of immutable static responses, bounded by total body size. Bodies
+    live in memory, or as files under cache_dir when given (the index is rebuilt
+    from the directory on start, so a restarted proxy stays warm).
+    """
+    def __init__(self, max_bytes: int, cache_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        # key -> {'status', 'headers', 'size', 'expires', and 'body' (memory) or files on disk}
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'stored': 0, 'evictions': 0, 'bytes_served': 0}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_index()
+
+    @staticmethod
+    def make_key(url: str, accept_encoding: str) -> str:
+        return hashlib.sha256(f"{url}\n{accept_encoding}".encode()).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        return os.path.join(self.cache_dir, f"{key}.body"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_index(self):
+        """Registers entries already on disk, least recently used first."""
+        metas = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            body_path, meta_path = self._paths(name[:-len(".json")])
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                metas.append((os.path.getmtime(body_path), name[:-len(".json")], meta))
+            except (OSError, ValueError):
+                continue
+        for _, key, meta in sorted(metas):
+            self._entries[key] = meta
+            self._size += meta['size']
+        self._evict()
+        logger.info(f"Loaded {len(self._entries)} cached asset(s) ({self._size / 1e6:.1f} MB) from {self.cache_dir}.")
+
+    def get(self, key: str) -> Optional[Tuple[int, list, bytes]]:
+        """Returns (status, headers, body) and marks the entry recently used, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires'] is not None and entry['expires'] < time.time():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters['hits'] += 1
+            self.counters['bytes_served'] += entry['size']
+            body = entry.get('body')
+        if body is None:
+            try:
+                with open(self._paths(key)[0], 'rb') as f:
+                    body = f.read()
+                os.utime(self._paths(key)[0]) # Keeps the LRU order across restarts
+            except OSError:
+                with self._lock:
+                    self._remove(key)
+                return None
+        return entry['status'], entry['headers'], body
+
+    def put(self, key: str, status: int, headers: list, body: bytes, max_age: Optional[int]):
+        """Stores a response; max_age None means immutable (only LRU eviction removes it)."""
+        if len(body) > self.max_bytes:
+            return
+        entry = {'status': status, 'headers': headers, 'size': len(body), 'expires': time.time() + max_age if max_age is not None else None}
+        if self.cache_dir:
+            body_path, meta_path = self._paths(key)
+            try:
+                with open(body_path, 'wb') as f:
+                    f.write(body)
+                with open(meta_path, 'w') as f:
+                    json.dump(entry, f)
+            except OSError as e:
+                logger.warning(f"Could not write cached asset {key}: {e}")
+                return
+        else:
+            entry['body'] = body
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)['size']
+            self._entries[key] = entry
+            self._size += entry['size']
+            self.counters['stored'] += 1
+            self._evict()
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.counters['evictions'] += 1
+
+    def _remove(self, key: str):
+        """Drops an entry. Caller holds the lock (or is still single-threaded)."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= entry['size']
+        if self.cache_dir:
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            return {**self.counters, 'entries': len(self._entries), 'bytes': self._size,
+                    'hit_ratio': self.counters['hits'] / lookups if lookups else 0.0}
+
+
+class CachingProxyServer(ThreadingHTTPServer):
+    """
+    HTTP(S) forward proxy that serves repeated immutable static assets from an
+    AssetCache, so N browsers on one box download each bundle once.
+
+    Plain HTTP is always inspected. HTTPS CONNECTs to intercept_hosts are
+    terminated with cert_file/key_file (browsers must trust that certificate,
+    e.g. Chrome's --ignore-certificate-errors-spki-list) and cached the same
+    way; every other CONNECT (websockets, APIs) is tunneled untouched.
+    """
+    daemon_threads = True
+    # Conservative defaults: hosts that only serve versioned static bundles
+    DEFAULT_INTERCEPT_HOSTS = ("static.tradingview.com", "cdn.coinglasscdn.com")
+    DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+    MIN_MAX_AGE = 24 * 3600 # Responses fresh for less than this aren't treated as static assets
+    STATIC_PATH_PATTERN = re.compile(r'\.(?:js|mjs|css|woff2?|ttf|otf|svg|png|jpe?g|gif|webp|ico|wasm)$', re.IGNORECASE)
+    UPSTREAM_TIMEOUT = 30 # Seconds to connect, and to wait for an upstream response
+    CLIENT_IDLE_TIMEOUT = 120 # Seconds an intercepted TLS connection may sit idle between requests
+
+    def __init__(self, address: Tuple[str, int], cache: AssetCache, cert_file: Optional[str] = None, key_file: Optional[str] = None, intercept_hosts: Iterable[str] = DEFAULT_INTERCEPT_HOSTS):
+        super().__init__(address, ProxyRequestHandler)
+        self.cache = cache
+        self.intercept_hosts = frozenset(intercept_hosts) if cert_file else frozenset()
+        self.tls_context = None
+        if cert_file:
+            self.tls_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            self.tls_context.load_cert_chain(cert_file, key_file)
+        self.upstream_tls_context = ssl.create_default_context()
+        self.upstream_connections = threading.local() # Per handler thread: (scheme, host, port) -> kept-alive connection
+        self.counters = {'passthrough': 0, 'tunnels': 0, 'intercepted': 0, 'upstream_errors': 0}
+        self._counters_lock = threading.Lock()
+
+    def count(self, name: str):
+        with self._counters_lock:
+            self.counters[name] += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._counters_lock:
+            counters = dict(self.counters)
+        return {**self.cache.stats(), **counters}
+
+    @classmethod
+    def cache_lifetime(cls, path: str, headers: http.client.HTTPMessage) -> Tuple[bool, Optional[int]]:
+        """(cacheable, max_age) for an upstream 200 response; max_age None means immutable."""
+        if headers.get('Set-Cookie'):
+            return False, None
+        vary = {v.strip().lower() for v in headers.get('Vary', '').split(',') if v.strip()}
+        if vary - {'accept-encoding', 'origin'}:
+            return False, None
+        cache_control = headers.get('Cache-Control', '').lower()
+        if 'no-store' in cache_control or 'private' in cache_control or 'no-cache' in cache_control:
+            return False, None
+        if 'immutable' in cache_control:
+            return True, None
+        match = re.search(r'(?:s-maxage|max-age)=(\d+)', cache_control)
+        if match:
+            max_age = int(match.group(1))
+            return max_age >= cls.MIN_MAX_AGE, max_age
+        return not cache_control and bool(cls.STATIC_PATH_PATTERN.search(path)), cls.MIN_MAX_AGE
+
+
+class ProxyRequestHandler(BaseHTTPRequestHandler):
+    """Handles one client connection: absolute-form HTTP requests, CONNECT, and intercepted TLS requests."""
+    protocol_version = "HTTP/1.1"
+    HOP_BY_HOP_HEADERS = frozenset(('connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'proxy-connection', 'te', 'trailers', 'transfer-encoding', 'upgrade'))
+    TUNNEL_BUFFER_SIZE = 64 * 1024
+    RETRY_METHODS = frozenset(('GET', 'HEAD'))
+    STATS_PATH = "/__proxy_stats"
+
+    server: CachingProxyServer
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def do_CONNECT(self):
+        host, _, port = self.path.partition(':')
+        port = int(port or 443)
+        if host in self.server.intercept_hosts:
+            self._intercept_tls(host, port)
+        else:
+            self._tunnel(host, port)
+
+    def _tunnel(self, host: str, port: int):
+        """
+        Blind byte tunnel for HTTPS that isn't intercepted. It has no idle timeout,
+        since websockets (chart data feeds) can legitimately stay quiet for long;
+        it lasts until either side closes.
+        """
+        try:
+            upstream = socket.create_connection((host, port), timeout=self.server.UPSTREAM_TIMEOUT)
+        except OSError as e:
+            self.server.count('upstream_errors')
+            self.send_error(502, f"Tunnel to {host}:{port} failed: {e}")
+            return
+        upstream.settimeout(None)
+        self.server.count('tunnels')
+        self.send_response(200, "Connection Established")
+        self.end_headers()
+        sockets = [self.connection, upstream]
+        try:
+            while True:
+                readable, _, errored = select.select(sockets, [], sockets)
+                if errored:
+                    break
+                for sock in readable:
+                    data = sock.recv(self.TUNNEL_BUFFER_SIZE)
+                    if not data:
+                        return
+                    (upstream if sock is self.connection else self.connection).sendall(data)
+        except OSError:
+            pass
+        finally:
+            upstream.close()
+            self.close_connection = True
+
+    def _intercept_tls(self, host: str, port: int):
+        """Terminates the client's TLS with the proxy certificate and serves its requests like plain HTTP ones."""
+        self.send_response(200, "Connection Established")
+        self.end_headers()
+        try:
+            self.connection = self.server.tls_context.wrap_socket(self.connection, server_side=True)
+        except (ssl.SSLError, OSError) as e:
+            logger.warning(f"TLS handshake with client for {host} failed: {e}")
+            self.close_connection = True
+            return
+        self.server.count('intercepted')
+        # handle_one_request ends the connection when a request doesn't start within the idle timeout
+        self.connection.settimeout(self.server.CLIENT_IDLE_TIMEOUT)
+        self.rfile = self.connection.makefile('rb', self.rbufsize)
+        self.wfile = self.connection.makefile('wb', self.wbufsize)
+        self._tls_origin = ('https', host, port)
+        self.close_connection = False
+        while not self.close_connection:
+            self.handle_one_request()
+        self.close_connection = True
+
+    def do_GET(self):
+        if self.path == self.STATS_PATH and not getattr(self, '_tls_origin', None):
+            body = json.dumps(self.server.stats(), indent=1).encode()
+            self._send(200, [('Content-Type', 'application/json')], body)
+            return
+        self._proxy(cacheable=True)
+
+    def do_HEAD(self):
+        self._proxy(cacheable=False)
+
+    def do_POST(self):
+        self._proxy(cacheable=False)
+
+    do_PUT = do_DELETE = do_PATCH = do_OPTIONS = do_POST
+
+    def _origin(self) -> Tuple[str, str, int, str]:
+        """(scheme, host, port, path) of the request, from the absolute URL or the intercepted CONNECT."""
+        if getattr(self, '_tls_origin', None):
+            scheme, host, port = self._tls_origin
+            return scheme, host, port, self.path
+        parts = urlsplit(self.path)
+        if parts.scheme != 'http' or not parts.hostname:
+            raise ValueError(f"Not a proxy request: {self.path}")
+        path = parts.path or '/'
+        return 'http', parts.hostname, parts.port or 80, f"{path}?{parts.query}" if parts.query else path
+
+    def _proxy(self, cacheable: bool):
+        try:
+            scheme, host, port, path = self._origin()
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        request_body = self.rfile.read(length) if length else None
+        url = f"{scheme}://{host}:{port}{path}"
+        cache_key = AssetCache.make_key(url, self.headers.get('Accept-Encoding', '')) if cacheable else None
+        if cache_key:
+            cached = self.server.cache.get(cache_key)
+            if cached:
+                status, headers, body = cached
+                self._send(status, headers + [('X-Proxy-Cache', 'HIT')], body)
+                return
+
+        headers = {k: v for k, v in self.headers.items() if k.lower() not in self.HOP_BY_HOP_HEADERS}
+        try:
+            response, body = self._fetch(scheme, host, port, self.command, path, request_body, headers)
+        except (OSError, http.client.HTTPException) as e:
+            self.server.count('upstream_errors')
+            self.send_error(502, f"Upstream request to {host} failed: {e}")
+            return
+        response_headers = [(k, v) for k, v in response.getheaders() if k.lower() not in self.HOP_BY_HOP_HEADERS and k.lower() != 'content-length']
+        if cache_key and response.status == 200:
+            should_cache, max_age = self.server.cache_lifetime(path.split('?', 1)[0], response.msg)
+            if should_cache:
+                self.server.cache.put(cache_key, response.status, response_headers, body, max_age)
+            else:
+                self.server.count('passthrough')
+        else:
+            self.server.count('passthrough')
+        if self.command == 'HEAD':
+            self._send(response.status, response_headers, body, head=True, content_length=response.getheader('Content-Length'))
+            return
+        self._send(response.status, response_headers + ([('X-Proxy-Cache', 'MISS')] if cache_key else []), body)
+
+    def _fetch(self, scheme: str, host: str, port: int, method: str, path: str, body: Optional[bytes], headers: dict):
+        """Sends the request on this thread's kept-alive upstream connection, reconnecting once if it went stale.
+
+        Only GET and HEAD are retried: a failed POST may already have reached the origin.
+        """
+        connections = self.server.upstream_connections.__dict__
+        key = (scheme, host, port)
+        attempts = 2 if method in self.RETRY_METHODS else 1
+        for attempt in range(attempts):
+            connection = connections.get(key)
+            if connection is None:
+                if scheme == 'https':
+                    connection = http.client.HTTPSConnection(host, port, timeout=self.server.UPSTREAM_TIMEOUT, context=self.server.upstream_tls_context)
+                else:
+                    connection = http.client.HTTPConnection(host, port, timeout=self.server.UPSTREAM_TIMEOUT)
+                connections[key] = connection
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                return response, response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connections.pop(key, None)
+                if attempt == attempts - 1:
+                    raise
+
+    def _send(self, status: int, headers: list, body: bytes, head: bool = False, content_length: Optional[str] = None):
+        """Writes the response; HEAD replies carry the origin's Content-Length (if any) instead of the empty body's."""
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        if not head:
+            self.send_header('Content-Length', str(len(body)))
+        elif content_length is not None:
+            self.send_header('Content-Length', content_length)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caching forward proxy for the scrapers' browsers (chart page static assets).")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--max-bytes', type=int, default=CachingProxyServer.DEFAULT_MAX_BYTES, help="LRU budget for cached bodies.")
+    parser.add_argument('--cache-dir', help="Keep cached bodies on disk here instead of in memory.")
+    parser.add_argument('--cert', help="PEM certificate presented for intercepted HTTPS hosts.")
+    parser.add_argument('--key', help="PEM private key for --cert.")
+    parser.add_argument('--intercept-host', action='append', dest='intercept_hosts', help="HTTPS host to intercept and cache (repeatable).")
+    parser.add_argument('--stats-interval', type=float, default=60, help="Seconds between hit/miss log lines (0 disables).")
+    args = parser.parse_args()
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(), format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    cache = AssetCache(args.max_bytes, args.cache_dir)
+    server = CachingProxyServer((args.host, args.port), cache, args.cert, args.key, args.intercept_hosts or CachingProxyServer.DEFAULT_INTERCEPT_HOSTS)
+    if not args.cert:
+        logger.info("No --cert given: HTTPS is tunneled untouched and only plain HTTP assets are cached.")
+    if args.stats_interval > 0:
+        def log_stats():
+            while True:
+                time.sleep(args.stats_interval)
+                logger.info(f"Proxy stats: {json.dumps(server.stats())}")
+        threading.Thread(target=log_stats, name="proxy-stats", daemon=True).start()
+    logger.info(f"Caching proxy listening on http://{args.host}:{args.port} (stats at {ProxyRequestHandler.STATS_PATH}).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info(f"Proxy stats: {json.dumps(server.stats())}")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,35 +7,246 @@ from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchFrameException
 import time
 import json
+import base64
+import re
 import logging
 import os
+import sys
+import threading
+import asyncio
+import contextvars
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from dotenv import load_dotenv
 
+try:
+    from playwright.async_api import async_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+except ImportError:  # Optional, only needed for AsyncCoinglassScraper
+    async_playwright = None
+    PlaywrightError = PlaywrightTimeoutError = Exception
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # scraper_common.py lives at the repository root
+from scraper_common import (
+    COMMON_BLOCKED_URLS, ELEMENT_RECT_SCRIPT, DiskCacheTemplate, LatencyStats, PageWeightReport,
+    ProcessCaptureRunner as BaseProcessCaptureRunner, ResultCache, CaptureHistory, ScraperError, SingleFlight,
+    abort_blocked_request, allow_request, blocked_url_regex, chart_ready_expression, clipboard_hook_script,
+    clipboard_hook_wait_script, document_ready, open_network_counter, read_network_totals, set_request_blocking,
+    set_symbol_script, timed_phase, widget_snapshot_script,
+)
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Page weight report of the current asyncio task's most recent page load (AsyncCoinglassScraper)
+_ASYNC_PAGE_REPORT = contextvars.ContextVar('coinglass_page_report', default=None)
 
-class CoinglassScraperError(Exception):
+
+class CoinglassScraperError(ScraperError):
     """Custom exception for scraper errors."""
     pass
 
 
+@dataclass
+class CaptureResult:
+    """Outcome of a single (ticker, timeframe) capture job."""
+    ticker: str
+    timeframe: str | None
+    image_url: str | None = None
+    error: Exception | None = None
+    duration: float = 0.0  # seconds spent on this job
+    page_report: "PageWeightReport | None" = None  # network cost of the page load, if one happened and was measured
+
+    @property
+    def ok(self):
+        return self.error is None and bool(self.image_url)
+
+
+# Shared by every scraper in the process, so identical captures coalesce across instances, threads and event loops
+_CAPTURE_FLIGHTS = SingleFlight(CoinglassScraperError)
+
+
 class CoinglassScraper:
     """
     A scraper for capturing TradingView chart snapshots from Coinglass.
     """
     BASE_URL = "https://www.coinglass.com/tv/"
+    COINGLASS_ORIGIN_URL = "https://www.coinglass.com/"
+    TEMPLATE_VALUE = "5314147"  # cg_template_v2 chart template
     CLIPBOARD_WAIT_TIMEOUT = 10  # seconds to wait for iframe/elements
     MAX_CLIPBOARD_ATTEMPTS = 10
     CLIPBOARD_RETRY_INTERVAL = 1  # seconds between attempts
-    ACTION_DELAY = 0.5 # Small delay for actions
+    ACTION_TIMEOUT = 2  # max seconds to wait for focus or frame readiness after an action
+    ACTION_POLL_INTERVAL = 0.05  # seconds between focus/readiness probes
+    COPY_WAIT_TIME = 2  # seconds after Alt+S before reading (until latency stats are learned)
+    DEFAULT_LATENCY_STATS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "latency_stats.json")
+    DEFAULT_RESULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "result_cache")
+    DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "capture_history.db")
+    HOOKED_COPY_ATTEMPTS = 3  # Alt+S attempts on the in-frame capture path, each bounded by the learned deadline
+    # Records clipboard writes in the frame and wakes waiters the moment the snapshot JSON is copied
+    CLIPBOARD_HOOK_SCRIPT = clipboard_hook_script("__cg")
+    # Also empties the real clipboard so the fallback read can't return the previous pair's JSON;
+    # resolves false if the frame may not write it
+    CLIPBOARD_HOOK_RESET_SCRIPT = """
+        window.__cgClipboardText = null;
+        return navigator.clipboard.writeText('').then(() => true, () => false);
+    """
+    # execute_async_script: resolves with the copied text as soon as it is written, or null at the deadline
+    CLIPBOARD_HOOK_WAIT_SCRIPT = clipboard_hook_wait_script("__cg")
+    # Wraps the frame's fetch/XHR and wakes waiters with the first {"success", "data": {"imageId"}} response body
+    RESPONSE_HOOK_SCRIPT = """
+        (() => {
+            if (window.__cgSnapshotHooked) return;
+            window.__cgSnapshotHooked = true;
+            window.__cgSnapshotResponse = null;
+            window.__cgSnapshotWaiters = [];
+            const inspect = (text) => {
+                try {
+                    const body = JSON.parse(text);
+                    if (!body || !body.success || !body.data || !body.data.imageId) return;
+                } catch (e) { return; }
+                window.__cgSnapshotResponse = text;
+                window.__cgSnapshotWaiters.splice(0).forEach((notify) => notify(text));
+            };
+            if (window.fetch) {
+                const fetch = window.fetch;
+                window.fetch = function (...args) {
+                    return fetch.apply(this, args).then((response) => {
+                        if ((response.headers.get('content-type') || '').includes('json')) {
+                            response.clone().text().then(inspect, () => {});
+                        }
+                        return response;
+                    });
+                };
+            }
+            const send = XMLHttpRequest.prototype.send;
+            XMLHttpRequest.prototype.send = function (...args) {
+                this.addEventListener('load', () => {
+                    if (this.responseType === 'json') inspect(JSON.stringify(this.response));
+                    else if (!this.responseType || this.responseType === 'text') inspect(this.responseText);
+                });
+                return send.apply(this, args);
+            };
+        })();
+    """
+    RESPONSE_HOOK_RESET_SCRIPT = "window.__cgSnapshotResponse = null;"
+    RESPONSE_HOOK_WAIT_SCRIPT = """
+        const timeoutMs = arguments[0];
+        const done = arguments[arguments.length - 1];
+        if (window.__cgSnapshotResponse) { done(window.__cgSnapshotResponse); return; }
+        const timer = setTimeout(() => done(null), timeoutMs);
+        window.__cgSnapshotWaiters.push((text) => { clearTimeout(timer); done(text); });
+    """
+    SNAPSHOT_IMAGE_URL = "https://cdn.coinglasscdn.com/snapshot/{image_id}.png"
+    CHART_API_JS = "(window.tradingViewApi || window.TradingViewApi || window.tvWidget)"
+    CURRENT_SYMBOL_SCRIPT = f"""
+        try {{ return {CHART_API_JS}.activeChart().symbol(); }} catch (e) {{ return null; }}
+    """
+    # execute_async_script (inside the iframe): changes symbol and/or resolution in the live widget, see set_symbol_script
+    SET_SYMBOL_SCRIPT = set_symbol_script(CHART_API_JS)
+    WIDGET_SWITCH_TIMEOUT = 10  # seconds to wait for the widget to load a new pair/resolution
+    # Coinglass timeframe -> TradingView widget resolution
+    TIMEFRAME_RESOLUTIONS = {'m1': '1', 'm5': '5', 'm15': '15', 'm30': '30', 'h1': '60', 'h4': '240', 'h24': '1D'}
+    IFRAME_SELECTOR = "iframe[id^='tradingview_']"
+    CHART_CANVAS_SELECTOR = ".chart-container canvas"
+    # Evaluated inside the iframe: canvas drawn, no loading spinner, series data loaded
+    CHART_READY_EXPRESSION = chart_ready_expression(CHART_API_JS)
+    CHART_READY_TIMEOUT = 10  # seconds to wait for the widget's series data before capturing anyway
+    CHART_READY_POLL_INTERVAL = 0.25  # seconds between readiness probes
+    # --- Capture modes ---
+    CAPTURE_MODE_CLIPBOARD = "clipboard"  # focus the iframe, Alt+S, read the copied JSON
+    CAPTURE_MODE_WIDGET = "widget"  # call the embedded chart's snapshot function from inside the iframe
+    CAPTURE_MODE_RESPONSE = "response"  # Alt+S, then read imageId from the snapshot upload response
+    CAPTURE_MODES = (CAPTURE_MODE_CLIPBOARD, CAPTURE_MODE_WIDGET, CAPTURE_MODE_RESPONSE)
+    # Coinglass's own trackers on top of the shared blocklist (see COMMON_BLOCKED_URLS).
+    # The TradingView widget itself is served by coinglass.com.
+    DEFAULT_BLOCKED_URLS = COMMON_BLOCKED_URLS + (
+        "*://*.clarity.ms/*",
+        "*://hm.baidu.com/*",
+        "*://static.cloudflareinsights.com/*",
+    )
+    # execute_async_script (run inside the iframe): the embedded chart's snapshot function, see widget_snapshot_script
+    WIDGET_SNAPSHOT_SCRIPT = widget_snapshot_script(CHART_API_JS)
 
-    def __init__(self, headless=True, window_size="1920,1080"):
+    def __init__(self, headless=True, window_size="1920,1080", latency_stats_path=DEFAULT_LATENCY_STATS_PATH, capture_mode=CAPTURE_MODE_CLIPBOARD, reuse_iframe=True, blocked_urls=DEFAULT_BLOCKED_URLS, report_page_weight=False, disk_cache_dir=None, disk_cache_size=DiskCacheTemplate.DEFAULT_MAX_SIZE, proxy_server=None, proxy_spki=None, cache_results=False, result_cache_dir=DEFAULT_RESULT_CACHE_DIR, result_cache_staleness=0.0, history_path=None):
+        """
+        Args:
+            reuse_iframe (bool): Keep the page and TradingView iframe alive between captures
+                                 and change the pair/timeframe inside the existing widget,
+                                 navigating only if that fails.
+            capture_mode (str): "clipboard" (Alt+S and read the copied JSON), "widget"
+                                (call the embedded chart's snapshot function, no keystrokes;
+                                falls back to "clipboard" if the iframe exposes no API) or
+                                "response" (Alt+S and take imageId from the upload response
+                                seen by the iframe's fetch/XHR, no clipboard involved).
+            blocked_urls (tuple | None): URL patterns (CDP wildcards) the browser refuses to
+                                load, DEFAULT_BLOCKED_URLS by default; None loads everything.
+            report_page_weight (bool): Measure each page load from the CDP Network events
+                                (bytes, blocked requests, load time), log it and keep it
+                                in last_page_report / CaptureResult.page_report. Off by
+                                default, it turns on Chrome's performance log. Until an
+                                unblocked baseline exists for the exchange (a few loads,
+                                kept with the latency statistics), loads run unblocked.
+            disk_cache_dir (str | None): DiskCacheTemplate directory; the browser starts from a
+                                copy of this warm HTTP cache instead of an empty one.
+                                The share of responses served from it is in the page
+                                reports and disk_cache_hit_ratio; to count it, a disk
+                                cache also turns on Chrome's performance log.
+            disk_cache_size (int): Max bytes of the browser's disk cache copy.
+            proxy_server (str | None): Route the browser through a shared caching proxy such as
+                                caching_proxy/main-proxy.py, e.g. "http://127.0.0.1:8899".
+            proxy_spki (str | None): Base64 SHA-256 SPKI hash of the proxy's certificate,
+                                trusted so the proxy can serve cached HTTPS assets.
+            cache_results (bool): Return the image URL already captured for the same ticker and
+                                timeframe during the current candle instead of capturing again
+                                (ResultCache: memory, plus result_cache_dir on disk if set).
+                                Off by default.
+                                Captures with the default timeframe (None) are never cached.
+            result_cache_staleness (float): Seconds after a candle closes during which its
+                                image URL may still be reused.
+            history_path (str | None): SQLite CaptureHistory every browser capture (not cache hits
+                                or coalesced calls) is logged to with its phase timings,
+                                queryable with latest() or latency_by_exchange(), e.g.
+                                DEFAULT_HISTORY_PATH. Off (None) by default.
+        """
+        if capture_mode not in self.CAPTURE_MODES:
+            raise ValueError(f"capture_mode must be one of {self.CAPTURE_MODES}, got {capture_mode!r}.")
+        self.capture_mode = capture_mode
         self.headless = headless
         self.window_size = window_size
+        # Copy waits and retry spacing are calibrated from latencies observed per exchange/timeframe
+        self.latency_stats = LatencyStats(latency_stats_path)
         self.driver = None
         self.wait = None
+        self._bootstrap_script_id = None  # CDP id of the per-capture localStorage bootstrap script
+        self.reuse_iframe = reuse_iframe
+        self.blocked_urls = tuple(blocked_urls or ())
+        self.report_page_weight = report_page_weight
+        self.last_page_report = None
+        self.last_raw_response = None  # Clipboard/upload response behind the last image URL, for the capture history
+        self.disk_cache = DiskCacheTemplate(disk_cache_dir, disk_cache_size, prefix="cg-disk-cache-") if disk_cache_dir else None
+        self.proxy_server = proxy_server
+        self.proxy_spki = proxy_spki
+        self.result_cache = ResultCache(cache_dir=result_cache_dir, staleness_tolerance=result_cache_staleness) if cache_results else None
+        self.history = CaptureHistory(history_path) if history_path else None
+        self._network_totals = Counter()  # summed over all measured loads, for disk_cache_hit_ratio
+        self._network_totals_lock = threading.Lock()  # batch workers add their loads to their parent's totals
+        # What the live widget currently shows, set once a load or in-place switch is confirmed
+        self._loaded_ticker = None
+        self._loaded_timeframe = None
+
+    @property
+    def _counts_network(self):
+        """True if page loads are measured from the performance log: for page reports or the disk cache hit ratio."""
+        return self.report_page_weight or self.disk_cache is not None
+
+    @property
+    def disk_cache_hit_ratio(self):
+        """Share of responses served from the HTTP disk cache over all measured loads, None before any."""
+        with self._network_totals_lock:
+            responses, hits = self._network_totals['responses'], self._network_totals['cache_hits']
+        return hits / responses if responses else None
 
     def _setup_driver(self):
         """Configures and initializes the Chrome WebDriver."""
@@ -47,6 +258,14 @@ class CoinglassScraper:
         chrome_options.add_argument('--force-dark-mode')
         chrome_options.add_argument("--disable-extensions")
         chrome_options.add_argument(f"--window-size={self.window_size}")
+        if self.disk_cache:
+            for argument in self.disk_cache.chrome_arguments(self.disk_cache.new_worker_dir()):
+                chrome_options.add_argument(argument)
+        if self.proxy_server:
+            chrome_options.add_argument(f"--proxy-server={self.proxy_server}")
+            chrome_options.add_argument("--proxy-bypass-list=<-loopback>")  # local fixture sites go through the proxy too
+        if self.proxy_spki:
+            chrome_options.add_argument(f"--ignore-certificate-errors-spki-list={self.proxy_spki}")
 
         prefs = {
             "profile.content_settings.exceptions.clipboard": {
@@ -54,6 +273,10 @@ class CoinglassScraper:
             }
         }
         chrome_options.add_experimental_option("prefs", prefs)
+        if self._counts_network:
+            # Exposes CDP Network.* events through driver.get_log('performance')
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+            chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
 
         try:
             self.driver = webdriver.Chrome(options=chrome_options)
@@ -63,6 +286,13 @@ class CoinglassScraper:
             logging.error(f"Failed to initialize WebDriver: {e}")
             raise CoinglassScraperError("WebDriver initialization failed") from e
 
+        if self.blocked_urls:
+            try:
+                self.driver.execute_cdp_cmd("Network.enable", {})
+                self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(self.blocked_urls)})
+            except WebDriverException as e:
+                logging.warning(f"Could not install the request blocklist, loading pages unfiltered: {e}")
+
     def _navigate_to_page(self, ticker):
         """Navigates to the specific Coinglass ticker page."""
         url = f"{self.BASE_URL}{ticker}"
@@ -84,24 +314,24 @@ class CoinglassScraper:
             self.driver.execute_script(js_script)
             logging.info("Refreshing page for timeframe change to take effect.")
             self.driver.refresh()
-            # Wait briefly after refresh for page elements to reload, especially the iframe
-            time.sleep(3) # Adjust sleep time if needed
+            # The iframe itself is waited for by _find_and_switch_to_iframe
+            self._wait_until(document_ready, "the refreshed page")
         except WebDriverException as e:
             logging.error(f"Failed to set timeframe to '{timeframe}' via localStorage: {e}")
             # Decide if this should be a fatal error or just a warning
             # raise CoinglassScraperError(f"Failed to set timeframe '{timeframe}'") from e # Option: Make it fatal
             logging.warning("Proceeding without guaranteed timeframe change.") # Option: Continue
 
-    def _find_and_switch_to_iframe(self):
+    def _find_and_switch_to_iframe(self, click_first=True):
         """Finds the TradingView iframe and switches context to it."""
         try:
             iframe = self.wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "iframe[id^='tradingview_']"))
+                EC.presence_of_element_located((By.CSS_SELECTOR, self.IFRAME_SELECTOR))
             )
             logging.info("TradingView iframe found.")
-            # Click iframe first to potentially help focus
-            ActionChains(self.driver).move_to_element(iframe).click().perform()
-            time.sleep(self.ACTION_DELAY) # Short pause after click
+            if click_first:
+                # Click iframe first to potentially help focus
+                self._focus_iframe(iframe)
             self.driver.switch_to.frame(iframe)
             logging.info("Switched to TradingView iframe.")
             return iframe # Return iframe element for potential later use
@@ -115,48 +345,134 @@ class CoinglassScraper:
             logging.error(f"WebDriver error interacting with iframe: {e}")
             raise CoinglassScraperError("Error interacting with TradingView iframe") from e
 
-    def _trigger_copy_action(self):
-        """Sends the Alt+S key combination to trigger the copy action."""
+    def _wait_until(self, condition, description):
+        """Waits up to ACTION_TIMEOUT for condition(driver). On timeout, logs a warning and returns False."""
+        try:
+            WebDriverWait(self.driver, self.ACTION_TIMEOUT, poll_frequency=self.ACTION_POLL_INTERVAL).until(condition)
+            return True
+        except TimeoutException:
+            logging.warning(f"Timed out waiting for {description}, proceeding anyway.")
+            return False
+
+    def _focus_iframe(self, iframe_element):
+        """Clicks the iframe (from the default content) and waits until it holds the focus."""
+        ActionChains(self.driver).move_to_element(iframe_element).click().perform()
+        self._wait_until(
+            lambda driver: driver.execute_script("return document.activeElement === arguments[0];", iframe_element),
+            "the iframe to take focus",
+        )
+
+    def _copy_in_frame(self, stats_key=None):
+        """
+        Capture path that stays inside the iframe: hooks the frame's clipboard writes,
+        then clicks the chart and sends Alt+S in one action chain and blocks in a single
+        script call until the snapshot JSON is written. No frame switches or fixed sleeps.
+        Must be called inside the iframe.
+
+        Returns:
+            str | None | False: The copied content, None if nothing was copied after
+            retries, or False if the hook could not be installed.
+        """
+        return self._trigger_and_wait_in_frame(
+            self.CLIPBOARD_HOOK_SCRIPT, self.CLIPBOARD_HOOK_RESET_SCRIPT, self.CLIPBOARD_HOOK_WAIT_SCRIPT,
+            stats_key, fallback_script="return navigator.clipboard.readText();",
+        )
+
+    def _capture_snapshot_response(self, stats_key=None):
+        """
+        Like _copy_in_frame, but takes the snapshot JSON straight from the upload
+        response seen by the frame's fetch/XHR, never touching the clipboard.
+        Must be called inside the iframe; same return contract as _copy_in_frame.
+        """
+        return self._trigger_and_wait_in_frame(
+            self.RESPONSE_HOOK_SCRIPT, self.RESPONSE_HOOK_RESET_SCRIPT, self.RESPONSE_HOOK_WAIT_SCRIPT, stats_key,
+        )
+
+    def _trigger_and_wait_in_frame(self, hook_script, reset_script, wait_script, stats_key=None, fallback_script=None):
+        """
+        Installs hook_script, then per attempt: reset, click chart + Alt+S, block in wait_script.
+        If reset_script returns False (clipboard not cleared), fallback_script results equal to
+        what it read before Alt+S are ignored.
+        """
+        try:
+            self.driver.execute_script(hook_script)
+            chart = self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, self.CHART_CANVAS_SELECTOR)))
+        except (TimeoutException, WebDriverException) as e:
+            logging.warning(f"Could not prepare in-frame capture: {e}")
+            return False
+
+        first_wait, retry_interval = self.latency_stats.suggest(stats_key, self.COPY_WAIT_TIME, self.CLIPBOARD_RETRY_INTERVAL) if stats_key else (self.COPY_WAIT_TIME, self.CLIPBOARD_RETRY_INTERVAL)
+        timeout = max(self.COPY_WAIT_TIME, first_wait + 2 * retry_interval)
+        self.driver.set_script_timeout(timeout + 5)
+        for attempt in range(self.HOOKED_COPY_ATTEMPTS):
+            logging.info(f'Triggering in-frame snapshot (attempt {attempt + 1}/{self.HOOKED_COPY_ATTEMPTS})...')
+            try:
+                stale_content = None
+                if self.driver.execute_script(reset_script) is False and fallback_script:
+                    stale_content = self.driver.execute_script(fallback_script)
+                ActionChains(self.driver).move_to_element(chart).click().key_down(Keys.ALT).send_keys('s').key_up(Keys.ALT).perform()
+                started_at = time.monotonic()
+                content = self.driver.execute_async_script(wait_script, int(timeout * 1000))
+                if not content and fallback_script:
+                    # The copy may have bypassed the hooked APIs, check the real clipboard once
+                    content = self.driver.execute_script(fallback_script)
+                    if content and content == stale_content:
+                        logging.warning("Clipboard still holds the previous snapshot, ignoring it.")
+                        content = None
+            except WebDriverException as e:
+                logging.warning(f"Error during in-frame snapshot: {e}")
+                continue
+            if content and content.strip():
+                logging.info(f"Snapshot result received after {time.monotonic() - started_at:.2f}s.")
+                if stats_key:
+                    self.latency_stats.record(stats_key, time.monotonic() - started_at)
+                return content
+        return None
+
+    def _trigger_copy_action(self, wait=COPY_WAIT_TIME):
+        """Sends the Alt+S key combination to trigger the copy action, then waits `wait` seconds."""
         logging.info("Sending Alt+S key combination...")
         try:
             ActionChains(self.driver).key_down(Keys.ALT).send_keys('s').key_up(Keys.ALT).perform()
             logging.info("Alt+S sent.")
             # Wait a moment for the copy action to potentially complete
-            time.sleep(2) # Keep original sleep as clipboard action might take time
+            time.sleep(wait)
         except WebDriverException as e:
             logging.error(f"Failed to send Alt+S keys: {e}")
             raise CoinglassScraperError("Failed to send Alt+S key combination") from e
 
-    def _read_clipboard_with_retry(self, iframe_element):
-        """Attempts to read clipboard content via JS with retries."""
+    def _read_clipboard_with_retry(self, iframe_element, stats_key=None):
+        """Attempts to read clipboard content via JS with retries, using learned waits for stats_key."""
+        copy_wait, retry_interval = self.COPY_WAIT_TIME, self.CLIPBOARD_RETRY_INTERVAL
+        if stats_key:
+            copy_wait, retry_interval = self.latency_stats.suggest(stats_key, copy_wait, retry_interval)
+        # Only deliberate waits are recorded, the fixed focus/switch overhead would skew the estimate
+        waited = 0.0
         clipboard_content = None
         for attempt in range(self.MAX_CLIPBOARD_ATTEMPTS):
             logging.info(f'Attempting to get clipboard content (attempt {attempt + 1}/{self.MAX_CLIPBOARD_ATTEMPTS})...')
             try:
                 # 1. Switch back to default content
                 self.driver.switch_to.default_content()
-                time.sleep(self.ACTION_DELAY)
 
                 # 2. Click iframe to ensure focus before interaction
-                ActionChains(self.driver).move_to_element(iframe_element).click().perform()
-                time.sleep(self.ACTION_DELAY)
+                self._focus_iframe(iframe_element)
 
                 # 3. Switch into the iframe
                 self.driver.switch_to.frame(iframe_element)
-                time.sleep(self.ACTION_DELAY)
+                self._wait_until(document_ready, "the iframe document")
 
                 # 4. Trigger copy action (Alt+S) inside the iframe
-                self._trigger_copy_action()
+                self._trigger_copy_action(copy_wait)
+                waited += copy_wait
 
                 # 5. Switch back to default content to run JS for clipboard read
                 self.driver.switch_to.default_content()
-                time.sleep(self.ACTION_DELAY) # Give browser time to switch context
 
                 # 6. Attempt to read clipboard
                 logging.info("Attempting to read remote clipboard via JavaScript...")
                 # Re-focusing potentially needed before reading clipboard
-                ActionChains(self.driver).move_to_element(iframe_element).click().perform()
-                time.sleep(self.ACTION_DELAY)
+                self._focus_iframe(iframe_element)
                 self.driver.switch_to.frame(iframe_element) # Switch back IN to potentially execute JS in correct context
                 clipboard_content = self.driver.execute_script("return navigator.clipboard.readText();")
                 logging.info(f'Clipboard content via JS: {"[empty]" if not clipboard_content else "[content received]"}')
@@ -164,6 +480,8 @@ class CoinglassScraper:
 
                 if clipboard_content and clipboard_content.strip():
                     logging.info("Remote clipboard content retrieved via JS.")
+                    if stats_key:
+                        self.latency_stats.record(stats_key, waited)
                     return clipboard_content
                 else:
                     logging.warning("Remote clipboard empty or JS returned no content.")
@@ -178,13 +496,53 @@ class CoinglassScraper:
                     pass # Continue retry loop if possible
 
             if attempt < self.MAX_CLIPBOARD_ATTEMPTS - 1:
-                 logging.info(f"Clipboard empty/no content yet, waiting {self.CLIPBOARD_RETRY_INTERVAL}s before retrying...")
-                 time.sleep(self.CLIPBOARD_RETRY_INTERVAL)
+                 logging.info(f"Clipboard empty/no content yet, waiting {retry_interval:.2f}s before retrying...")
+                 time.sleep(retry_interval)
+                 waited += retry_interval
 
         logging.error("Failed to get clipboard content after multiple attempts.")
         raise CoinglassScraperError("Failed to get clipboard content after multiple attempts")
 
-    def _convert_coinglass_response(self, response_string):
+    def _take_widget_snapshot(self, stats_key=None):
+        """
+        Takes a snapshot through the embedded chart's API. Must be called inside the iframe.
+
+        Returns:
+            The image URL, None if the API produced nothing after retries, or
+            False if the iframe exposes no snapshot API at all.
+        """
+        timeout, _ = self.latency_stats.suggest(stats_key, self.COPY_WAIT_TIME, self.CLIPBOARD_RETRY_INTERVAL) if stats_key else (self.COPY_WAIT_TIME, None)
+        timeout = max(timeout * 2, self.COPY_WAIT_TIME)
+        self.driver.set_script_timeout(timeout + 5)
+        for attempt in range(self.MAX_CLIPBOARD_ATTEMPTS):
+            logging.info(f'Requesting snapshot from chart API (attempt {attempt + 1}/{self.MAX_CLIPBOARD_ATTEMPTS})...')
+            started_at = time.monotonic()
+            try:
+                result = self.driver.execute_async_script(self.WIDGET_SNAPSHOT_SCRIPT, int(timeout * 1000)) or {}
+            except WebDriverException as e:
+                logging.error(f"Error calling the chart snapshot API: {e}")
+                return None
+            if result.get('unavailable'):
+                if result.get('error'):
+                    logging.warning(f"Chart snapshot API failed: {result['error']}")
+                return False
+            snapshot = (result.get('id') or '').strip()
+            if snapshot:
+                if stats_key:
+                    self.latency_stats.record(stats_key, time.monotonic() - started_at)
+                return self._snapshot_to_image_url(snapshot)
+            logging.warning("Chart snapshot API produced no id before the deadline.")
+        return None
+
+    @classmethod
+    def _snapshot_to_image_url(cls, snapshot):
+        """Turns a snapshot result (the server's JSON response or a bare image id) into an image URL."""
+        if snapshot.startswith('{'):
+            return cls._convert_coinglass_response(snapshot)
+        return cls.SNAPSHOT_IMAGE_URL.format(image_id=snapshot)
+
+    @staticmethod
+    def _convert_coinglass_response(response_string):
         """Parses the JSON response from clipboard and extracts the image URL."""
         try:
             response = json.loads(response_string)
@@ -196,7 +554,7 @@ class CoinglassScraper:
             # Existing logic for dictionary response
             if response.get("success") and "imageId" in response.get("data", {}):
                 image_id = response["data"]["imageId"]
-                image_url = f"https://cdn.coinglasscdn.com/snapshot/{image_id}.png"
+                image_url = CoinglassScraper.SNAPSHOT_IMAGE_URL.format(image_id=image_id)
                 logging.info(f"Successfully extracted image URL: {image_url}")
                 return image_url
             else:
@@ -219,81 +577,490 @@ class CoinglassScraper:
                                      Example values: 'm1', 'm5', 'm15', 'm30', 'h1', 'h4', 'h24'.
                                       If None, the default timeframe is used.
         """
-        if not self.driver:
-             self._setup_driver()
+        try:
+            return self._capture_image_url(ticker, timeframe)
+        except CoinglassScraperError as e:
+            logging.error(f"Scraping failed: {e}")
+            return None # Or re-raise if preferred
+        except Exception as e:
+            logging.error(f"An unexpected error occurred: {e}", exc_info=True)
+            return None # Or re-raise
 
+    def _bootstrap_page_state(self, timeframe):
+        """
+        Injects the obe cookie, template and timeframe before the first document load
+        (CDP Network.setCookie + Page.addScriptToEvaluateOnNewDocument), so the
+        ticker page renders correctly on its only navigation.
+
+        Returns:
+            bool: False if CDP is unavailable and the caller should use the navigate-and-refresh flow.
+        """
+        obe_cookie_value = os.getenv("OBE_COOKIE")
+        if not obe_cookie_value:
+            logging.error("OBE_COOKIE environment variable not set.")
+            raise CoinglassScraperError("OBE_COOKIE environment variable not set.")
+
+        storage = {"cg_template_v2": self.TEMPLATE_VALUE}
+        if timeframe:
+            storage["cg_atinterval_v2main"] = timeframe
+        script = (
+            "(items => { if (window.top === window && location.hostname === 'www.coinglass.com') {"
+            " for (const [k, v] of Object.entries(items)) localStorage.setItem(k, v); } })"
+            f"({json.dumps(storage)});"
+        )
         try:
-            # Navigate to base domain to set cookie
-            base_domain_url = "https://www.coinglass.com/"
-            logging.info(f"Navigating to base domain {base_domain_url} to set cookie.")
-            self.driver.get(base_domain_url)
-            # Wait for page load or add a small delay
-            time.sleep(2) # Adjust as necessary
-
-            # Add the authentication cookie from environment variable
-            obe_cookie_value = os.getenv("OBE_COOKIE")
-            if not obe_cookie_value:
-                logging.error("OBE_COOKIE environment variable not set.")
-                raise CoinglassScraperError("OBE_COOKIE environment variable not set.")
-
-            cookie = {"name": "obe", "value": obe_cookie_value}
-            logging.info(f"Adding cookie: {cookie['name']}=[retrieved from env]") # Avoid logging sensitive value
-            self.driver.add_cookie(cookie)
-
-            # Set template in local storage
-            template_value = "5314147"
-            logging.info(f"Setting localStorage item: cg_template_v2={template_value}")
-            self.driver.execute_script(f"localStorage.setItem('cg_template_v2', '{template_value}');")
-
-            # Now navigate to the specific ticker page
+            self.driver.execute_cdp_cmd("Network.setCookie", {"name": "obe", "value": obe_cookie_value, "url": self.COINGLASS_ORIGIN_URL})
+            if self._bootstrap_script_id:
+                self.driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": self._bootstrap_script_id})
+                self._bootstrap_script_id = None
+            result = self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": script})
+            self._bootstrap_script_id = result.get("identifier")
+        except WebDriverException as e:
+            logging.warning(f"Could not bootstrap page state via CDP, falling back to navigate-and-refresh: {e}")
+            return False
+        logging.info(f"Bootstrapped obe cookie and localStorage {sorted(storage)} before page load.")
+        return True
+
+    def _load_chart(self, ticker, timeframe):
+        """
+        Sets the auth cookie and template, then opens the ticker page at the requested timeframe.
+        The caller marks the chart as loaded once the widget is confirmed (see _mark_loaded_chart).
+        """
+        self._forget_loaded_chart()
+        started_at = time.monotonic()
+        if self._counts_network:
+            read_network_totals(self.driver)  # the report covers this load only
+        # One-off unblocked loads give blocked loads a baseline to report savings against
+        baseline = bool(self.report_page_weight and self.blocked_urls and PageWeightReport.needs_baseline(self.latency_stats, "coinglass", ticker))
+        if baseline:
+            set_request_blocking(self.driver, self.blocked_urls, False)
+        try:
+            self._open_ticker_page(ticker, timeframe)
+        finally:
+            if baseline:
+                set_request_blocking(self.driver, self.blocked_urls, True)
+        self._report_page_weight(ticker, started_at, blocking=not baseline)
+
+    def _open_ticker_page(self, ticker, timeframe):
+        """Opens the ticker page with the cookie, template and timeframe in place."""
+        if self._bootstrap_page_state(timeframe):
             self._navigate_to_page(ticker)
-            # Set timeframe *after* navigation and *before* interacting with iframe
-            if timeframe:
-                self._set_timeframe(timeframe)
-            # Now find the iframe (which might have reloaded)
-            iframe_element = self._find_and_switch_to_iframe()
-            # Initial switch back to default content before retry loop
-            self.driver.switch_to.default_content()
-            time.sleep(self.ACTION_DELAY)
+            return
+
+        # Navigate to base domain to set cookie
+        base_domain_url = self.COINGLASS_ORIGIN_URL
+        logging.info(f"Navigating to base domain {base_domain_url} to set cookie.")
+        self.driver.get(base_domain_url)
+        # The cookie only needs the document on the domain
+        self._wait_until(document_ready, "the base domain page")
+
+        # Add the authentication cookie from environment variable
+        obe_cookie_value = os.getenv("OBE_COOKIE")
+        if not obe_cookie_value:
+            logging.error("OBE_COOKIE environment variable not set.")
+            raise CoinglassScraperError("OBE_COOKIE environment variable not set.")
+
+        cookie = {"name": "obe", "value": obe_cookie_value}
+        logging.info(f"Adding cookie: {cookie['name']}=[retrieved from env]") # Avoid logging sensitive value
+        self.driver.add_cookie(cookie)
+
+        # Set template in local storage
+        template_value = self.TEMPLATE_VALUE
+        logging.info(f"Setting localStorage item: cg_template_v2={template_value}")
+        self.driver.execute_script(f"localStorage.setItem('cg_template_v2', '{template_value}');")
+
+        # Now navigate to the specific ticker page
+        self._navigate_to_page(ticker)
+        # Set timeframe *after* navigation and *before* interacting with iframe
+        if timeframe:
+            self._set_timeframe(timeframe)
+
+    def _mark_loaded_chart(self, ticker, timeframe):
+        """Records that the widget is confirmed to show ticker at timeframe, enabling in-place switches from it."""
+        self._loaded_ticker, self._loaded_timeframe = ticker, timeframe
 
-            # NEW: Attempt to clear browser clipboard via JS before reading
-            logging.info("Attempting to clear browser clipboard via JavaScript before reading...")
+    def _forget_loaded_chart(self):
+        """Marks the widget state as unknown, so the next capture navigates instead of switching in place."""
+        self._loaded_ticker = self._loaded_timeframe = None
+
+    def _report_page_weight(self, ticker, started_at, blocking=True):
+        """
+        Measures the page load that began at started_at, logs it and keeps it as last_page_report.
+        Pass blocking=False for a load made with the blocklist lifted. Without
+        report_page_weight, only the disk cache hit ratio totals are updated.
+        """
+        if not self._counts_network:
+            return
+        try:
+            counts = read_network_totals(self.driver)
+        except WebDriverException as e:
+            logging.warning(f"Could not read network events for the page weight report: {e}")
+            return
+        with self._network_totals_lock:
+            self._network_totals.update(counts)
+        if not self.report_page_weight:
+            return
+        self.last_page_report = PageWeightReport.measure(self.latency_stats, "coinglass", ticker, counts, time.monotonic() - started_at, bool(self.blocked_urls) and blocking)
+        logging.info(f"Page weight for {ticker}: {self.last_page_report}")
+
+    @staticmethod
+    def _map_widget_symbol(current_symbol, current_ticker, new_ticker):
+        """
+        Derives the widget symbol for new_ticker from how the widget names current_ticker,
+        e.g. 'BINANCE:BTCUSDT' shown for 'Binance_BTCUSDT' maps 'OKX_ETHUSDT' to 'OKX:ETHUSDT'.
+        Returns None if the naming can't be inferred.
+        """
+        if not current_symbol or '_' not in current_ticker or '_' not in new_ticker:
+            return None
+        if current_symbol == current_ticker:
+            return new_ticker
+        current_exchange, current_pair = current_ticker.split('_', 1)
+        new_exchange, new_pair = new_ticker.split('_', 1)
+        match = re.fullmatch(rf'(.*?){re.escape(current_exchange)}(.*?){re.escape(current_pair)}(.*)', current_symbol, re.IGNORECASE)
+        if not match:
+            return None
+        prefix, separator, suffix = match.groups()
+        shown_exchange = current_symbol[len(prefix):len(prefix) + len(current_exchange)]
+        exchange = new_exchange.upper() if shown_exchange.isupper() else new_exchange
+        return f"{prefix}{exchange}{separator}{new_pair}{suffix}"
+
+    def _switch_pair_in_place(self, ticker, timeframe):
+        """
+        Changes the pair and/or timeframe inside the already loaded widget. Leaves the
+        driver in the default content. Returns False if the caller should navigate instead.
+        """
+        if not self.reuse_iframe or not self._loaded_ticker:
+            return False
+        resolution = None
+        if timeframe != self._loaded_timeframe:
+            resolution = self.TIMEFRAME_RESOLUTIONS.get(timeframe)
+            if not resolution:
+                return False
+        shown_symbol = None
+        try:
+            if not self.driver.current_url.startswith(self.BASE_URL):
+                self._forget_loaded_chart()
+                return False
+            iframe = self.driver.find_element(By.CSS_SELECTOR, self.IFRAME_SELECTOR)
+            if ticker == self._loaded_ticker and timeframe == self._loaded_timeframe:
+                return True
+            self.driver.switch_to.frame(iframe)
             try:
-                # Execute in default content context
-                self.driver.execute_script("navigator.clipboard.writeText('');")
-                logging.info("Browser clipboard cleared via JS (attempted).")
-                time.sleep(self.ACTION_DELAY) # Short pause after clearing
-            except WebDriverException as clear_err:
-                # Log warning but continue, clearing might not be allowed/needed
-                logging.warning(f"Could not clear browser clipboard via JS before reading: {clear_err}")
-
-            clipboard_data = self._read_clipboard_with_retry(iframe_element)
-            image_url = self._convert_coinglass_response(clipboard_data)
-            return image_url
+                symbol = None
+                if ticker != self._loaded_ticker:
+                    symbol = self._map_widget_symbol(self.driver.execute_script(self.CURRENT_SYMBOL_SCRIPT), self._loaded_ticker, ticker)
+                    if not symbol:
+                        logging.info("Could not infer the widget's symbol naming, navigating instead.")
+                        return False
+                result = self._set_widget_symbol(symbol, resolution)
+                if symbol and result.get('ok'):
+                    # The mapping is inferred, trust it only if the widget now reports that symbol
+                    shown_symbol = self.driver.execute_script(self.CURRENT_SYMBOL_SCRIPT)
+            finally:
+                self.driver.switch_to.default_content()
+        except WebDriverException as e:
+            logging.warning(f"In-place switch failed, navigating instead: {e}")
+            self._forget_loaded_chart()
+            return False
+        if not result.get('ok'):
+            logging.info(f"In-place switch unavailable ({result}), navigating instead.")
+            self._forget_loaded_chart()
+            return False
+        if symbol and (shown_symbol or '').upper() != symbol.upper():
+            logging.info(f"Widget shows {shown_symbol!r} instead of {symbol!r} after the switch, navigating instead.")
+            self._forget_loaded_chart()
+            return False
+        logging.info(f"Switched widget to {ticker} ({timeframe or 'default'}) in place.")
+        self._mark_loaded_chart(ticker, timeframe)
+        return True
+
+    def _set_widget_symbol(self, symbol, resolution):
+        """Runs SET_SYMBOL_SCRIPT in the current frame and returns its result dict."""
+        self.driver.set_script_timeout(self.WIDGET_SWITCH_TIMEOUT + 5)
+        return self.driver.execute_async_script(self.SET_SYMBOL_SCRIPT, symbol, resolution, self.WIDGET_SWITCH_TIMEOUT * 1000) or {}
+
+    def get_chart_png(self, ticker='Binance_BTCUSDT', timeframe: str | None = None):
+        """
+        Renders the chart locally and returns it as PNG bytes, skipping the Alt+S
+        snapshot upload entirely: the TradingView iframe is clipped straight out of
+        the browser with CDP Page.captureScreenshot.
 
+        Returns:
+            bytes | None: The PNG bytes, or None on failure.
+        """
+        if not self.driver:
+             self._setup_driver()
+        phases = {}
+        captured_at, started_at = time.time(), time.monotonic()
+        error = None
+        try:
+            with timed_phase(phases, "load"):
+                self._load_chart(ticker, timeframe)
+                self._find_and_switch_to_iframe()
+                self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, self.CHART_CANVAS_SELECTOR)))
+                self._wait_for_chart_ready()
+            self._mark_loaded_chart(ticker, timeframe)
+            self.driver.switch_to.default_content()
+            with timed_phase(phases, "snapshot"):
+                rect = self.driver.execute_script(ELEMENT_RECT_SCRIPT, self.IFRAME_SELECTOR)
+                if not rect or not rect.get('width') or not rect.get('height'):
+                    raise CoinglassScraperError("TradingView iframe has no visible area")
+                result = self.driver.execute_cdp_cmd("Page.captureScreenshot", {
+                    "format": "png",
+                    "clip": {**rect, "scale": 1},
+                    "captureBeyondViewport": True,
+                })
+            png = base64.b64decode(result["data"])
+            logging.info(f"Captured chart locally ({len(png)} bytes).")
+            return png
+        except TimeoutException as e:
+            logging.error("Timeout waiting for the chart to render inside the iframe.")
+            error = e
+            self._forget_loaded_chart()
+            return None
         except CoinglassScraperError as e:
-            logging.error(f"Scraping failed: {e}")
-            return None # Or re-raise if preferred
+            logging.error(f"Local capture failed: {e}")
+            error = e
+            self._forget_loaded_chart()
+            return None
+        except WebDriverException as e:
+            logging.error(f"WebDriver error during local capture: {e}")
+            error = e
+            self._forget_loaded_chart()
+            return None
+        finally:
+            try:
+                 if self.driver: self.driver.switch_to.default_content()
+            except WebDriverException:
+                 pass
+            if self.history:  # local renders have no link or image URL
+                self.history.record("coinglass", ticker, timeframe, None, None, captured_at, time.monotonic() - started_at, phases, error)
+
+    def _capture_image_url(self, ticker, timeframe):
+        """Runs the capture flow, raising CoinglassScraperError on failure. Concurrent requests for the same chart share one capture."""
+        return _CAPTURE_FLIGHTS.do(f"coinglass|{ticker}|{timeframe}", self._cached_image_url, ticker, timeframe)
+
+    def _cached_image_url(self, ticker, timeframe):
+        """Answers from the result cache, or captures on this scraper's browser and caches the image URL."""
+        if self.result_cache:
+            cached_url = self.result_cache.get("coinglass", ticker, timeframe)
+            if cached_url:
+                logging.info(f"Using image captured earlier in the current candle for {ticker} ({timeframe}).")
+                return cached_url
+        if not self.driver:
+             self._setup_driver()
+
+        phases = {}
+        captured_at, started_at = time.time(), time.monotonic()
+        image_url, error = None, None
+        self.last_raw_response = None
+        try:
+            with timed_phase(phases, "load"):
+                if not self._switch_pair_in_place(ticker, timeframe):
+                    self._load_chart(ticker, timeframe)
+            with timed_phase(phases, "snapshot"):
+                image_url = self._snapshot_loaded_chart(ticker, timeframe)
+            self._mark_loaded_chart(ticker, timeframe)
+            # Unparsable responses come back as-is, only real image URLs are worth reusing
+            if self.result_cache and image_url and image_url.startswith("https://"):
+                self.result_cache.put("coinglass", ticker, timeframe, image_url)
+            return image_url
+        except CoinglassScraperError as e:
+            error = e
+            self._forget_loaded_chart()
+            raise
         except Exception as e:
-            logging.error(f"An unexpected error occurred: {e}", exc_info=True)
+            error = e
+            self._forget_loaded_chart()
             # Ensure we switch back to default content in case of unexpected error
             try:
                  if self.driver: self.driver.switch_to.default_content()
             except WebDriverException:
                  pass
-            return None # Or re-raise
-        # No finally block needed here for driver quit if using __enter__/__exit__
+            raise CoinglassScraperError(f"Unexpected error during capture: {e}") from e
+        finally:
+            if self.history:
+                self.history.record("coinglass", ticker, timeframe, self.last_raw_response, image_url if image_url and image_url.startswith("https://") else None,
+                                    captured_at, time.monotonic() - started_at, phases, error)
+
+    def get_tradingview_image_urls_for_timeframes(self, ticker='Binance_BTCUSDT', timeframes=('m1', 'm5', 'm15', 'm30', 'h1', 'h4', 'h24')):
+        """
+        Captures one pair at several timeframes in a single page session, switching
+        the resolution inside the live widget instead of refreshing. Each timeframe
+        goes through the result cache and capture history and is shared with
+        concurrent captures of it, like get_tradingview_image_url.
+
+        Returns:
+            dict: timeframe -> image URL (None for timeframes that failed).
+        """
+        image_urls = {}
+        for timeframe in timeframes:
+            try:
+                image_urls[timeframe] = self._capture_image_url(ticker, timeframe)
+            except CoinglassScraperError as e:
+                logging.error(f"Capture failed for {ticker} ({timeframe}): {e}")
+                image_urls[timeframe] = None
+        return image_urls
+
+    def _wait_for_chart_ready(self):
+        """
+        Polls the current frame (the widget iframe) until the chart has drawn its series,
+        up to CHART_READY_TIMEOUT. On timeout, logs a warning and lets the capture proceed.
+        """
+        start = time.monotonic()
+        try:
+            WebDriverWait(self.driver, self.CHART_READY_TIMEOUT, poll_frequency=self.CHART_READY_POLL_INTERVAL).until(
+                lambda driver: driver.execute_script(f"return {self.CHART_READY_EXPRESSION};")
+            )
+            logging.info(f"Chart ready after {time.monotonic() - start:.2f}s.")
+            return True
+        except TimeoutException:
+            logging.warning(f"Chart not detected as ready within {self.CHART_READY_TIMEOUT}s, proceeding anyway.")
+            return False
+
+    def _snapshot_loaded_chart(self, ticker, timeframe):
+        """Takes the snapshot of the chart currently shown, using the configured capture mode."""
+        # Now find the iframe (which might have reloaded). Focus is handled by the capture itself.
+        iframe_element = self._find_and_switch_to_iframe(click_first=False)
+        # A drawn canvas is not enough after a navigation, the series may still be loading
+        self._wait_for_chart_ready()
+        if self.capture_mode == self.CAPTURE_MODE_WIDGET:
+            stats_key = LatencyStats.make_key("coinglass", "widget", ticker, timeframe)
+            image_url = self._take_widget_snapshot(stats_key)
+            self.driver.switch_to.default_content()
+            if image_url is not False:
+                if not image_url:
+                    raise CoinglassScraperError("Chart snapshot API produced no image id after retries")
+                return image_url
+            logging.warning("Chart snapshot API not available in the iframe, falling back to Alt+S.")
+            self.driver.switch_to.frame(iframe_element)
+        if self.capture_mode == self.CAPTURE_MODE_RESPONSE:
+            stats_key = LatencyStats.make_key("coinglass", "response", ticker, timeframe)
+            response_data = self._capture_snapshot_response(stats_key)
+            if response_data:
+                self.driver.switch_to.default_content()
+                self.last_raw_response = response_data
+                return self._convert_coinglass_response(response_data)
+            logging.warning("No snapshot upload response captured, falling back to the clipboard.")
+
+        stats_key = LatencyStats.make_key("coinglass", "copy", ticker, timeframe)
+        clipboard_data = self._copy_in_frame(stats_key)
+        self.driver.switch_to.default_content()
+        if clipboard_data is not False:
+            if not clipboard_data:
+                raise CoinglassScraperError("No snapshot copied after retries")
+            self.last_raw_response = clipboard_data
+            return self._convert_coinglass_response(clipboard_data)
+        logging.warning("Could not hook the iframe clipboard, falling back to the focus/switch retry loop.")
+
+        # Initial switch back to default content before retry loop
+        self.driver.switch_to.default_content()
+
+        # NEW: Attempt to clear browser clipboard via JS before reading
+        logging.info("Attempting to clear browser clipboard via JavaScript before reading...")
+        try:
+            # Execute in default content context, returning once the write has settled
+            cleared = self.driver.execute_async_script(
+                "const done = arguments[arguments.length - 1];"
+                "navigator.clipboard.writeText('').then(() => done(true), () => done(false));"
+            )
+            logging.info(f"Browser clipboard {'cleared' if cleared else 'not cleared'} via JS.")
+        except WebDriverException as clear_err:
+            # Log warning but continue, clearing might not be allowed/needed
+            logging.warning(f"Could not clear browser clipboard via JS before reading: {clear_err}")
+
+        stats_key = LatencyStats.make_key("coinglass", "clipboard", ticker, timeframe)
+        clipboard_data = self._read_clipboard_with_retry(iframe_element, stats_key)
+        self.last_raw_response = clipboard_data
+        image_url = self._convert_coinglass_response(clipboard_data)
+        return image_url
+
+    def get_tradingview_image_urls(self, jobs, concurrency=1):
+        """
+        Captures image URLs for many (ticker, timeframe) jobs.
+
+        Args:
+            jobs: Iterable of (ticker, timeframe) tuples; timeframe may be None.
+            concurrency (int): Max captures in flight. With concurrency > 1 each
+                               worker thread gets its own browser, sharing this
+                               scraper's latency statistics, result cache,
+                               capture history and disk cache template.
+
+        Returns:
+            list[CaptureResult]: One result per job, in the same order as `jobs`.
+        """
+        jobs = list(jobs)
+        if concurrency <= 1 or len(jobs) <= 1:
+            return [self._run_job(self, ticker, timeframe) for ticker, timeframe in jobs]
+
+        workers = min(concurrency, len(jobs))
+        local = threading.local()
+        scrapers = []
+        scrapers_lock = threading.Lock()
+
+        def run(job):
+            scraper = getattr(local, 'scraper', None)
+            if scraper is None:
+                scraper = local.scraper = CoinglassScraper(
+                    headless=self.headless, window_size=self.window_size, latency_stats_path=None, capture_mode=self.capture_mode,
+                    reuse_iframe=self.reuse_iframe, blocked_urls=self.blocked_urls, report_page_weight=self.report_page_weight,
+                    proxy_server=self.proxy_server, proxy_spki=self.proxy_spki, cache_results=False, history_path=None,
+                )
+                scraper.latency_stats, scraper.result_cache = self.latency_stats, self.result_cache
+                scraper.history, scraper.disk_cache = self.history, self.disk_cache
+                scraper._network_totals, scraper._network_totals_lock = self._network_totals, self._network_totals_lock
+                with scrapers_lock:
+                    scrapers.append(scraper)
+            return self._run_job(scraper, *job)
+
+        logging.info(f"Capturing {len(jobs)} job(s) with concurrency {workers}...")
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cg-capture") as executor:
+                return list(executor.map(run, jobs))
+        finally:
+            for scraper in scrapers:
+                # Only the browser belongs to the worker, the shared parts are closed with this scraper
+                scraper.result_cache = scraper.history = scraper.disk_cache = None
+                scraper.close()
+
+    @staticmethod
+    def _run_job(scraper, ticker, timeframe):
+        """Runs one capture on `scraper` and wraps its outcome in a CaptureResult."""
+        result = CaptureResult(ticker=ticker, timeframe=timeframe)
+        start = time.monotonic()
+        scraper.last_page_report = None
+        try:
+            result.image_url = scraper._capture_image_url(ticker, timeframe)
+        except CoinglassScraperError as e:
+            logging.error(f"Capture failed for {ticker} ({timeframe or 'default'}): {e}")
+            result.error = e
+        result.duration = time.monotonic() - start
+        result.page_report = scraper.last_page_report
+        return result
 
     def close(self):
-        """Closes the WebDriver."""
+        """Closes the WebDriver, persists latency statistics, refreshes the disk cache template and flushes the capture history."""
+        self.latency_stats.save()
         if self.driver:
             logging.info("Quitting browser...")
             try:
                 self.driver.quit()
                 logging.info("Browser quit successfully.")
                 self.driver = None
+                self._bootstrap_script_id = None
+                self._forget_loaded_chart()
             except WebDriverException as e:
                 logging.error(f"Error quitting WebDriver: {e}")
+        if self.result_cache and self.result_cache.counters:
+            logging.info(f"Result cache: {dict(self.result_cache.counters)}.")
+        if _CAPTURE_FLIGHTS.counters['coalesced']:
+            logging.info(f"Coalesced {_CAPTURE_FLIGHTS.counters['coalesced']} duplicate concurrent capture(s) so far in this process.")
+        if self.disk_cache_hit_ratio is not None:
+            logging.info(f"Disk cache hit ratio: {self.disk_cache_hit_ratio:.1%} of {self._network_totals['responses']} response(s).")
+        if self.disk_cache:
+            self.disk_cache.close()
+        if self.history:
+            self.history.close()
 
     # Context manager support
     def __enter__(self):
@@ -304,6 +1071,225 @@ class CoinglassScraper:
         self.close()
 
 
+class AsyncCoinglassScraper:
+    """
+    asyncio-native counterpart of CoinglassScraper built on Playwright's async API.
+    One browser is shared and each capture runs in its own page.
+    """
+    IFRAME_SELECTOR = "iframe[id^='tradingview_']"
+    CHART_SELECTOR = ".chart-container"
+    TEMPLATE_VALUE = CoinglassScraper.TEMPLATE_VALUE
+    # Records clipboard writes per frame so concurrent pages don't race on the shared clipboard
+    CLIPBOARD_HOOK_SCRIPT = CoinglassScraper.CLIPBOARD_HOOK_SCRIPT
+    CLIPBOARD_RESULT_SCRIPT = "() => window.__cgClipboardText"
+    PAGE_LOAD_TIMEOUT = 30  # seconds to wait for the iframe/chart
+
+    def __init__(self, headless=True, window_size="1920,1080", max_concurrent_pages=4, blocked_urls=CoinglassScraper.DEFAULT_BLOCKED_URLS, report_page_weight=False, latency_stats_path=CoinglassScraper.DEFAULT_LATENCY_STATS_PATH, proxy_server=None, proxy_spki=None, cache_results=False, result_cache_dir=CoinglassScraper.DEFAULT_RESULT_CACHE_DIR, result_cache_staleness=0.0, history_path=None):
+        """
+        blocked_urls, report_page_weight, proxy_server, proxy_spki, the result cache
+        options and history_path behave as in CoinglassScraper; blocked requests are aborted through a context route, and the
+        unblocked baseline is kept in the latency statistics at latency_stats_path.
+        """
+        if async_playwright is None:
+            raise CoinglassScraperError("playwright is required for AsyncCoinglassScraper (pip install playwright).")
+        self.headless = headless
+        self.window_size = window_size
+        self.max_concurrent_pages = max_concurrent_pages
+        self.blocked_urls = tuple(blocked_urls or ())
+        self.report_page_weight = report_page_weight
+        self.latency_stats = LatencyStats(latency_stats_path)
+        self.proxy_server = proxy_server
+        self.proxy_spki = proxy_spki
+        self.result_cache = ResultCache(cache_dir=result_cache_dir, staleness_tolerance=result_cache_staleness) if cache_results else None
+        self.history = CaptureHistory(history_path) if history_path else None
+        self._playwright = None
+        self.browser = None
+        self.context = None
+        self._semaphore = None
+
+    async def start(self):
+        """Launches the shared browser and a context carrying the obe cookie."""
+        obe_cookie_value = os.getenv("OBE_COOKIE")
+        if not obe_cookie_value:
+            raise CoinglassScraperError("OBE_COOKIE environment variable not set.")
+        width, height = (int(v) for v in self.window_size.split(","))
+        try:
+            self._playwright = await async_playwright().start()
+            args = ['--no-sandbox', '--disable-dev-shm-usage', '--force-dark-mode', '--disable-extensions']
+            if self.proxy_spki:
+                args.append(f"--ignore-certificate-errors-spki-list={self.proxy_spki}")
+            self.browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                args=args,
+                proxy={"server": self.proxy_server, "bypass": "<-loopback>"} if self.proxy_server else None,
+            )
+            self.context = await self.browser.new_context(
+                viewport={"width": width, "height": height},
+                permissions=["clipboard-read", "clipboard-write"],
+            )
+            await self.context.add_cookies([{"name": "obe", "value": obe_cookie_value, "domain": "www.coinglass.com", "path": "/"}])
+            await self.context.add_init_script(self.CLIPBOARD_HOOK_SCRIPT)
+            if self.blocked_urls:
+                await self.context.route(blocked_url_regex(self.blocked_urls), abort_blocked_request)
+        except PlaywrightError as e:
+            await self.close()
+            raise CoinglassScraperError("Playwright browser initialization failed") from e
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_pages)
+        logging.info("Playwright browser ready.")
+
+    @property
+    def last_page_report(self):
+        """Page weight report of the current task's most recent page load, if measured."""
+        return _ASYNC_PAGE_REPORT.get()
+
+    async def get_tradingview_image_url(self, ticker='Binance_BTCUSDT', timeframe: str | None = None):
+        """
+        Captures a Coinglass chart snapshot in a fresh page and returns the image URL.
+
+        Args:
+            ticker (str): The ticker symbol (e.g., 'Binance_BTCUSDT').
+            timeframe (str | None): e.g. 'm1', 'm5', 'm15', 'm30', 'h1', 'h4', 'h24'.
+        """
+        if not self.context:
+            raise CoinglassScraperError("Browser not initialized. Use within an 'async with' statement.")
+        # Concurrent requests for the same chart share one capture
+        return await _CAPTURE_FLIGHTS.do_async(f"coinglass|{ticker}|{timeframe}", self._cached_image_url, ticker, timeframe)
+
+    async def _cached_image_url(self, ticker, timeframe):
+        """Answers from the result cache, or captures in a fresh page and caches the image URL."""
+        if self.result_cache:
+            cached_url = self.result_cache.get("coinglass", ticker, timeframe)
+            if cached_url:
+                logging.info(f"Using image captured earlier in the current candle for {ticker} ({timeframe}).")
+                return cached_url
+        phases = {}
+        captured_at, started_at = time.time(), time.monotonic()
+        raw_response, image_url, error = None, None, None
+        try:
+            raw_response = await self._capture_raw_response(ticker, timeframe, phases)
+            image_url = CoinglassScraper._convert_coinglass_response(raw_response)
+        except PlaywrightError as e:
+            logging.error(f"Playwright error during capture of {ticker}: {e}")
+            error = e
+        except CoinglassScraperError as e:
+            logging.error(f"Scraping failed: {e}")
+            error = e
+        is_image_url = bool(image_url and image_url.startswith("https://"))
+        if self.history:
+            self.history.record("coinglass", ticker, timeframe, raw_response, image_url if is_image_url else None,
+                                captured_at, time.monotonic() - started_at, phases, error)
+        if self.result_cache and is_image_url:
+            self.result_cache.put("coinglass", ticker, timeframe, image_url)
+        return image_url
+
+    async def _capture_raw_response(self, ticker, timeframe, phases=None):
+        """Runs the capture flow in a fresh page and returns the copied snapshot response, adding the load and snapshot times to phases."""
+        async with self._semaphore:
+            page = await self.context.new_page()
+            try:
+                # Template and timeframe are seeded before the page's own scripts run, so one load is enough
+                storage = {"cg_template_v2": self.TEMPLATE_VALUE}
+                if timeframe:
+                    storage["cg_atinterval_v2main"] = timeframe
+                await page.add_init_script(
+                    "(items => { if (location.hostname.endsWith('coinglass.com')) {"
+                    " for (const [k, v] of Object.entries(items)) localStorage.setItem(k, v); } })"
+                    f"({json.dumps(storage)});"
+                )
+                counts = Counter()
+                session = None
+                baseline = bool(self.report_page_weight and self.blocked_urls and PageWeightReport.needs_baseline(self.latency_stats, "coinglass", ticker))
+                if baseline:
+                    # Page routes take precedence over the context's blocklist route
+                    await page.route(blocked_url_regex(self.blocked_urls), allow_request)
+                if self.report_page_weight:
+                    session = await open_network_counter(self.context, page, counts)
+                started_at = time.monotonic()
+                url = f"{CoinglassScraper.BASE_URL}{ticker}"
+                logging.info(f"Navigating to {url}")
+                with timed_phase(phases, "load"):
+                    await page.goto(url, wait_until="domcontentloaded")
+
+                    iframe = await page.wait_for_selector(self.IFRAME_SELECTOR, timeout=self.PAGE_LOAD_TIMEOUT * 1000)
+                    frame = await iframe.content_frame()
+                    chart = frame.locator(self.CHART_SELECTOR).first
+                    await chart.wait_for(state="visible", timeout=self.PAGE_LOAD_TIMEOUT * 1000)
+                    await self._wait_for_chart_ready(frame)
+                if baseline:
+                    await page.unroute(blocked_url_regex(self.blocked_urls), allow_request)
+                if session:
+                    await session.detach()
+                    report = PageWeightReport.measure(self.latency_stats, "coinglass", ticker, counts, time.monotonic() - started_at, bool(self.blocked_urls) and not baseline)
+                    _ASYNC_PAGE_REPORT.set(report)
+                    logging.info(f"Page weight for {ticker}: {report}")
+
+                with timed_phase(phases, "snapshot"):
+                    return await self._trigger_copy_and_read(page, frame, chart)
+            finally:
+                await page.close()
+
+    async def _wait_for_chart_ready(self, frame):
+        """Waits for the same readiness probe as CoinglassScraper inside the widget frame, proceeding on timeout."""
+        try:
+            await frame.wait_for_function(
+                CoinglassScraper.CHART_READY_EXPRESSION,
+                timeout=CoinglassScraper.CHART_READY_TIMEOUT * 1000,
+                polling=int(CoinglassScraper.CHART_READY_POLL_INTERVAL * 1000),
+            )
+            return True
+        except PlaywrightTimeoutError:
+            logging.warning(f"Chart not detected as ready within {CoinglassScraper.CHART_READY_TIMEOUT}s, proceeding anyway.")
+            return False
+
+    async def _trigger_copy_and_read(self, page, frame, chart):
+        """Presses Alt+S inside the chart and waits for the iframe to record the copied response."""
+        for attempt in range(CoinglassScraper.MAX_CLIPBOARD_ATTEMPTS):
+            logging.info(f'Attempting to get clipboard content (attempt {attempt + 1}/{CoinglassScraper.MAX_CLIPBOARD_ATTEMPTS})...')
+            await chart.click()
+            await page.keyboard.press("Alt+s")
+            await asyncio.sleep(CoinglassScraper.CLIPBOARD_RETRY_INTERVAL)
+            content = await frame.evaluate(self.CLIPBOARD_RESULT_SCRIPT) or await page.evaluate(self.CLIPBOARD_RESULT_SCRIPT)
+            if content and content.strip():
+                return content
+        raise CoinglassScraperError("Failed to get clipboard content after multiple attempts")
+
+    async def close(self):
+        """Closes the browser, stops Playwright, persists latency statistics and flushes the capture history."""
+        self.latency_stats.save()
+        if self.browser:
+            try:
+                await self.browser.close()
+            except PlaywrightError as e:
+                logging.error(f"Error closing browser: {e}")
+            self.browser = None
+            self.context = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        if self.history:
+            await asyncio.to_thread(self.history.close)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class ProcessCaptureRunner(BaseProcessCaptureRunner):
+    """
+    Fans (ticker, timeframe) jobs out to worker processes, each owning its own
+    CoinglassScraper; scraper_kwargs are passed to every worker's scraper.
+    """
+    scraper_class = CoinglassScraper
+    error_class = CoinglassScraperError
+
+    def _failed_result(self, job, error):
+        ticker, timeframe = job
+        return CaptureResult(ticker=ticker, timeframe=timeframe, error=error)
+
+
 # Example Usage:
 if __name__ == "__main__":
     ticker_to_capture = "Binance_BTCUSDT"
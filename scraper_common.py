@@ -0,0 +1,1047 @@
+"""
+Building blocks shared by the TradingView and Coinglass scrapers: the
+request blocklist and network counters, the in-page chart scripts, latency
+statistics, page weight reports, the warm disk cache template, the
+bar-keyed result cache, the capture history, capture coalescing and the
+process-pool capture runner.
+
+Both scrapers live in hyphen-named scripts, so each one puts the repository
+root on sys.path and imports this module from there.
+"""
+import abc
+import asyncio
+import calendar
+import hashlib
+import json
+import math
+import logging
+import multiprocessing
+import os
+import queue
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from selenium.common.exceptions import WebDriverException
+
+
+class ScraperError(Exception):
+    """Base class of TradingViewScraperError and CoinglassScraperError."""
+    pass
+
+
+@contextmanager
+def timed_phase(phases: Optional[Dict[str, float]], name: str):
+    """Adds the wall time spent in the block to phases[name] (no-op when phases is None)."""
+    started_at = time.monotonic()
+    try:
+        yield
+    finally:
+        if phases is not None:
+            phases[name] = phases.get(name, 0.0) + time.monotonic() - started_at
+
+
+# Blocked at browser level (CDP Network.setBlockedURLs wildcards, or Playwright routes via
+# blocked_url_regex): ads, analytics, social widgets and third-party web fonts, none of which
+# a chart or its snapshot needs. Each scraper adds the trackers of its own site.
+COMMON_BLOCKED_URLS = (
+    "*://*.doubleclick.net/*",
+    "*://*.googlesyndication.com/*",
+    "*://*.googletagservices.com/*",
+    "*://*.googletagmanager.com/*",
+    "*://*.google-analytics.com/*",
+    "*://*.facebook.net/*",
+    "*://*.facebook.com/tr*",
+    "*://platform.twitter.com/*",
+    "*://*.hotjar.com/*",
+    "*://fonts.googleapis.com/*",
+    "*://fonts.gstatic.com/*",
+)
+
+# Page-absolute rect of the element matching arguments[0], as needed for a CDP screenshot clip
+ELEMENT_RECT_SCRIPT = """
+        const el = document.querySelector(arguments[0]);
+        if (!el) return null;
+        const r = el.getBoundingClientRect();
+        return {x: r.left + window.scrollX, y: r.top + window.scrollY, width: r.width, height: r.height};
+    """
+
+
+def blocked_url_regex(patterns: Iterable[str]) -> "re.Pattern":
+    """Compiles CDP Network.setBlockedURLs wildcard patterns ('*' matches anything) into one regex, for Playwright routes."""
+    return re.compile('|'.join(f"^{'.*'.join(re.escape(part) for part in pattern.split('*'))}$" for pattern in patterns))
+
+
+def set_request_blocking(driver, blocked_urls: Iterable[str], enabled: bool):
+    """Turns the CDP blocklist on the driver on or off, e.g. around an unblocked baseline load. Failures are only logged."""
+    try:
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(blocked_urls) if enabled else []})
+    except WebDriverException as e:
+        logging.getLogger(__name__).warning(f"Could not {'restore' if enabled else 'lift'} the request blocklist: {e}")
+
+
+def read_network_totals(driver) -> Counter:
+    """
+    Drains the driver's performance log, returning counts since the last read: 'bytes'
+    transferred, 'blocked' requests, 'responses' and disk 'cache_hits'.
+    """
+    counts = Counter()
+    for entry in driver.get_log('performance'):
+        raw = entry.get('message', '')
+        # Skip the bulk (websocket frames, request starts) without parsing it
+        if 'Network.loadingFinished' not in raw and 'Network.responseReceived"' not in raw and 'blockedReason' not in raw:
+            continue
+        try:
+            message = json.loads(raw)['message']
+        except (KeyError, ValueError):
+            continue
+        method, params = message.get('method'), message.get('params', {})
+        if method == 'Network.loadingFinished':
+            counts['bytes'] += int(params.get('encodedDataLength', 0))
+        elif method == 'Network.responseReceived':
+            counts['responses'] += 1
+            counts['cache_hits'] += int(bool(params.get('response', {}).get('fromDiskCache')))
+        elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+            counts['blocked'] += 1
+    return counts
+
+
+async def open_network_counter(context, page, counts: Counter):
+    """
+    Playwright counterpart of read_network_totals: adds the page's traffic to counts
+    (same keys) as it happens. Returns the CDP session; detach it to stop counting.
+    """
+    session = await context.new_cdp_session(page)
+    await session.send('Network.enable')
+    session.on('Network.loadingFinished', lambda event: counts.update(bytes=int(event.get('encodedDataLength', 0))))
+    session.on('Network.responseReceived', lambda event: counts.update(responses=1, cache_hits=int(bool(event.get('response', {}).get('fromDiskCache')))))
+    page.on('requestfailed', lambda request: counts.update(blocked=int('BLOCKED_BY_CLIENT' in (request.failure or ''))))
+    return session
+
+
+async def abort_blocked_request(route):
+    """Playwright route handler for blocklisted URLs."""
+    await route.abort('blockedbyclient')
+
+
+async def allow_request(route):
+    """Playwright page route handler that lets a blocklisted URL through, for unblocked baseline loads."""
+    await route.continue_()
+
+
+def exchange_of(ticker: str) -> str:
+    """The exchange prefix of a ticker: 'BYBIT' for 'BYBIT:BTCUSDT.P' (TradingView), 'Binance' for 'Binance_BTCUSDT' (Coinglass), else ''."""
+    for separator in (':', '_'):
+        if separator in ticker:
+            return ticker.split(separator, 1)[0]
+    return ''
+
+
+def document_ready(driver) -> bool:
+    """WebDriverWait condition: the current document (or frame) has finished parsing."""
+    return driver.execute_script("return document.readyState;") in ("interactive", "complete")
+
+
+_WIDGET_SNAPSHOT_TEMPLATE = """
+        const timeoutMs = arguments[0];
+        const done = arguments[arguments.length - 1];
+        const api = %(api)s;
+        if (!api || typeof api.takeScreenshot !== 'function') { done({unavailable: true}); return; }
+        let finished = false;
+        const finish = (value) => {
+            if (finished) return;
+            finished = true;
+            clearTimeout(timer);
+            try { if (typeof api.unsubscribe === 'function') api.unsubscribe('onScreenshotReady', onReady); } catch (e) {}
+            done(value);
+        };
+        const onReady = (id) => { if (id) finish({id: typeof id === 'string' ? id : JSON.stringify(id)}); };
+        const timer = setTimeout(() => finish({}), timeoutMs);
+        try { if (typeof api.subscribe === 'function') api.subscribe('onScreenshotReady', onReady); } catch (e) {}%(clipboard)s
+        try {
+            const result = api.takeScreenshot();
+            if (result && typeof result.then === 'function') {
+                result.then((id) => { if (id) onReady(id); }, () => {});
+            }
+        } catch (e) { finish({unavailable: true, error: String(e)}); }
+    """
+_WIDGET_SNAPSHOT_CLIPBOARD_TEMPLATE = """
+        if (window.%(prefix)sClipboardWaiters) {
+            window.%(prefix)sClipboardText = null;
+            window.%(prefix)sClipboardWaiters.push((text) => finish({link: text}));
+        }"""
+
+
+_CHART_READY_TEMPLATE = """(() => {
+        const canvas = document.querySelector('.chart-container canvas, .chart-markup-table canvas');
+        if (!canvas || !canvas.width || !canvas.height) return false;
+        const spinners = document.querySelectorAll('.tv-spinner, [class*="loader-"], [class*="spinner-"]');
+        if (Array.from(spinners).some(el => el.offsetParent !== null)) return false;
+        try {
+            const api = %(api)s;
+            const chart = api && api.activeChart();
+            if (chart && typeof chart.dataReady === 'function') return !!chart.dataReady();
+        } catch (e) {}
+        const value = document.querySelector('[data-name="legend-series-item"] [class*="valueValue"]');
+        const text = value ? value.textContent.trim() : '';
+        return text !== '' && text !== '\u2205';
+    })()"""
+
+
+def chart_ready_expression(api_expression: str) -> str:
+    """
+    JS expression that is true once a TradingView chart in the current document is ready:
+    canvas drawn, no visible loading spinner and series data loaded (via dataReady() of the
+    charting library at api_expression when exposed, else a populated price legend).
+    """
+    return _CHART_READY_TEMPLATE % {'api': api_expression}
+
+
+_CLIPBOARD_HOOK_TEMPLATE = """
+        (() => {
+            if (window.%(prefix)sClipboardHooked) return;
+            window.%(prefix)sClipboardHooked = true;
+            window.%(prefix)sClipboardText = null;
+            window.%(prefix)sClipboardWaiters = [];
+            const record = (text) => {
+                if (!text) return;
+                window.%(prefix)sClipboardText = String(text);
+                window.%(prefix)sClipboardWaiters.splice(0).forEach((notify) => notify(window.%(prefix)sClipboardText));
+            };
+            if (navigator.clipboard && navigator.clipboard.writeText) {
+                const writeText = navigator.clipboard.writeText.bind(navigator.clipboard);
+                navigator.clipboard.writeText = (text) => { record(text); return writeText(text); };
+            }
+            const setData = DataTransfer.prototype.setData;
+            DataTransfer.prototype.setData = function (format, data) {
+                if (format.startsWith('text')) { record(data); }
+                return setData.call(this, format, data);
+            };
+            const execCommand = document.execCommand.bind(document);
+            document.execCommand = (command, ...args) => {
+                if (command === 'copy') {
+                    const el = document.activeElement;
+                    record(el && 'value' in el ? el.value.substring(el.selectionStart, el.selectionEnd) : String(window.getSelection()));
+                }
+                return execCommand(command, ...args);
+            };
+        })();
+    """
+_CLIPBOARD_HOOK_WAIT_TEMPLATE = """
+        const timeoutMs = arguments[0];
+        const done = arguments[arguments.length - 1];
+        if (window.%(prefix)sClipboardText) { done(window.%(prefix)sClipboardText); return; }
+        const timer = setTimeout(() => done(null), timeoutMs);
+        window.%(prefix)sClipboardWaiters.push((text) => { clearTimeout(timer); done(text); });
+    """
+
+
+def clipboard_hook_script(prefix: str) -> str:
+    """
+    Page script that records clipboard writes (Clipboard API, copy events, execCommand) in
+    window.<prefix>ClipboardText and wakes waiters the moment something is copied. Idempotent,
+    so it can run both before page scripts and again on an already loaded page.
+    """
+    return _CLIPBOARD_HOOK_TEMPLATE % {'prefix': prefix}
+
+
+def clipboard_hook_wait_script(prefix: str) -> str:
+    """execute_async_script body (arguments: timeoutMs) resolving with the text copied under clipboard_hook_script(prefix), or null at the deadline."""
+    return _CLIPBOARD_HOOK_WAIT_TEMPLATE % {'prefix': prefix}
+
+
+_SET_SYMBOL_TEMPLATE = """
+        const [symbol, resolution, timeoutMs] = arguments;
+        const done = arguments[arguments.length - 1];
+        let chart = null;
+        try { chart = %(api)s.activeChart(); } catch (e) {}
+        if (!chart || typeof chart.setSymbol !== 'function') { done({unavailable: true}); return; }
+        let finished = false;
+        const finish = (value) => { if (!finished) { finished = true; clearTimeout(timer); done(value); } };
+        const timer = setTimeout(() => finish({timeout: true}), timeoutMs);
+        const call = (fn, arg, next) => {
+            let called = false;
+            const once = () => { if (!called) { called = true; next(); } };
+            const result = fn.call(chart, arg, once);
+            if (result && typeof result.then === 'function') result.then(once, (e) => finish({error: String(e)}));
+        };
+        const setResolution = () => {
+            if (resolution && typeof chart.setResolution === 'function' && String(chart.resolution()) !== String(resolution)) {
+                call(chart.setResolution, resolution, () => finish({ok: true}));
+            } else {
+                finish({ok: true});
+            }
+        };
+        try {
+            if (symbol && typeof chart.symbol === 'function' && chart.symbol() !== symbol) call(chart.setSymbol, symbol, setResolution);
+            else setResolution();
+        } catch (e) { finish({unavailable: true, error: String(e)}); }
+    """
+
+
+def set_symbol_script(api_expression: str) -> str:
+    """
+    execute_async_script body (arguments: symbol, resolution, timeoutMs) that switches the
+    active chart of the charting library at api_expression in place. Resolves with {ok: true}
+    once the chart reports the new data loaded, {unavailable: true} if there is no chart API,
+    {error} if a switch failed, or {timeout: true} at the deadline.
+    """
+    return _SET_SYMBOL_TEMPLATE % {'api': api_expression}
+
+
+def widget_snapshot_script(api_expression: str, clipboard_prefix: Optional[str] = None) -> str:
+    """
+    execute_async_script body (arguments: timeoutMs) that asks the charting library at
+    api_expression for a server snapshot. Resolves with {id} as soon as it is ready
+    (onScreenshotReady or a returned promise), {unavailable: true} if no snapshot API is
+    exposed, or {} at the deadline. With clipboard_prefix, a link copied while the clipboard
+    hook with that prefix is installed also resolves it, as {link}.
+    """
+    clipboard = _WIDGET_SNAPSHOT_CLIPBOARD_TEMPLATE % {'prefix': clipboard_prefix} if clipboard_prefix else ''
+    return _WIDGET_SNAPSHOT_TEMPLATE % {'api': api_expression, 'clipboard': clipboard}
+
+
+class LatencyStats:
+    """
+    Running latency statistics per key (provider, exchange, interval): an EWMA
+    plus a streaming p95 estimate. Used to pick the first wait and the retry
+    spacing instead of fixed constants, and persisted as JSON so a fresh
+    process starts tuned.
+    """
+    EWMA_ALPHA = 0.2
+    P95_STEP_FRACTION = 0.1 # Quantile estimate step, relative to the EWMA
+    FIRST_WAIT_FRACTION = 0.8 # First check slightly before the typical latency so the estimate can also move down
+    MIN_SAMPLES = 3 # Below this, callers get their static defaults
+    MIN_WAIT = 0.1 # Never suggest waits shorter than this (seconds)
+    SAVE_EVERY = 10 # Persist after this many new samples
+
+    def __init__(self, path: Optional[str] = None):
+        """Loads existing statistics from `path` if given and present."""
+        self.path = path
+        self._stats: Dict[str, dict] = {}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._stats = json.load(f)
+                self.logger.info(f"Loaded latency statistics for {len(self._stats)} key(s) from {path}.")
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Could not load latency statistics from {path}: {e}")
+
+    @staticmethod
+    def make_key(provider: str, phase: str, ticker: str, interval: Optional[str]) -> str:
+        """Builds a stats key like 'tradingview:clipboard:BYBIT:15' or 'coinglass:copy:Binance:m5' from a ticker's exchange prefix."""
+        return f"{provider}:{phase}:{exchange_of(ticker)}:{interval or ''}"
+
+    def record(self, key: str, seconds: float):
+        """Adds one observed latency sample."""
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                self._stats[key] = {'count': 1, 'ewma': seconds, 'p95': seconds}
+            else:
+                entry['count'] += 1
+                entry['ewma'] += self.EWMA_ALPHA * (seconds - entry['ewma'])
+                # Stochastic quantile update: drifts up 19x faster than down, settling at p95
+                step = self.P95_STEP_FRACTION * max(entry['ewma'], self.MIN_WAIT)
+                entry['p95'] += step * 0.95 if seconds > entry['p95'] else -step * 0.05
+            self._unsaved += 1
+            should_save = self.path and self._unsaved >= self.SAVE_EVERY
+        if should_save:
+            self.save()
+
+    def suggest(self, key: str, default_wait: float, default_interval: float) -> Tuple[float, float]:
+        """
+        Returns (first_wait, retry_interval) for the key: first check just under the EWMA,
+        then retry in steps spanning the EWMA-to-p95 gap. Falls back to the
+        defaults until enough samples exist.
+        """
+        with self._lock:
+            entry = self._stats.get(key)
+            if not entry or entry['count'] < self.MIN_SAMPLES:
+                return default_wait, default_interval
+            ewma, p95 = entry['ewma'], max(entry['p95'], entry['ewma'])
+        return max(ewma * self.FIRST_WAIT_FRACTION, self.MIN_WAIT), max((p95 - ewma) / 2, self.MIN_WAIT)
+
+    def typical(self, key: str) -> Optional[float]:
+        """The EWMA for the key, or None until enough samples exist."""
+        with self._lock:
+            entry = self._stats.get(key)
+            if not entry or entry['count'] < self.MIN_SAMPLES:
+                return None
+            return entry['ewma']
+
+    def save(self):
+        """Writes the statistics to `path` atomically."""
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = json.dumps(self._stats, indent=1, sort_keys=True)
+            self._unsaved = 0
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"Could not save latency statistics to {self.path}: {e}")
+
+
+@dataclass
+class PageWeightReport:
+    """
+    Network cost of one chart load: bytes transferred, requests blocked, responses
+    served from the disk cache and load time. For full page loads with a
+    blocklist active, also how much that saved compared to the typical unblocked
+    load on the same exchange.
+    """
+    transferred_bytes: int = 0
+    blocked_requests: int = 0
+    load_seconds: float = 0.0
+    full_load: bool = True # False for in-place symbol switches, which are never compared
+    bytes_saved: Optional[float] = None # None until unblocked loads have been measured
+    seconds_saved: Optional[float] = None
+    responses: int = 0
+    cache_hits: int = 0 # Responses served from the HTTP disk cache
+
+    @property
+    def cache_hit_ratio(self) -> Optional[float]:
+        return self.cache_hits / self.responses if self.responses else None
+
+    def __str__(self) -> str:
+        text = f"{self.transferred_bytes / 1e6:.2f} MB in {self.load_seconds:.2f}s, {self.blocked_requests} request(s) blocked"
+        if self.responses:
+            text += f", {self.cache_hits}/{self.responses} response(s) from disk cache"
+        if self.bytes_saved is not None:
+            text += f", saved ~{self.bytes_saved / 1e6:.2f} MB and ~{self.seconds_saved:.2f}s vs. unblocked"
+        return text
+
+    @classmethod
+    def measure(cls, stats: LatencyStats, provider: str, ticker: str, counts: Counter, load_seconds: float, blocking: bool, full_load: bool = True) -> "PageWeightReport":
+        """
+        Builds the report for one load from its network counts ('bytes', 'blocked',
+        'responses', 'cache_hits'). Unblocked full loads are recorded in `stats` as
+        the baseline that blocked full loads are compared against.
+        """
+        transferred_bytes = counts['bytes']
+        report = cls(transferred_bytes, counts['blocked'], load_seconds, full_load, responses=counts['responses'], cache_hits=counts['cache_hits'])
+        if not full_load:
+            return report
+        bytes_key, seconds_key = cls._baseline_keys(provider, ticker)
+        if not blocking:
+            stats.record(bytes_key, transferred_bytes)
+            stats.record(seconds_key, load_seconds)
+            return report
+        baseline_bytes, baseline_seconds = stats.typical(bytes_key), stats.typical(seconds_key)
+        if baseline_bytes is not None and baseline_seconds is not None:
+            report.bytes_saved = baseline_bytes - transferred_bytes
+            report.seconds_saved = baseline_seconds - load_seconds
+        return report
+
+    @classmethod
+    def needs_baseline(cls, stats: LatencyStats, provider: str, ticker: str) -> bool:
+        """True until enough unblocked loads on the ticker's exchange have been measured to compare against."""
+        return any(stats.typical(key) is None for key in cls._baseline_keys(provider, ticker))
+
+    @staticmethod
+    def _baseline_keys(provider: str, ticker: str) -> Tuple[str, str]:
+        return (LatencyStats.make_key(provider, "page_bytes_unblocked", ticker, None),
+                LatencyStats.make_key(provider, "page_load_unblocked", ticker, None))
+
+
+class DiskCacheTemplate:
+    """
+    A warm Chrome HTTP disk cache reused by every browser. Chrome can't share one
+    live cache between browser processes, so each browser gets a private copy of
+    the template directory (--disk-cache-dir), bounded by max_size
+    (--disk-cache-size). On close, the template is refreshed from the fullest
+    worker copy, so the next process starts warm with current bundles.
+    """
+    DEFAULT_MAX_SIZE = 512 * 1024 * 1024 # Bytes per worker copy
+
+    def __init__(self, path: str, max_size: int = DEFAULT_MAX_SIZE, prefix: str = "disk-cache-"):
+        """prefix names the temporary worker copies, e.g. "tv-disk-cache-"."""
+        self.path = os.path.abspath(path)
+        self.max_size = max_size
+        self.prefix = prefix
+        self._worker_dirs: List[str] = []
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def new_worker_dir(self) -> str:
+        """Creates a private cache directory for one browser, seeded from the template if present."""
+        worker_dir = tempfile.mkdtemp(prefix=self.prefix)
+        if os.path.isdir(self.path):
+            try:
+                shutil.copytree(self.path, worker_dir, dirs_exist_ok=True)
+            except (OSError, shutil.Error) as e:
+                self.logger.warning(f"Could not copy disk cache template {self.path}, starting cold: {e}")
+        with self._lock:
+            self._worker_dirs.append(worker_dir)
+        return worker_dir
+
+    def chrome_arguments(self, worker_dir: str) -> List[str]:
+        return [f"--disk-cache-dir={worker_dir}", f"--disk-cache-size={self.max_size}"]
+
+    @staticmethod
+    def _dir_size(path: str) -> int:
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    def close(self):
+        """Refreshes the template from the fullest worker copy and removes all copies. Call after the browsers quit."""
+        with self._lock:
+            worker_dirs, self._worker_dirs = self._worker_dirs, []
+        sizes = {worker_dir: self._dir_size(worker_dir) for worker_dir in worker_dirs}
+        source = max(sizes, key=sizes.get, default=None)
+        if source and sizes[source]:
+            # Swap in a complete copy so concurrent readers never see a half-written template
+            parent, name = os.path.split(self.path)
+            staging = None
+            try:
+                os.makedirs(parent, exist_ok=True)
+                staging = tempfile.mkdtemp(prefix=f"{name}.", suffix=".tmp", dir=parent)
+                shutil.copytree(source, staging, dirs_exist_ok=True)
+                if os.path.isdir(self.path):
+                    os.rename(self.path, f"{staging}.old")
+                os.rename(staging, self.path)
+                self.logger.info(f"Disk cache template {self.path} refreshed ({sizes[source] / 1e6:.1f} MB).")
+            except (OSError, shutil.Error) as e:
+                self.logger.warning(f"Could not refresh disk cache template {self.path}: {e}")
+            if staging:
+                shutil.rmtree(staging, ignore_errors=True)
+                shutil.rmtree(f"{staging}.old", ignore_errors=True)
+        for worker_dir in worker_dirs:
+            shutil.rmtree(worker_dir, ignore_errors=True)
+
+
+class ResultCache:
+    """
+    Two-tier cache of capture results (memory LRU in front of one JSON file per
+    entry on disk), keyed by (provider, variant, ticker, interval, bar close).
+    The variant separates captures of the same ticker that look different, such
+    as TradingView chart layouts. A result is reused until the bar it was
+    captured in closes, plus staleness_tolerance seconds into the next bar if
+    configured. Intervals are either TradingView style ("15", "240", "D", "W",
+    "3M") or Coinglass style ("m15", "h4", "d1").
+
+    Bars are assumed to sit on the UTC grid, which only holds for markets that
+    trade around the clock. Session markets open their bars at the session start
+    (NASDAQ:AAPL's 60, 240 and D bars open at 09:30 New York time), so callers
+    should only cache tickers for which is_continuous() is true.
+    """
+    DEFAULT_MAX_ENTRIES = 1024 # Memory tier size
+    PURGE_EVERY = 100 # Sweep expired disk entries after this many writes
+    WEEK_OFFSET = 4 * 86400 # Weekly bars open on Monday 00:00 UTC, the epoch was a Thursday
+    UNIT_SECONDS = {'': 60, 'S': 1, 'D': 86400, 'W': 7 * 86400, 'm': 60, 'h': 3600, 'd': 86400}
+    CONTINUOUS_EXCHANGES = frozenset(('BINANCE', 'BINANCEUS', 'BITFINEX', 'BITGET', 'BITMEX', 'BITSTAMP', 'BYBIT', 'COINBASE', 'CRYPTO', 'CRYPTOCAP', 'DERIBIT', 'GEMINI', 'HTX', 'HUOBI', 'KRAKEN', 'KUCOIN', 'MEXC', 'OKX', 'PHEMEX', 'POLONIEX')) # 24/7 crypto venues
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, cache_dir: Optional[str] = None, staleness_tolerance: float = 0.0):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.staleness_tolerance = staleness_tolerance
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.counters = Counter()
+        self.logger = logging.getLogger(__name__)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.purge_expired()
+
+    @classmethod
+    def bar_bounds(cls, interval: Optional[str], now: float) -> Optional[Tuple[float, float]]:
+        """(open, close) epoch seconds of the UTC-aligned bar containing `now`, None for unknown/default intervals."""
+        if not interval:
+            return None
+        match = re.fullmatch(r'([mhd])(\d+)', str(interval)) # Coinglass timeframes
+        if match:
+            count, unit = int(match.group(2)), match.group(1)
+        else:
+            match = re.fullmatch(r'(\d*)([SDWM]?)', str(interval).upper())
+            count, unit = (int(match.group(1) or 1), match.group(2)) if match else (0, '')
+        if count <= 0:
+            return None
+        if unit == 'M':
+            t = time.gmtime(now)
+            months = (t.tm_year * 12 + t.tm_mon - 1) // count * count
+            bar_open = calendar.timegm((months // 12, months % 12 + 1, 1, 0, 0, 0))
+            months += count
+            return bar_open, calendar.timegm((months // 12, months % 12 + 1, 1, 0, 0, 0))
+        period = count * cls.UNIT_SECONDS[unit]
+        offset = cls.WEEK_OFFSET if unit == 'W' else 0
+        bar_open = (now - offset) // period * period + offset
+        return bar_open, bar_open + period
+
+    @classmethod
+    def is_continuous(cls, ticker: str) -> bool:
+        """Whether the ticker trades 24/7, so its bars line up with bar_bounds(). Unknown exchanges count as session markets."""
+        return exchange_of(ticker).upper() in cls.CONTINUOUS_EXCHANGES
+
+    @staticmethod
+    def _key(provider: str, ticker: str, interval: str, bar_close: float, variant: str = '') -> str:
+        return f"{provider}|{variant}|{ticker}|{interval}|{int(bar_close)}"
+
+    def _path(self, key: str) -> str:
+        bar_close = key.rsplit('|', 1)[1]
+        return os.path.join(self.cache_dir, f"{bar_close}-{hashlib.sha1(key.encode()).hexdigest()}.json")
+
+    def get(self, provider: str, ticker: str, interval: str, variant: str = '') -> Optional[str]:
+        """Returns the result captured in the current bar (or within tolerance of the previous one), else None."""
+        now = time.time()
+        bounds = self.bar_bounds(interval, now)
+        if not bounds:
+            return None
+        bar_open, bar_close = bounds
+        keys = [self._key(provider, ticker, interval, bar_close, variant)]
+        if self.staleness_tolerance > 0 and now - bar_open <= self.staleness_tolerance:
+            keys.append(self._key(provider, ticker, interval, bar_open, variant)) # The previous bar closed at this bar's open
+        for key in keys:
+            value = self._lookup(key, now)
+            if value is not None:
+                return value
+        with self._lock:
+            self.counters['misses'] += 1
+        return None
+
+    def _lookup(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[1] > now:
+                self._memory.move_to_end(key)
+                self.counters['memory_hits'] += 1
+                return entry[0]
+            self._memory.pop(key, None)
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                value, expires = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if expires <= now:
+            return None
+        with self._lock:
+            self._remember(key, value, expires)
+            self.counters['disk_hits'] += 1
+        return value
+
+    def _remember(self, key: str, value: str, expires: float):
+        """Adds to the memory tier. Caller holds the lock."""
+        self._memory[key] = (value, expires)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, provider: str, ticker: str, interval: str, value: str, variant: str = ''):
+        """Stores a result for the current bar of `interval`."""
+        bounds = self.bar_bounds(interval, time.time())
+        if not bounds or not value:
+            return
+        key = self._key(provider, ticker, interval, bounds[1], variant)
+        expires = bounds[1] + self.staleness_tolerance
+        with self._lock:
+            self._remember(key, value, expires)
+            self._writes += 1
+            should_purge = self._writes % self.PURGE_EVERY == 0
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump([value, expires], f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Could not write result cache entry {path}: {e}")
+        if should_purge:
+            self.purge_expired()
+
+    def purge_expired(self):
+        """Deletes disk entries whose bar closed more than staleness_tolerance ago."""
+        cutoff = time.time() - self.staleness_tolerance
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            bar_close, _, _ = name.partition('-')
+            if name.endswith('.json') and bar_close.isdigit() and int(bar_close) < cutoff:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+
+class CaptureHistory:
+    """
+    SQLite log of every browser capture: provider, ticker, interval (Coinglass
+    timeframe), raw link or response, image URL, per-phase timings and the error
+    class of failed captures. The
+    database runs in WAL mode so several scraper processes can write while others
+    query; rows are queued and written in batches by a background thread.
+    Batches that can't be written (locked or unreachable database) are logged
+    and dropped, so a broken history never blocks the scraper.
+    """
+    BATCH_SIZE = 50
+    FLUSH_INTERVAL = 1.0  # Max seconds a queued row waits for its batch
+    BUSY_TIMEOUT = 30.0  # Seconds to wait for another writer's lock
+    WRITER_POLL_INTERVAL = 0.5  # Seconds between writer liveness checks in flush()
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS captures (
+            id INTEGER PRIMARY KEY,
+            captured_at REAL NOT NULL,
+            provider TEXT NOT NULL,
+            ticker TEXT NOT NULL,
+            exchange TEXT NOT NULL,
+            interval TEXT,
+            link TEXT,
+            image_url TEXT,
+            duration REAL NOT NULL,
+            phases TEXT,
+            error_class TEXT
+        );
+        CREATE INDEX IF NOT EXISTS captures_ticker_time ON captures (ticker, captured_at);
+        CREATE INDEX IF NOT EXISTS captures_time ON captures (captured_at);
+        CREATE INDEX IF NOT EXISTS captures_exchange_time ON captures (exchange, captured_at);
+    """
+    COLUMNS = ("captured_at", "provider", "ticker", "exchange", "interval", "link", "image_url", "duration", "phases", "error_class")
+
+    def __init__(self, path: str, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger(__name__)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(self.SCHEMA)
+        finally:
+            conn.close()
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="capture-history", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # Durable enough for a history log in WAL mode, and much cheaper
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    def record(self, provider: str, ticker: str, interval: Optional[str], link: Optional[str], image_url: Optional[str], captured_at: float, duration: float, phases: Optional[Dict[str, float]] = None, error: Optional[BaseException] = None):
+        """Queues one capture for writing. captured_at is the epoch time the capture started."""
+        if self._closed or not self._writer.is_alive():
+            return
+        row = (captured_at, provider, ticker, exchange_of(ticker), interval, link, image_url, duration,
+               json.dumps({name: round(seconds, 4) for name, seconds in phases.items()}) if phases else None,
+               type(error).__name__ if error is not None else None)
+        self._queue.put(row)
+
+    def _write_loop(self):
+        """Writer thread: groups queued rows into one transaction per batch, (re)connecting as needed."""
+        conn = None
+        insert = f"INSERT INTO captures ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})"
+        try:
+            stopping = False
+            while not stopping:
+                row = self._queue.get()
+                if row is None:
+                    self._queue.task_done()
+                    break
+                rows = [row]
+                deadline = time.monotonic() + self.flush_interval
+                while len(rows) < self.batch_size:
+                    try:
+                        row = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if row is None:
+                        self._queue.task_done()
+                        stopping = True
+                        break
+                    rows.append(row)
+                try:
+                    if conn is None:
+                        conn = self._connect()
+                    with conn:
+                        conn.executemany(insert, rows)
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Could not write {len(rows)} capture(s) to {self.path}: {e}")
+                    if conn is not None:
+                        conn.close()
+                        conn = None
+                for _ in rows:
+                    self._queue.task_done()
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def flush(self):
+        """Blocks until every queued capture is written or dropped, or the writer thread has stopped."""
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks and self._writer.is_alive():
+                self._queue.all_tasks_done.wait(self.WRITER_POLL_INTERVAL)
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[dict]:
+        self.flush()
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute(sql, tuple(params)).fetchall()
+        finally:
+            conn.close()
+        results = [dict(row) for row in rows]
+        for result in results:
+            if result.get("phases"):
+                result["phases"] = json.loads(result["phases"])
+        return results
+
+    def latest(self, ticker: str, interval: Optional[str] = None) -> Optional[dict]:
+        """Most recent successful capture of ticker (at that interval, if given), or None."""
+        sql = "SELECT * FROM captures WHERE ticker = ? AND image_url IS NOT NULL"
+        params: List = [ticker]
+        if interval is not None:
+            sql += " AND interval = ?"
+            params.append(interval)
+        rows = self._query(sql + " ORDER BY captured_at DESC LIMIT 1", params)
+        return rows[0] if rows else None
+
+    def since(self, seconds: float = 3600.0, ticker: Optional[str] = None) -> List[dict]:
+        """All captures (failures included) started in the last `seconds`, newest first."""
+        sql = "SELECT * FROM captures WHERE captured_at >= ?"
+        params: List = [time.time() - seconds]
+        if ticker is not None:
+            sql += " AND ticker = ?"
+            params.append(ticker)
+        return self._query(sql + " ORDER BY captured_at DESC", params)
+
+    def latency_by_exchange(self, percentile: float = 95.0, seconds: Optional[float] = None, provider: Optional[str] = None) -> Dict[str, float]:
+        """Nearest-rank percentile of successful capture durations per exchange, over the last `seconds` (all history if None)."""
+        sql = "SELECT exchange, duration FROM captures WHERE image_url IS NOT NULL"
+        params: List = []
+        if seconds is not None:
+            sql += " AND captured_at >= ?"
+            params.append(time.time() - seconds)
+        if provider is not None:
+            sql += " AND provider = ?"
+            params.append(provider)
+        durations: Dict[str, List[float]] = {}
+        for row in self._query(sql + " ORDER BY exchange, duration", params):
+            durations.setdefault(row["exchange"], []).append(row["duration"])
+        return {exchange: values[max(0, math.ceil(percentile / 100 * len(values)) - 1)] for exchange, values in durations.items()}
+
+    def close(self):
+        """Writes what is still queued and stops the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key. The first caller (thread or asyncio
+    task, any event loop) runs the capture; everyone arriving before it finishes
+    waits for it and gets the same result or exception. Waiters of a leader that
+    was cancelled or interrupted get an interrupted_error instead.
+    """
+
+    def __init__(self, interrupted_error: type = ScraperError):
+        self.interrupted_error = interrupted_error
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.counters = Counter()
+
+    def _join(self, key: str, waits: bool = True) -> Tuple[Future, bool]:
+        """
+        Returns the in-flight call for key and whether the caller has to run it.
+        Callers that won't wait (waits=False) are counted as bypassed, not coalesced.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.counters['coalesced' if waits else 'bypassed'] += 1
+                return call, False
+            call = self._calls[key] = Future()
+            self.counters['executed'] += 1
+            return call, True
+
+    def _finish(self, key: str, call: Future, result=None, error: Optional[BaseException] = None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is None:
+            call.set_result(result)
+        elif isinstance(error, Exception):
+            call.set_exception(error)
+        else:  # Cancellation/interrupts belong to the leader, waiters just see a failed capture
+            call.set_exception(self.interrupted_error(f"Shared capture {key} was interrupted ({type(error).__name__})"))
+
+    def do(self, key: str, fn: Callable, *args):
+        """Runs fn(*args) unless a call for key is already in flight, in which case waits for its outcome."""
+        call, leader = self._join(key)
+        if not leader:
+            return call.result()
+        return self._run(key, call, fn, *args)
+
+    def lead(self, key: str, fn: Callable, *args):
+        """
+        Like do(), but never waits: if a call for key is already in flight, runs
+        fn(*args) separately. For callers holding a resource the in-flight call
+        may be waiting on, such as the only driver in a pool.
+        """
+        call, leader = self._join(key, waits=False)
+        if not leader:
+            return fn(*args)
+        return self._run(key, call, fn, *args)
+
+    def _run(self, key: str, call: Future, fn: Callable, *args):
+        """Runs the leader's call and hands its outcome to the waiters."""
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result)
+        return result
+
+    async def do_async(self, key: str, fn: Callable, *args):
+        """Awaitable version of do(); fn(*args) must return a coroutine."""
+        call, leader = self._join(key)
+        if not leader:
+            # Shielded so a cancelled waiter doesn't cancel the shared call
+            return await asyncio.shield(asyncio.wrap_future(call))
+        try:
+            result = await fn(*args)
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result)
+        return result
+
+
+def _process_capture_worker(scraper_class: type, error_class: type, job_queue, result_queue, scraper_kwargs: dict):
+    """Worker process loop: owns one scraper (and browser) and drains the job queue."""
+    try:
+        with scraper_class(**scraper_kwargs) as scraper:
+            while True:
+                item = job_queue.get()
+                if item is None:
+                    break
+                index, job = item
+                result = scraper_class._run_job(scraper, *job)
+                if result.error is not None:
+                    # WebDriver exceptions don't always survive pickling, send a plain scraper error
+                    result.error = error_class(f"{type(result.error).__name__}: {result.error}")
+                result_queue.put(('result', index, result))
+    except ScraperError as e:
+        logging.getLogger(__name__).error(f"Capture worker {os.getpid()} failed: {e}")
+    finally:
+        result_queue.put(('done', os.getpid(), None))
+
+
+class ProcessCaptureRunner(abc.ABC):
+    """
+    Fans capture jobs out to worker processes, each owning its own browser.
+    The parent only dispatches jobs and aggregates results.
+
+    Subclasses set scraper_class (whose _run_job(scraper, ticker, interval)
+    returns a CaptureResult), error_class, and implement _failed_result.
+
+    Workers are forked, so scraper_class may live in a hyphen-named script or a
+    module loaded by path: spawn/forkserver workers would have to re-import it
+    by name and fail. This makes the runner POSIX only.
+    """
+    RESULT_POLL_INTERVAL = 1 # Seconds between worker liveness checks while waiting
+    START_METHOD = "fork"
+    scraper_class: type = None
+    error_class: type = ScraperError
+
+    def __init__(self, workers: Optional[int] = None, **scraper_kwargs):
+        """
+        Args:
+            workers: Number of worker processes. Defaults to the CPU count.
+            **scraper_kwargs: Passed to scraper_class in every worker.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.scraper_kwargs = scraper_kwargs
+        self.logger = logging.getLogger(__name__)
+
+    @abc.abstractmethod
+    def _failed_result(self, job: Tuple[str, Optional[str]], error: Exception) -> Any:
+        """The CaptureResult reported for a job no worker processed."""
+
+    def run(self, jobs: Iterable[Tuple[str, Optional[str]]]) -> Iterator[Any]:
+        """
+        Captures all (ticker, interval) jobs, yielding CaptureResults as they complete
+        (not in input order). Jobs left over by crashed workers are yielded as failures.
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return
+        workers = min(self.workers, len(jobs))
+        context = multiprocessing.get_context(self.START_METHOD)
+        job_queue = context.Queue()
+        result_queue = context.Queue()
+        for index, job in enumerate(jobs):
+            job_queue.put((index, job))
+        for _ in range(workers):
+            job_queue.put(None)
+
+        self.logger.info(f"Starting {workers} capture worker process(es) for {len(jobs)} job(s)...")
+        processes = [
+            context.Process(
+                target=_process_capture_worker,
+                args=(self.scraper_class, self.error_class, job_queue, result_queue, self.scraper_kwargs),
+                daemon=True,
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+
+        pending = set(range(len(jobs)))
+        finished_workers = 0
+        try:
+            while pending and finished_workers < workers:
+                try:
+                    kind, key, result = result_queue.get(timeout=self.RESULT_POLL_INTERVAL)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in processes):
+                        break
+                    continue
+                if kind == 'done':
+                    finished_workers += 1
+                elif key in pending:
+                    pending.discard(key)
+                    yield result
+        finally:
+            for process in processes:
+                process.join(timeout=self.RESULT_POLL_INTERVAL)
+                if process.is_alive():
+                    process.terminate()
+
+        for index in sorted(pending):
+            yield self._failed_result(jobs[index], self.error_class("Job not processed: all capture workers exited."))
@@ -0,0 +1,40 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def load_script(module_name, relative_path):
+    """Imports one of the hyphen-named scraper scripts as a module."""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module  # dataclasses look their module up while the script runs
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def tradingview():
+    return load_script("tradingview_scraper", os.path.join("tradingview_scrapper", "main-scrapper.py"))
+
+
+@pytest.fixture
+def tv_scraper(tradingview):
+    """A TradingViewScraper with no browser behind it: no driver, pool, result cache or history."""
+    scraper = tradingview.TradingViewScraper.__new__(tradingview.TradingViewScraper)
+    scraper.logger = tradingview.logging.getLogger("test")
+    scraper._local = tradingview.threading.local()
+    scraper.driver = scraper.pool = scraper.result_cache = scraper.history = None
+    scraper.chart_page_id = "test"
+    return scraper
+
+
+@pytest.fixture(scope="session")
+def coinglass():
+    return load_script("coinglass_scraper", os.path.join("coinglass_scrapper", "main-scrapper.py"))
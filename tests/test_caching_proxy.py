@@ -0,0 +1,176 @@
+import http.client
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import load_script
+
+
+@pytest.fixture(scope="module")
+def proxy_module():
+    return load_script("caching_proxy", os.path.join("caching_proxy", "main-proxy.py"))
+
+
+class _Upstream(BaseHTTPRequestHandler):
+    """Local origin: path -> Cache-Control header of the response, counting requests per path."""
+    protocol_version = "HTTP/1.1"
+    CACHE_CONTROL = {
+        "/bundle.js": "public, max-age=31536000",
+        "/immutable.css": "public, max-age=60, immutable",
+        "/short.js": "max-age=60",
+        "/no-store.js": "no-store",
+        "/private.js": "private, max-age=31536000",
+        "/plain.js": None,
+        "/api/data": None,
+    }
+    requests = None
+    drop_connections = False  # close each connection after one response, without saying so
+
+    def do_GET(self, head=False):
+        self.requests[self.path] = self.requests.get(self.path, 0) + 1
+        body = f"{self.path} #{self.requests[self.path]}".encode()
+        self.send_response(200)
+        if self.CACHE_CONTROL.get(self.path):
+            self.send_header("Cache-Control", self.CACHE_CONTROL[self.path])
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+        self.close_connection = self.drop_connections
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(server):
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def upstream():
+    _Upstream.requests = {}
+    _Upstream.drop_connections = False
+    server = _serve(ThreadingHTTPServer(("127.0.0.1", 0), _Upstream))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def proxy(proxy_module):
+    server = _serve(proxy_module.CachingProxyServer(("127.0.0.1", 0), proxy_module.AssetCache(1024 * 1024)))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _get(proxy, upstream, path):
+    connection = http.client.HTTPConnection(*proxy.server_address, timeout=5)
+    try:
+        connection.request("GET", f"http://127.0.0.1:{upstream.server_address[1]}{path}")
+        response = connection.getresponse()
+        return response.getheader("X-Proxy-Cache"), response.read().decode()
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize("path", ["/bundle.js", "/immutable.css", "/plain.js"])
+def test_static_assets_are_served_from_cache(proxy, upstream, path):
+    assert _get(proxy, upstream, path) == ("MISS", f"{path} #1")
+    assert _get(proxy, upstream, path) == ("HIT", f"{path} #1")
+    assert _Upstream.requests[path] == 1
+    assert proxy.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize("path", ["/short.js", "/no-store.js", "/private.js", "/api/data"])
+def test_uncacheable_responses_always_go_upstream(proxy, upstream, path):
+    assert _get(proxy, upstream, path) == ("MISS", f"{path} #1")
+    assert _get(proxy, upstream, path) == ("MISS", f"{path} #2")
+    assert proxy.stats()["passthrough"] == 2
+
+
+def test_head_responses_carry_the_upstream_content_length(proxy, upstream):
+    connection = http.client.HTTPConnection(*proxy.server_address, timeout=5)
+    try:
+        connection.request("HEAD", f"http://127.0.0.1:{upstream.server_address[1]}/api/data")
+        response = connection.getresponse()
+        assert response.read() == b""
+        assert response.getheader("Content-Length") == str(len(b"/api/data #1"))
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize("method, status, upstream_requests", [("GET", 200, 2), ("HEAD", 200, 2), ("POST", 502, 1)])
+def test_only_idempotent_requests_are_retried_on_a_stale_upstream(proxy, upstream, method, status, upstream_requests):
+    _Upstream.drop_connections = True
+    url = f"http://127.0.0.1:{upstream.server_address[1]}/api/data"
+    connection = http.client.HTTPConnection(*proxy.server_address, timeout=5)
+    try:
+        statuses = []
+        for _ in range(2):  # same client connection, so the proxy reuses its upstream connection
+            connection.request(method, url, body=b"{}" if method == "POST" else None)
+            response = connection.getresponse()
+            response.read()
+            statuses.append(response.status)
+            time.sleep(0.1)  # let the origin drop the connection
+        assert statuses == [200, status]
+        assert _Upstream.requests["/api/data"] == upstream_requests
+    finally:
+        connection.close()
+
+
+def test_idle_tunnels_stay_open(proxy_module, proxy):
+    """CONNECT tunnels (websockets) must outlive UPSTREAM_TIMEOUT while quiet."""
+    echo = socket.create_server(("127.0.0.1", 0))
+
+    def serve_echo():
+        connection, _ = echo.accept()
+        with connection:
+            while data := connection.recv(1024):
+                connection.sendall(data)
+
+    threading.Thread(target=serve_echo, daemon=True).start()
+    proxy.UPSTREAM_TIMEOUT = 0.2
+    client = socket.create_connection(proxy.server_address, timeout=5)
+    try:
+        client.sendall(f"CONNECT 127.0.0.1:{echo.getsockname()[1]} HTTP/1.1\r\n\r\n".encode())
+        assert b" 200 " in client.recv(1024)
+        time.sleep(0.5)
+        client.sendall(b"ping")
+        assert client.recv(1024) == b"ping"
+    finally:
+        client.close()
+        echo.close()
+
+
+def test_asset_cache_evicts_least_recently_used(proxy_module):
+    cache = proxy_module.AssetCache(max_bytes=10)
+    cache.put("a", 200, [], b"aaaa", None)
+    cache.put("b", 200, [], b"bbbb", None)
+    assert cache.get("a")[2] == b"aaaa"  # "b" is now least recently used
+    cache.put("c", 200, [], b"cccc", None)
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_asset_cache_expires_and_persists(proxy_module, tmp_path):
+    cache = proxy_module.AssetCache(max_bytes=1024, cache_dir=str(tmp_path))
+    cache.put("fresh", 200, [["Content-Type", "text/css"]], b"body", 3600)
+    cache.put("stale", 200, [], b"body", -1)
+    assert cache.get("stale") is None
+    restarted = proxy_module.AssetCache(max_bytes=1024, cache_dir=str(tmp_path))
+    status, headers, body = restarted.get("fresh")
+    assert (status, headers, body) == (200, [["Content-Type", "text/css"]], b"body")
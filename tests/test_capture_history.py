@@ -0,0 +1,93 @@
+import sqlite3
+import time
+
+import pytest
+
+from scraper_common import CaptureHistory, ResultCache
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = CaptureHistory(str(tmp_path / "history.db"), flush_interval=0.05)
+    yield history
+    history.close()
+
+
+def test_latest_skips_failures_and_filters_by_interval(history):
+    now = time.time()
+    history.record("tradingview", "BYBIT:BTCUSDT.P", "15", "https://www.tradingview.com/x/a/", "https://s3.tradingview.com/snapshots/a/a.png", now - 20, 1.0, {"load": 0.6, "snapshot": 0.4})
+    history.record("tradingview", "BYBIT:BTCUSDT.P", "60", "https://www.tradingview.com/x/b/", "https://s3.tradingview.com/snapshots/b/b.png", now - 10, 2.0)
+    history.record("tradingview", "BYBIT:BTCUSDT.P", "15", None, None, now, 3.0, error=TimeoutError())
+    latest = history.latest("BYBIT:BTCUSDT.P", "15")
+    assert latest["link"] == "https://www.tradingview.com/x/a/"
+    assert latest["exchange"] == "BYBIT"
+    assert latest["phases"] == {"load": 0.6, "snapshot": 0.4}
+    assert history.latest("BYBIT:BTCUSDT.P")["interval"] == "60"
+    assert history.latest("NASDAQ:AAPL") is None
+    recent = history.since(60)
+    assert [row["error_class"] for row in recent] == ["TimeoutError", None, None]
+
+
+def test_latency_by_exchange_covers_both_ticker_formats(history):
+    now = time.time()
+    for seconds in (1.0, 2.0, 3.0, 4.0):
+        history.record("tradingview", "BYBIT:BTCUSDT.P", "15", "link", "image", now, seconds)
+    history.record("coinglass", "Binance_BTCUSDT", "m15", "response", "image", now, 5.0)
+    history.record("coinglass", "Binance_BTCUSDT", "m15", "response", None, now, 50.0)  # failures don't count
+    assert history.latency_by_exchange(50) == {"BYBIT": 2.0, "Binance": 5.0}
+    assert history.latency_by_exchange(95, provider="tradingview") == {"BYBIT": 4.0}
+
+
+def test_unreachable_database_drops_rows_instead_of_blocking(history, monkeypatch, caplog):
+    def fail():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(history, "_connect", fail)
+    history.record("tradingview", "BYBIT:BTCUSDT.P", "15", "link", "image", time.time(), 1.0)
+    history.flush()
+    assert history._queue.unfinished_tasks == 0
+    assert "Could not write 1 capture(s)" in caplog.text
+    monkeypatch.undo()  # the writer reconnects for the next batch
+    history.record("tradingview", "BYBIT:BTCUSDT.P", "15", "later", "image", time.time(), 1.0)
+    assert [row["link"] for row in history.since(60)] == ["later"]
+
+
+def test_flush_returns_once_the_writer_has_stopped(history):
+    history.close()
+    history._queue.put(("row",))  # never written: nothing is left to drain the queue
+    history.flush()
+
+
+def test_rows_survive_a_new_instance(tmp_path):
+    path = str(tmp_path / "history.db")
+    first = CaptureHistory(path)
+    first.record("coinglass", "Binance_BTCUSDT", None, "response", "image", time.time(), 1.0)
+    first.close()
+    first.close()
+    first.record("coinglass", "Binance_BTCUSDT", None, "late", "image", time.time(), 1.0)  # ignored once closed
+    second = CaptureHistory(path)
+    try:
+        assert [row["link"] for row in second.since(60)] == ["response"]
+    finally:
+        second.close()
+
+
+@pytest.mark.parametrize("link, image_url", [
+    ("https://www.tradingview.com/x/m7azfyek/", "https://s3.tradingview.com/snapshots/m/m7azfyek.png"),
+    ("clipboard text that is not a share link", None),
+    (None, None),
+])
+def test_tradingview_history_keeps_only_converted_image_urls(tradingview, link, image_url):
+    assert tradingview.TradingViewScraper._snapshot_image_url(link) == image_url
+
+
+def test_tradingview_interval_sweep_logs_each_interval(tv_scraper, history):
+    scraper = tv_scraper
+    scraper.driver, scraper.result_cache, scraper.history = object(), ResultCache(), history
+    scraper._capture_sweep_interval = lambda ticker, interval, phases, full_load=False: f"https://www.tradingview.com/x/{interval}abcdef/"
+    scraper.get_screenshot_links_for_intervals("NASDAQ:AAPL", ["15", "60"])
+    rows = sorted(history.since(60), key=lambda row: row["interval"])
+    assert [(row["interval"], row["image_url"]) for row in rows] == [
+        ("15", "https://s3.tradingview.com/snapshots/1/15abcdef.png"),
+        ("60", "https://s3.tradingview.com/snapshots/6/60abcdef.png"),
+    ]
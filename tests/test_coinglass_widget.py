@@ -0,0 +1,100 @@
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+
+@pytest.mark.parametrize("current_symbol, current_ticker, new_ticker, expected", [
+    ("BINANCE:BTCUSDT", "Binance_BTCUSDT", "OKX_ETHUSDT", "OKX:ETHUSDT"),
+    ("Binance_BTCUSDT", "Binance_BTCUSDT", "Bybit_SOLUSDT", "Bybit_SOLUSDT"),
+    ("binance:btcusdt.p", "Binance_BTCUSDT", "OKX_ETHUSDT", "OKX:ETHUSDT.p"),
+    ("BINANCE:BTCUSDT.P", "Binance_BTCUSDT", "OKX_ETHUSDT", "OKX:ETHUSDT.P"),
+    # Ambiguous naming is only a guess, the switch confirms it by reading the symbol back
+    ("BINANCE:BTCUSDT", "Binance_BTC", "Bybit_ETHUSDT", "BYBIT:ETHUSDTUSDT"),
+    ("COINBASE:BTCUSD", "Binance_BTCUSDT", "OKX_ETHUSDT", None),
+    (None, "Binance_BTCUSDT", "OKX_ETHUSDT", None),
+    ("BINANCE:BTCUSDT", "BTCUSDT", "OKX_ETHUSDT", None),
+])
+def test_map_widget_symbol(coinglass, current_symbol, current_ticker, new_ticker, expected):
+    assert coinglass.CoinglassScraper._map_widget_symbol(current_symbol, current_ticker, new_ticker) == expected
+
+
+class _WidgetDriver:
+    """A loaded Coinglass page whose widget reports `shown_symbols` in turn."""
+
+    def __init__(self, shown_symbols, iframe=True):
+        self.current_url = "https://www.coinglass.com/tv/Binance_BTCUSDT"
+        self.shown_symbols = list(shown_symbols)
+        self.iframe = iframe
+        self.switch_to = self
+
+    def find_element(self, by, selector):
+        if not self.iframe:
+            raise NoSuchElementException(f"no element {selector}")
+        return "iframe"
+
+    def frame(self, iframe):
+        pass
+
+    def default_content(self):
+        pass
+
+    def set_script_timeout(self, timeout):
+        pass
+
+    def execute_script(self, script, *args):
+        return self.shown_symbols.pop(0)
+
+    def execute_async_script(self, script, *args):
+        return {'ok': True}
+
+
+@pytest.fixture
+def scraper(coinglass):
+    scraper = coinglass.CoinglassScraper(latency_stats_path=None, cache_results=False, history_path=None)
+    scraper._mark_loaded_chart("Binance_BTCUSDT", "h1")
+    return scraper
+
+
+def test_switch_in_place_when_the_widget_confirms_the_symbol(scraper):
+    scraper.driver = _WidgetDriver(["BINANCE:BTCUSDT", "OKX:ETHUSDT"])
+    assert scraper._switch_pair_in_place("OKX_ETHUSDT", "h1")
+    assert (scraper._loaded_ticker, scraper._loaded_timeframe) == ("OKX_ETHUSDT", "h1")
+
+
+def test_switch_navigates_when_the_widget_shows_another_symbol(scraper):
+    scraper.driver = _WidgetDriver(["BINANCE:BTCUSDT", "BINANCE:BTCUSDT"])
+    assert not scraper._switch_pair_in_place("OKX_ETHUSDT", "h1")
+    assert scraper._loaded_ticker is None
+
+
+def test_same_chart_is_reused_only_while_the_iframe_exists(scraper):
+    scraper.driver = _WidgetDriver([])
+    assert scraper._switch_pair_in_place("Binance_BTCUSDT", "h1")
+    scraper.driver = _WidgetDriver([], iframe=False)
+    assert not scraper._switch_pair_in_place("Binance_BTCUSDT", "h1")
+    assert scraper._loaded_ticker is None
+
+
+class _ReadinessDriver:
+    """The iframe's chart reports ready once `ready_after` probes have failed."""
+
+    def __init__(self, ready_after):
+        self.ready_after = ready_after
+        self.probes = 0
+
+    def execute_script(self, script):
+        self.probes += 1
+        return self.probes > self.ready_after
+
+
+def test_capture_waits_for_the_series_to_load(scraper, monkeypatch):
+    monkeypatch.setattr(scraper, "CHART_READY_POLL_INTERVAL", 0.01)
+    scraper.driver = _ReadinessDriver(ready_after=2)
+    assert scraper._wait_for_chart_ready()
+    assert scraper.driver.probes == 3
+
+
+def test_capture_proceeds_when_the_series_never_loads(scraper, monkeypatch):
+    monkeypatch.setattr(scraper, "CHART_READY_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(scraper, "CHART_READY_TIMEOUT", 0.05)
+    scraper.driver = _ReadinessDriver(ready_after=1000)
+    assert not scraper._wait_for_chart_ready()
@@ -0,0 +1,148 @@
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+
+class _Driver:
+    def __init__(self, name):
+        self.name = name
+        self.healthy = True
+        self.quit_calls = 0
+
+    def execute_script(self, script):
+        if not self.healthy:
+            raise WebDriverException("chrome not reachable")
+        return 1
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+class _Factory:
+    """Creates numbered fake drivers; `failures` makes the next calls raise."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.created = []
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                raise WebDriverException("chrome failed to start")
+            driver = _Driver(f"driver-{len(self.created)}")
+            self.created.append(driver)
+            return driver
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition never became true")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def make_pool(tradingview, monkeypatch):
+    monkeypatch.setattr(tradingview.DriverPool, "REPLACE_RETRY_DELAY", 0.01)
+    pools = []
+
+    def make(size=2, failures=0, lease_timeout=0.2):
+        factory = _Factory(failures)
+        pool = tradingview.DriverPool(factory, size=size, lease_timeout=lease_timeout)
+        pools.append(pool)
+        return pool, factory
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def test_lease_times_out_when_every_driver_is_busy(tradingview, make_pool):
+    pool, _ = make_pool(size=1)
+    pool.start()
+    leased = pool.lease()
+    started_at = time.monotonic()
+    with pytest.raises(tradingview.TradingViewScraperError, match="No healthy driver"):
+        pool.lease()
+    assert time.monotonic() - started_at >= 0.2
+    pool.release(leased)
+    assert pool.lease() is leased
+
+
+def test_unhealthy_driver_is_discarded_and_replaced(make_pool):
+    pool, factory = make_pool(size=1, lease_timeout=5)
+    pool.start()
+    first = factory.created[0]
+    first.healthy = False
+    replacement = pool.lease()
+    assert replacement is not first
+    assert first.quit_calls == 1
+    assert len(factory.created) == 2
+
+
+def test_driver_broken_during_use_is_replaced(make_pool):
+    pool, factory = make_pool(size=1, lease_timeout=5)
+    pool.start()
+    with pytest.raises(WebDriverException):
+        with pool.driver() as driver:
+            raise WebDriverException("tab crashed")
+    assert driver.quit_calls == 1
+    assert pool.lease() is not driver
+
+
+def test_start_retries_missing_drivers_in_the_background(make_pool):
+    pool, factory = make_pool(size=2, failures=1)
+    pool.start()  # the first driver fails to start and is retried in the background
+    _wait_until(lambda: len(factory.created) == 2)
+    assert {pool.lease(), pool.lease()} == set(factory.created)
+
+
+def test_start_fails_without_any_driver(tradingview, make_pool):
+    pool, _ = make_pool(size=2, failures=10)
+    with pytest.raises(tradingview.TradingViewScraperError, match="could not create any driver"):
+        pool.start()
+
+
+def test_close_quits_every_driver_and_rejects_leases(tradingview, make_pool):
+    pool, factory = make_pool(size=2)
+    pool.start()
+    leased = pool.lease()
+    pool.close()
+    assert [driver.quit_calls for driver in factory.created] == [1, 1]
+    pool.release(leased)  # released after close: quit again, never back in the pool
+    with pytest.raises(tradingview.TradingViewScraperError, match="closed"):
+        pool.lease()
+
+
+def test_failed_replacements_are_retried_with_backoff(make_pool):
+    pool, factory = make_pool(size=1, lease_timeout=5)
+    pool.start()
+    factory.created[0].healthy = False
+    factory.failures = 2  # the replacement thread backs off twice before it gets a driver
+    assert pool.lease() is factory.created[1]
+    assert factory.failures == 0
+
+
+def test_batch_concurrency_is_capped_at_the_pool_size(tv_scraper, make_pool):
+    pool, _ = make_pool(size=2, lease_timeout=5)
+    pool.start()
+    scraper = tv_scraper
+    scraper.pool = pool
+    threads = set()
+
+    def capture(ticker, interval):
+        threads.add(threading.current_thread().name)
+        with pool.driver():
+            time.sleep(0.02)
+        return f"link-{ticker}"
+
+    scraper.get_screenshot_link = capture
+    results = scraper.get_screenshot_links([(str(n), "15") for n in range(6)], concurrency=8)
+    assert [result.link for result in results] == [f"link-{n}" for n in range(6)]
+    assert all(result.error is None for result in results)
+    assert len(threads) == 2  # no extra threads left waiting in lease()
@@ -0,0 +1,14 @@
+def test_failed_interval_maps_to_none_and_reloads_the_next_one(tradingview, tv_scraper):
+    tv_scraper.driver = object()
+    calls = []
+
+    def capture(ticker, interval, phases, full_load=False):
+        calls.append((interval, full_load))
+        if interval == "60":
+            raise tradingview.TradingViewScraperError("snapshot failed")
+        return f"link-{interval}"
+
+    tv_scraper._capture_sweep_interval = capture
+    links = tv_scraper.get_screenshot_links_for_intervals("NASDAQ:AAPL", ["15", "60", "240", "D"])
+    assert links == {"15": "link-15", "60": None, "240": "link-240", "D": "link-D"}
+    assert calls == [("15", False), ("60", False), ("240", True), ("D", False)]
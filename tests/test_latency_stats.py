@@ -0,0 +1,51 @@
+import pytest
+
+from scraper_common import LatencyStats, exchange_of
+
+
+def test_suggest_uses_defaults_until_enough_samples():
+    stats = LatencyStats()
+    key = stats.make_key("tradingview", "clipboard", "BYBIT:BTCUSDT", "15")
+    assert key == "tradingview:clipboard:BYBIT:15"
+    for _ in range(stats.MIN_SAMPLES - 1):
+        stats.record(key, 1.0)
+    assert stats.suggest(key, 3.0, 0.5) == (3.0, 0.5)
+    assert stats.typical(key) is None
+
+
+def test_suggest_waits_just_under_the_ewma():
+    stats = LatencyStats()
+    for _ in range(20):
+        stats.record("k", 1.0)
+    first_wait, retry_interval = stats.suggest("k", 3.0, 0.5)
+    assert first_wait == pytest.approx(1.0 * stats.FIRST_WAIT_FRACTION)
+    assert retry_interval == stats.MIN_WAIT  # no spread between EWMA and p95
+    assert stats.typical("k") == pytest.approx(1.0)
+
+
+def test_suggest_spaces_retries_across_the_tail():
+    stats = LatencyStats()
+    for seconds in [1.0] * 10 + [3.0] * 10:
+        stats.record("k", seconds)
+    first_wait, retry_interval = stats.suggest("k", 3.0, 0.5)
+    assert stats.MIN_WAIT < first_wait < 3.0
+    assert retry_interval > stats.MIN_WAIT
+
+
+def test_statistics_survive_a_restart(tmp_path):
+    path = str(tmp_path / "latency_stats.json")
+    stats = LatencyStats(path)
+    for _ in range(5):
+        stats.record("k", 2.0)
+    stats.save()
+    assert LatencyStats(path).suggest("k", 9.0, 9.0) == stats.suggest("k", 9.0, 9.0)
+
+
+@pytest.mark.parametrize("ticker, exchange", [
+    ("BYBIT:BTCUSDT.P", "BYBIT"),
+    ("Binance_BTCUSDT", "Binance"),
+    ("AAPL", ""),
+])
+def test_keys_are_per_exchange(ticker, exchange):
+    assert exchange_of(ticker) == exchange
+    assert LatencyStats.make_key("coinglass", "copy", ticker, "m5") == f"coinglass:copy:{exchange}:m5"
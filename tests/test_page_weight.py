@@ -0,0 +1,79 @@
+import json
+from collections import Counter
+
+from scraper_common import LatencyStats, PageWeightReport, read_network_totals
+
+
+def _counts(megabytes, blocked=0):
+    return Counter(bytes=int(megabytes * 1e6), blocked=blocked, responses=10, cache_hits=4)
+
+
+def test_blocked_loads_report_savings_once_a_baseline_exists():
+    stats = LatencyStats()
+    ticker = "BYBIT:BTCUSDT.P"
+    assert PageWeightReport.needs_baseline(stats, "tradingview", ticker)
+    report = PageWeightReport.measure(stats, "tradingview", ticker, _counts(3, blocked=5), 2.0, blocking=True)
+    assert report.bytes_saved is None
+
+    for _ in range(stats.MIN_SAMPLES):
+        PageWeightReport.measure(stats, "tradingview", ticker, _counts(5), 4.0, blocking=False)
+    assert not PageWeightReport.needs_baseline(stats, "tradingview", ticker)
+    assert PageWeightReport.needs_baseline(stats, "tradingview", "BINANCE:BTCUSDT")  # baselines are per exchange
+    assert PageWeightReport.needs_baseline(stats, "coinglass", ticker)  # and per provider
+
+    report = PageWeightReport.measure(stats, "tradingview", ticker, _counts(3, blocked=5), 2.0, blocking=True)
+    assert report.bytes_saved == 2e6
+    assert report.seconds_saved == 2.0
+    assert report.cache_hit_ratio == 0.4
+    assert "saved ~2.00 MB" in str(report)
+
+
+def test_in_place_switches_are_not_compared():
+    stats = LatencyStats()
+    report = PageWeightReport.measure(stats, "tradingview", "BYBIT:BTCUSDT.P", _counts(1), 0.5, blocking=False, full_load=False)
+    assert report.bytes_saved is None
+    assert PageWeightReport.needs_baseline(stats, "tradingview", "BYBIT:BTCUSDT.P")
+
+
+def test_coinglass_baseline_is_per_exchange():
+    stats = LatencyStats()
+    for _ in range(stats.MIN_SAMPLES):
+        PageWeightReport.measure(stats, "coinglass", "Binance_BTCUSDT", _counts(5), 4.0, blocking=False)
+    assert not PageWeightReport.needs_baseline(stats, "coinglass", "Binance_ETHUSDT")
+    assert PageWeightReport.needs_baseline(stats, "coinglass", "OKX_ETHUSDT")
+
+
+class _PerformanceLogDriver:
+    def __init__(self, events):
+        self.entries = [{"message": json.dumps({"message": {"method": method, "params": params}})} for method, params in events]
+
+    def get_log(self, log_type):
+        entries, self.entries = self.entries, []
+        return entries
+
+
+def test_read_network_totals_drains_the_performance_log():
+    driver = _PerformanceLogDriver([
+        ("Network.requestWillBeSent", {"requestId": "1"}),
+        ("Network.responseReceived", {"requestId": "1", "response": {"fromDiskCache": True}}),
+        ("Network.loadingFinished", {"requestId": "1", "encodedDataLength": 1200}),
+        ("Network.responseReceived", {"requestId": "2", "response": {}}),
+        ("Network.loadingFinished", {"requestId": "2", "encodedDataLength": 300}),
+        ("Network.loadingFailed", {"requestId": "3", "blockedReason": "inspector"}),
+        ("Network.loadingFailed", {"requestId": "4", "errorText": "net::ERR_ABORTED"}),
+    ])
+    assert read_network_totals(driver) == Counter(bytes=1500, responses=2, cache_hits=1, blocked=1)
+    assert read_network_totals(driver) == Counter()
+
+
+def test_disk_cache_hit_ratio_is_counted_without_page_reports(tradingview, tv_scraper, tmp_path):
+    tv_scraper.report_page_weight = False
+    tv_scraper.disk_cache = tradingview.DiskCacheTemplate(str(tmp_path))
+    tv_scraper._network_totals, tv_scraper._network_totals_lock = Counter(), tradingview.threading.Lock()
+    tv_scraper.driver = _PerformanceLogDriver([
+        ("Network.responseReceived", {"requestId": "1", "response": {"fromDiskCache": True}}),
+        ("Network.responseReceived", {"requestId": "2", "response": {}}),
+    ])
+    tv_scraper._report_page_weight("NASDAQ:AAPL", 0.0, full_load=True)
+    assert tv_scraper.disk_cache_hit_ratio == 0.5
+    assert tv_scraper.last_page_report is None
@@ -0,0 +1,127 @@
+import calendar
+
+import pytest
+
+from scraper_common import ResultCache
+
+
+def utc(*fields):
+    return calendar.timegm(fields + (0,) * (6 - len(fields)))
+
+
+NOW = utc(2024, 1, 10, 12, 34, 56)  # a Wednesday
+
+
+@pytest.mark.parametrize("interval, bounds", [
+    ("15", (utc(2024, 1, 10, 12, 30), utc(2024, 1, 10, 12, 45))),
+    ("240", (utc(2024, 1, 10, 12), utc(2024, 1, 10, 16))),
+    ("30S", (utc(2024, 1, 10, 12, 34, 30), utc(2024, 1, 10, 12, 35))),
+    ("D", (utc(2024, 1, 10), utc(2024, 1, 11))),
+    ("w", (utc(2024, 1, 8), utc(2024, 1, 15))),  # weekly bars open on Monday
+    ("M", (utc(2024, 1, 1), utc(2024, 2, 1))),
+    ("3M", (utc(2024, 1, 1), utc(2024, 4, 1))),
+    ("m15", (utc(2024, 1, 10, 12, 30), utc(2024, 1, 10, 12, 45))),
+    ("h4", (utc(2024, 1, 10, 12), utc(2024, 1, 10, 16))),
+    ("d1", (utc(2024, 1, 10), utc(2024, 1, 11))),
+])
+def test_bar_bounds(interval, bounds):
+    assert ResultCache.bar_bounds(interval, NOW) == bounds
+
+
+@pytest.mark.parametrize("interval", [None, "", "0", "m0", "15X", "4H"])
+def test_bar_bounds_unknown_intervals(interval):
+    assert ResultCache.bar_bounds(interval, NOW) is None
+
+
+def test_get_returns_the_current_bar_result_only(monkeypatch):
+    cache = ResultCache()
+    monkeypatch.setattr("time.time", lambda: NOW)
+    assert cache.get("tradingview", "BYBIT:BTCUSDT", "15") is None
+    cache.put("tradingview", "BYBIT:BTCUSDT", "15", "https://example.com/x/a/")
+    assert cache.get("tradingview", "BYBIT:BTCUSDT", "15") == "https://example.com/x/a/"
+    assert cache.get("tradingview", "BYBIT:BTCUSDT", "60") is None
+    assert cache.get("coinglass", "BYBIT:BTCUSDT", "15") is None
+    monkeypatch.setattr("time.time", lambda: utc(2024, 1, 10, 12, 45))
+    assert cache.get("tradingview", "BYBIT:BTCUSDT", "15") is None
+    assert cache.counters["memory_hits"] == 1
+
+
+def test_staleness_tolerance_reuses_the_previous_bar(monkeypatch):
+    cache = ResultCache(staleness_tolerance=30)
+    monkeypatch.setattr("time.time", lambda: NOW)
+    cache.put("coinglass", "Binance_BTCUSDT", "m15", "https://example.com/a.png")
+    monkeypatch.setattr("time.time", lambda: utc(2024, 1, 10, 12, 45, 20))
+    assert cache.get("coinglass", "Binance_BTCUSDT", "m15") == "https://example.com/a.png"
+    monkeypatch.setattr("time.time", lambda: utc(2024, 1, 10, 12, 45, 40))
+    assert cache.get("coinglass", "Binance_BTCUSDT", "m15") is None
+
+
+def test_default_intervals_are_not_cached():
+    cache = ResultCache()
+    cache.put("coinglass", "Binance_BTCUSDT", None, "https://example.com/a.png")
+    assert cache.get("coinglass", "Binance_BTCUSDT", None) is None
+
+
+def test_disk_tier_survives_a_new_instance_and_is_purged(tmp_path, monkeypatch):
+    monkeypatch.setattr("time.time", lambda: NOW)
+    ResultCache(cache_dir=str(tmp_path)).put("tradingview", "NASDAQ:AAPL", "D", "https://example.com/x/b/")
+    cache = ResultCache(cache_dir=str(tmp_path))
+    assert cache.get("tradingview", "NASDAQ:AAPL", "D") == "https://example.com/x/b/"
+    assert cache.counters["disk_hits"] == 1
+    monkeypatch.setattr("time.time", lambda: utc(2024, 1, 12))
+    cache.purge_expired()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_memory_tier_is_bounded(monkeypatch):
+    cache = ResultCache(max_entries=2)
+    monkeypatch.setattr("time.time", lambda: NOW)
+    for ticker in ("A", "B", "C"):
+        cache.put("tradingview", ticker, "15", f"link-{ticker}")
+    assert cache.get("tradingview", "A", "15") is None
+    assert cache.get("tradingview", "C", "15") == "link-C"
+
+
+def test_variants_are_cached_separately(monkeypatch):
+    cache = ResultCache()
+    monkeypatch.setattr("time.time", lambda: NOW)
+    cache.put("tradingview", "BYBIT:BTCUSDT", "15", "layout-a", variant="a")
+    assert cache.get("tradingview", "BYBIT:BTCUSDT", "15", variant="a") == "layout-a"
+    assert cache.get("tradingview", "BYBIT:BTCUSDT", "15", variant="b") is None
+    assert cache.get("tradingview", "BYBIT:BTCUSDT", "15") is None
+
+
+@pytest.mark.parametrize("ticker, continuous", [
+    ("BYBIT:BTCUSDT.P", True),
+    ("binance:ETHUSDT", True),
+    ("Binance_BTCUSDT", True),
+    ("NASDAQ:AAPL", False),
+    ("NSE:NIFTY", False),
+    ("AAPL", False),
+])
+def test_only_24_7_exchanges_are_continuous(ticker, continuous):
+    assert ResultCache.is_continuous(ticker) is continuous
+
+
+def test_tradingview_interval_sweep_uses_the_cache(tv_scraper, monkeypatch):
+    monkeypatch.setattr("time.time", lambda: NOW)
+    scraper = tv_scraper
+    scraper.driver, scraper.result_cache = object(), ResultCache()
+    scraper.result_cache.put("tradingview", "BYBIT:BTCUSDT", "15", "cached-15", variant="test")
+    scraper.result_cache.put("tradingview", "BYBIT:BTCUSDT", "60", "other-layout-60", variant="other")
+    captured = []
+    scraper._capture_sweep_interval = lambda ticker, interval, phases, full_load=False: captured.append(interval) or f"link-{interval}"
+    links = scraper.get_screenshot_links_for_intervals("BYBIT:BTCUSDT", ["15", "60"])
+    assert links == {"15": "cached-15", "60": "link-60"}
+    assert captured == ["60"]
+    assert scraper.result_cache.get("tradingview", "BYBIT:BTCUSDT", "60", variant="test") == "link-60"
+
+
+def test_tradingview_session_symbols_are_not_cached(tv_scraper, monkeypatch):
+    monkeypatch.setattr("time.time", lambda: NOW)
+    scraper = tv_scraper
+    scraper.driver, scraper.result_cache = object(), ResultCache()
+    scraper.result_cache.put("tradingview", "NASDAQ:AAPL", "240", "off-grid-240", variant="test")
+    scraper._capture_sweep_interval = lambda ticker, interval, phases, full_load=False: f"link-{interval}"
+    assert scraper.get_screenshot_links_for_intervals("NASDAQ:AAPL", ["240"]) == {"240": "link-240"}
+    assert scraper.result_cache.get("tradingview", "NASDAQ:AAPL", "240", variant="test") == "off-grid-240"
@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from scraper_common import (
+    DiskCacheTemplate, ProcessCaptureRunner, ScraperError, blocked_url_regex, clipboard_hook_script, clipboard_hook_wait_script,
+    document_ready, widget_snapshot_script,
+)
+
+
+def test_disk_cache_template_is_refreshed_from_the_fullest_copy(tmp_path):
+    template = DiskCacheTemplate(str(tmp_path / "template"), prefix="test-disk-cache-")
+    small, large = template.new_worker_dir(), template.new_worker_dir()
+    assert template.chrome_arguments(small)[0] == f"--disk-cache-dir={small}"
+    with open(os.path.join(small, "a"), "wb") as f:
+        f.write(b"x")
+    with open(os.path.join(large, "b"), "wb") as f:
+        f.write(b"x" * 100)
+    template.close()
+    assert os.listdir(template.path) == ["b"]
+    assert not os.path.exists(small) and not os.path.exists(large)
+
+    seeded = template.new_worker_dir()
+    assert os.listdir(seeded) == ["b"]
+    template.close()
+
+
+def test_blocked_url_regex_matches_cdp_wildcards():
+    regex = blocked_url_regex(["*://*.doubleclick.net/*", "*://fonts.gstatic.com/*"])
+    assert regex.match("https://ad.doubleclick.net/x.js")
+    assert regex.match("https://fonts.gstatic.com/s/font.woff2")
+    assert not regex.match("https://www.tradingview.com/chart/")
+
+
+@pytest.mark.parametrize("state, ready", [("loading", False), ("interactive", True), ("complete", True)])
+def test_document_ready(state, ready):
+    class _Driver:
+        def execute_script(self, script):
+            return state
+
+    assert document_ready(_Driver()) is ready
+
+
+def test_widget_snapshot_script_only_waits_on_the_clipboard_hook_when_given_one():
+    assert "ClipboardWaiters" not in widget_snapshot_script("window.tvWidget")
+    script = widget_snapshot_script("window.tvWidget", clipboard_prefix="__tv")
+    assert "const api = window.tvWidget;" in script
+    assert "window.__tvClipboardWaiters.push" in script
+
+
+def test_clipboard_hook_scripts_share_one_prefix():
+    for script in (clipboard_hook_script("__cg"), clipboard_hook_wait_script("__cg")):
+        assert "window.__cgClipboardText" in script
+        assert "__tv" not in script and "%(" not in script
+
+
+@dataclass
+class _Result:
+    ticker: str
+    interval: Optional[str]
+    error: Optional[Exception] = None
+
+
+class _Scraper:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def _run_job(self, ticker, interval):
+        error = RuntimeError("boom") if ticker == self.fail_on else None
+        return _Result(ticker, interval, error)
+
+
+class _Runner(ProcessCaptureRunner):
+    scraper_class = _Scraper
+
+    def _failed_result(self, job, error):
+        return _Result(*job, error=error)
+
+
+def test_process_runner_returns_every_job():
+    jobs = [("A", "1"), ("B", "5"), ("C", None)]
+    results = {result.ticker: result for result in _Runner(workers=2, fail_on="B").run(jobs)}
+    assert sorted(results) == ["A", "B", "C"]
+    assert results["A"].error is None
+    # Worker errors come back as picklable scraper errors
+    assert isinstance(results["B"].error, ScraperError)
+    assert "RuntimeError: boom" in str(results["B"].error)
+
+
+def test_process_runner_forks_workers_whatever_the_default_start_method(monkeypatch):
+    methods = []
+    get_context = multiprocessing.get_context
+    monkeypatch.setattr(multiprocessing, "get_context", lambda method=None: methods.append(method) or get_context(method))
+    assert [result.ticker for result in _Runner(workers=1).run([("A", "1")])] == ["A"]
+    assert methods == ["fork"]
+
+
+def test_process_runner_requires_a_failed_result():
+    class _Incomplete(ProcessCaptureRunner):
+        scraper_class = _Scraper
+
+    with pytest.raises(TypeError):
+        _Incomplete()
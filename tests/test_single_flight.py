@@ -0,0 +1,106 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scraper_common import ScraperError, SingleFlight
+
+
+class _Capture:
+    """Blocks until released, counting how often it actually ran."""
+
+    def __init__(self, result="link", error=None):
+        self.result, self.error = result, error
+        self.started, self.release = threading.Event(), threading.Event()
+        self.calls = 0
+
+    def __call__(self, *args):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def _wait_for_waiters(flights, count):
+    for _ in range(500):
+        if flights.counters["coalesced"] >= count:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("waiters never joined the flight")
+
+
+def test_concurrent_threads_share_one_call():
+    flights, capture = SingleFlight(), _Capture()
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(flights.do, "k", capture)]
+        assert capture.started.wait(5)
+        futures += [executor.submit(flights.do, "k", capture) for _ in range(3)]
+        _wait_for_waiters(flights, 3)
+        capture.release.set()
+        assert [f.result() for f in futures] == ["link"] * 4
+    assert capture.calls == 1
+    assert flights.counters == {"executed": 1, "coalesced": 3}
+    assert flights.do("k", lambda: "next") == "next"  # the key is free again
+
+
+def test_waiters_get_the_leaders_exception():
+    flights, capture = SingleFlight(), _Capture(error=ScraperError("boom"))
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(flights.do, "k", capture)
+        assert capture.started.wait(5)
+        waiter = executor.submit(flights.do, "k", capture)
+        _wait_for_waiters(flights, 1)
+        capture.release.set()
+        for future in (leader, waiter):
+            with pytest.raises(ScraperError, match="boom"):
+                future.result()
+
+
+def test_lead_never_waits_for_a_call_in_flight():
+    flights, capture = SingleFlight(), _Capture()
+    with ThreadPoolExecutor(1) as executor:
+        leader = executor.submit(flights.do, "k", capture)
+        assert capture.started.wait(5)
+        assert flights.lead("k", lambda: "own") == "own"
+        capture.release.set()
+        assert leader.result() == "link"
+    assert flights.counters == {"executed": 1, "bypassed": 1}
+
+
+def test_async_callers_share_one_call():
+    flights, calls = SingleFlight(), []
+
+    async def capture():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "link"
+
+    async def main():
+        return await asyncio.gather(*(flights.do_async("k", capture) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["link"] * 3
+    assert len(calls) == 1
+
+
+def test_waiters_of_a_cancelled_leader_get_the_interrupted_error():
+    class _Interrupted(ScraperError):
+        pass
+
+    flights = SingleFlight(_Interrupted)
+
+    async def capture():
+        await asyncio.sleep(10)
+
+    async def main():
+        leader = asyncio.create_task(flights.do_async("k", capture))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flights.do_async("k", capture))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(_Interrupted):
+            await waiter
+
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+
+@pytest.mark.parametrize("body, expected", [
+    ("m7azfyek", "m7azfyek"),
+    ('  "m7azfyek"\n', "m7azfyek"),
+    ('{"id": "m7azfyek"}', "m7azfyek"),
+    ('{"snapshot_id": "AbC123xyz"}', "AbC123xyz"),
+    ('{"status": "ok"}', None),
+    ("<html>error</html>", None),
+    ("abc", None),  # too short for a snapshot id
+    ("", None),
+    (None, None),
+])
+def test_parse_snapshot_id(tradingview, body, expected):
+    assert tradingview.TradingViewScraper.parse_snapshot_id(body) == expected
+
+
+def test_snapshot_id_becomes_share_link(tradingview):
+    scraper = tradingview.TradingViewScraper
+    link = scraper.SNAPSHOT_SHARE_URL.format(snapshot_id=scraper.parse_snapshot_id('{"id": "m7azfyek"}'))
+    assert link == "https://www.tradingview.com/x/m7azfyek/"
+    assert scraper.convert_link_to_image_url(link) == "https://s3.tradingview.com/snapshots/m/m7azfyek.png"
+
+
+class _PerformanceLogDriver:
+    """Replays CDP events through get_log('performance'); bodies maps requestId -> response body."""
+
+    def __init__(self, events, bodies):
+        self.events = events
+        self.bodies = bodies
+
+    def get_log(self, log_type):
+        events, self.events = self.events, []
+        return [{"message": json.dumps({"message": {"method": method, "params": params}})} for method, params in events]
+
+    def execute_cdp_cmd(self, command, params):
+        return {"body": self.bodies[params["requestId"]]}
+
+
+def _upload(request_id, http_method):
+    url = "https://www.tradingview.com/snapshot/"
+    return [
+        ("Network.requestWillBeSent", {"requestId": request_id, "request": {"url": url, "method": http_method}}),
+        ("Network.responseReceived", {"requestId": request_id, "response": {"url": url, "status": 200}}),
+        ("Network.loadingFinished", {"requestId": request_id}),
+    ]
+
+
+def test_snapshot_upload_ignores_non_post_requests(tradingview, tv_scraper):
+    tv_scraper.driver = _PerformanceLogDriver(
+        _upload("1", "GET") + _upload("2", "POST"),
+        {"1": '{"id": "oldsnap1"}', "2": '{"id": "m7azfyek"}'},
+    )
+    assert tv_scraper._wait_for_snapshot_upload(tradingview.time.monotonic() + 1) == "m7azfyek"
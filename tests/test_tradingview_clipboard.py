@@ -0,0 +1,32 @@
+class _ClipboardDriver:
+    """Answers clipboard reads from a scripted sequence."""
+
+    def __init__(self, reads):
+        self.reads = list(reads)
+
+    def execute_script(self, script):
+        return self.reads.pop(0) if len(self.reads) > 1 else self.reads[0]
+
+
+def test_poll_clipboard_skips_the_previous_link(tradingview, tv_scraper):
+    scraper = tv_scraper
+    scraper.driver = _ClipboardDriver(["https://www.tradingview.com/x/old/", "https://www.tradingview.com/x/new/"])
+    link = scraper._poll_clipboard(tradingview.time.monotonic(), 0, 0, 5, stale_content="https://www.tradingview.com/x/old/")
+    assert link == "https://www.tradingview.com/x/new/"
+
+
+class _HookedClipboardDriver(_ClipboardDriver):
+    """The hook never sees a write, the real clipboard still holds `reads`."""
+
+    def set_script_timeout(self, timeout):
+        pass
+
+    def execute_async_script(self, script, *args):
+        return None
+
+
+def test_wait_for_clipboard_write_ignores_the_previous_link(tv_scraper):
+    scraper = tv_scraper
+    scraper.driver = _HookedClipboardDriver(["https://www.tradingview.com/x/old/"])
+    assert scraper._wait_for_clipboard_write(0.1, stale_content="https://www.tradingview.com/x/old/") is None
+    assert scraper._wait_for_clipboard_write(0.1) == "https://www.tradingview.com/x/old/"
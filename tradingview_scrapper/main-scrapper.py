@@ -1,20 +1,238 @@
+import asyncio
+import base64
+import contextvars
+import functools
+import json
 import logging
 import os
+import queue
 import re
+import sys
+import threading
 import time
-from typing import Optional
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from selenium import webdriver
 from selenium.common.exceptions import WebDriverException, TimeoutException, NoSuchWindowException
 from selenium.webdriver import ActionChains, Keys
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
 
-class TradingViewScraperError(Exception):
+try:
+    from playwright.async_api import async_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+except ImportError: # Optional, only needed for AsyncTradingViewScraper
+    async_playwright = None
+    PlaywrightError = PlaywrightTimeoutError = Exception
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # scraper_common.py lives at the repository root
+from scraper_common import (
+    COMMON_BLOCKED_URLS, ELEMENT_RECT_SCRIPT, DiskCacheTemplate, LatencyStats, PageWeightReport,
+    ProcessCaptureRunner as BaseProcessCaptureRunner, ResultCache, CaptureHistory, ScraperError, SingleFlight,
+    abort_blocked_request, allow_request, blocked_url_regex, chart_ready_expression, clipboard_hook_script,
+    clipboard_hook_wait_script, document_ready, open_network_counter, read_network_totals, set_request_blocking,
+    set_symbol_script, timed_phase, widget_snapshot_script,
+)
+
+_LOGGING_LOCK = threading.Lock()
+# Page weight report of the current asyncio task's most recent chart load (AsyncTradingViewScraper)
+_ASYNC_PAGE_REPORT = contextvars.ContextVar('tradingview_page_report', default=None)
+
+
+def _ensure_logging_configured():
+    """Configures root logging once if nothing else has, safe to call from many threads."""
+    with _LOGGING_LOCK:
+        if not logging.getLogger().handlers and not logging.getLogger(__name__).handlers:
+            logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+class TradingViewScraperError(ScraperError):
     """Custom exception for TradingView scraper errors."""
     pass
 
 
+@dataclass
+class CaptureResult:
+    """Outcome of a single (ticker, interval) capture job."""
+    ticker: str
+    interval: str
+    link: Optional[str] = None
+    error: Optional[Exception] = None
+    duration: float = 0.0 # Seconds spent on this job
+    page_report: Optional["PageWeightReport"] = None # Network cost of the chart load, if measured
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and bool(self.link)
+
+
+# Shared by every scraper in the process, so identical captures coalesce across instances, threads and event loops
+_CAPTURE_FLIGHTS = SingleFlight(TradingViewScraperError)
+
+
+class DriverPool:
+    """
+    Keeps a fixed number of initialized WebDrivers alive so captures don't pay
+    Chrome + chromedriver startup on the request path.
+
+    Drivers are health-checked with a cheap script ping before each lease, and
+    dead or discarded drivers are replaced by a background thread.
+    """
+    HEALTH_CHECK_SCRIPT = "return 1;"
+    DEFAULT_LEASE_TIMEOUT = 60 # Seconds to wait for a free driver
+    REPLACE_RETRY_DELAY = 5 # Seconds before retrying a failed replacement, doubled per failure
+    MAX_REPLACE_RETRY_DELAY = 120
+
+    def __init__(self, driver_factory: Callable[[], webdriver.Chrome], size: int = 2, lease_timeout: float = DEFAULT_LEASE_TIMEOUT):
+        """
+        Args:
+            driver_factory: Callable returning a ready-to-use (e.g. authenticated) driver.
+            size: Number of drivers to keep alive.
+            lease_timeout: Default seconds to block in lease() before giving up.
+        """
+        if size < 1:
+            raise ValueError("DriverPool size must be at least 1.")
+        self.driver_factory = driver_factory
+        self.size = size
+        self.lease_timeout = lease_timeout
+        self._idle = queue.Queue()
+        self._all_drivers = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.logger = logging.getLogger(__name__)
+
+    def start(self):
+        """
+        Creates the initial drivers. Blocks until each has been attempted; drivers
+        that failed to start are retried in the background.
+
+        Raises:
+            TradingViewScraperError: If not a single driver could be created.
+        """
+        self.logger.info(f"Warming driver pool with {self.size} driver(s)...")
+        started = sum(self._add_driver() for _ in range(self.size))
+        if not started:
+            self.close()
+            raise TradingViewScraperError("Driver pool could not create any driver.")
+        for _ in range(self.size - started):
+            self._replace_in_background()
+        self.logger.info(f"Driver pool ready ({started}/{self.size} driver(s)).")
+
+    def _add_driver(self) -> bool:
+        """Creates one driver via the factory and makes it available for lease."""
+        try:
+            driver = self.driver_factory()
+        except (TradingViewScraperError, WebDriverException) as e:
+            self.logger.error(f"Driver pool failed to create a driver: {e}")
+            return False
+        with self._lock:
+            if self._closed:
+                self._quit_driver(driver)
+                return False
+            self._all_drivers.add(driver)
+        self._idle.put(driver)
+        return True
+
+    def _replace_in_background(self):
+        """Spawns a daemon thread that creates a replacement driver."""
+        if self._closed:
+            return
+        threading.Thread(target=self._replace, name="driver-pool-replenish", daemon=True).start()
+
+    def _replace(self):
+        """Retries _add_driver with exponential backoff until it succeeds or the pool is closed."""
+        delay = self.REPLACE_RETRY_DELAY
+        while not self._closed and not self._add_driver():
+            self.logger.warning(f"Retrying driver replacement in {delay}s.")
+            time.sleep(delay)
+            delay = min(delay * 2, self.MAX_REPLACE_RETRY_DELAY)
+
+    def _is_healthy(self, driver: webdriver.Chrome) -> bool:
+        """Pings the driver with a trivial script."""
+        try:
+            return driver.execute_script(self.HEALTH_CHECK_SCRIPT) == 1
+        except (WebDriverException, TimeoutException):
+            return False
+
+    def _quit_driver(self, driver: webdriver.Chrome):
+        try:
+            driver.quit()
+        except (WebDriverException, NoSuchWindowException) as e:
+            self.logger.debug(f"Error quitting pooled driver (might be already closed): {e}")
+
+    def _retire(self, driver: webdriver.Chrome):
+        """Drops a driver from the pool, quits it and schedules a replacement."""
+        with self._lock:
+            self._all_drivers.discard(driver)
+        self._quit_driver(driver)
+        self._replace_in_background()
+
+    def lease(self, timeout: Optional[float] = None) -> webdriver.Chrome:
+        """
+        Returns a healthy driver for exclusive use. Must be given back via release().
+
+        Raises:
+            TradingViewScraperError: If the pool is closed or no healthy driver
+                                     became available within the timeout.
+        """
+        timeout = self.lease_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._closed:
+                raise TradingViewScraperError("Driver pool is closed.")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TradingViewScraperError(f"No healthy driver available within {timeout}s.")
+            try:
+                driver = self._idle.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if self._is_healthy(driver):
+                return driver
+            self.logger.warning("Pooled driver failed health check, replacing it in the background.")
+            self._retire(driver)
+
+    def release(self, driver: webdriver.Chrome, discard: bool = False):
+        """Returns a leased driver. Pass discard=True if it is known to be broken."""
+        if self._closed:
+            self._quit_driver(driver)
+            return
+        if discard:
+            self._retire(driver)
+        else:
+            self._idle.put(driver)
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None):
+        """Context manager that leases a driver and releases it on exit, discarding it if WebDriver failed."""
+        driver = self.lease(timeout)
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            broken = True
+            raise
+        except TradingViewScraperError as e:
+            broken = isinstance(e.__cause__, WebDriverException)
+            raise
+        finally:
+            self.release(driver, discard=broken)
+
+    def close(self):
+        """Quits every driver owned by the pool."""
+        with self._lock:
+            self._closed = True
+            drivers = list(self._all_drivers)
+            self._all_drivers.clear()
+        self.logger.info(f"Closing driver pool ({len(drivers)} driver(s))...")
+        for driver in drivers:
+            self._quit_driver(driver)
+
+
 class TradingViewScraper:
     """
     A scraper for capturing TradingView chart screenshot links using Selenium.
@@ -29,30 +247,181 @@ class TradingViewScraper:
     SESSION_ID_ENV_VAR = "TRADINGVIEW_SESSION_ID"
     SESSION_ID_SIGN_ENV_VAR = "TRADINGVIEW_SESSION_ID_SIGN"
     CLIPBOARD_READ_SCRIPT = "return navigator.clipboard.readText();"
+    # Resolves false instead of throwing when the page may not write the clipboard (e.g. unfocused)
+    CLIPBOARD_CLEAR_SCRIPT = "return navigator.clipboard.writeText('').then(() => true, () => false);"
+    # Installed before any page script runs: records clipboard writes in the page and wakes
+    # waiters immediately, so the link is picked up the moment TradingView copies it
+    CLIPBOARD_HOOK_SCRIPT = clipboard_hook_script("__tv")
+    CHART_API_JS = "(window.TradingViewApi || window.tradingViewApi || window.tvWidget)"
+    # execute_async_script: switches symbol/interval in the running chart, see set_symbol_script
+    SET_SYMBOL_SCRIPT = set_symbol_script(CHART_API_JS)
+    CHART_ELEMENT_SELECTOR = ".chart-markup-table, .chart-container"
+    CLIPBOARD_HOOK_CHECK_SCRIPT = "return !!window.__tvClipboardHooked;"
+    CLIPBOARD_HOOK_RESET_SCRIPT = "window.__tvClipboardText = null;"
+    # execute_async_script: resolves with the copied text as soon as it is written, or null at the deadline
+    CLIPBOARD_HOOK_WAIT_SCRIPT = clipboard_hook_wait_script("__tv")
+    # TradingView pages expose window.is_authenticated; only an explicit false counts as logged out
+    LOGGED_OUT_CHECK_SCRIPT = "return window.is_authenticated === false;"
     DEFAULT_WINDOW_SIZE = "1920,1080"
     MAX_RETRY_ATTEMPTS = 5 # Number of retries for clipboard read
-    NAV_WAIT_TIME = 10 # Time to wait after navigation (consider explicit waits)
-    COOKIE_WAIT_TIME = 2 # Time to wait after navigating for cookies
-    CLIPBOARD_WAIT_TIME = 3 # Time to wait after Alt+S for clipboard
+    NAV_WAIT_TIME = 10 # Default max time to wait for the chart to become ready after navigation
+    CHART_READY_POLL_INTERVAL = 0.25 # Seconds between readiness probes
+    # Ready = chart canvas drawn, no visible loading spinner, series data loaded
+    CHART_READY_EXPRESSION = chart_ready_expression("window.TradingViewApi")
+    COOKIE_WAIT_TIMEOUT = 10 # Max time to wait for the base page before setting cookies
+    DOCUMENT_READY_POLL_INTERVAL = 0.1 # Seconds between document readiness probes
+    CLIPBOARD_WAIT_TIME = 3 # Time to wait after Alt+S for clipboard (until latency stats are learned)
+    CLIPBOARD_POLL_INTERVAL = 0.5 # Clipboard re-read spacing (until latency stats are learned)
+    DEFAULT_LATENCY_STATS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "latency_stats.json")
+    DEFAULT_RESULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "result_cache")
+    DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "capture_history.db")
+    # --- Capture modes ---
+    CAPTURE_MODE_CLIPBOARD = "clipboard" # Alt+S, then read the link TradingView copies
+    CAPTURE_MODE_NETWORK = "network" # Alt+S, then take the id from the snapshot upload response
+    CAPTURE_MODE_WIDGET = "widget" # No keystroke, call the chart's own snapshot function in the page
+    CAPTURE_MODES = (CAPTURE_MODE_CLIPBOARD, CAPTURE_MODE_NETWORK, CAPTURE_MODE_WIDGET)
+    # execute_async_script: in-page chart snapshot, also resolved by the clipboard hook (see widget_snapshot_script)
+    WIDGET_SNAPSHOT_SCRIPT = widget_snapshot_script(CHART_API_JS, clipboard_prefix="__tv")
+    SNAPSHOT_UPLOAD_URL_PATTERN = re.compile(r'https://[a-z]+\.tradingview\.com/snapshot/?(?:\?.*)?$')
+    SNAPSHOT_ID_PATTERN = re.compile(r'^[a-zA-Z0-9]{6,16}$')
+    SNAPSHOT_SHARE_URL = "https://www.tradingview.com/x/{snapshot_id}/"
+    NETWORK_POLL_INTERVAL = 0.1 # Seconds between performance log reads while waiting for the upload
+    # TradingView's own trackers on top of the shared blocklist (see COMMON_BLOCKED_URLS)
+    DEFAULT_BLOCKED_URLS = COMMON_BLOCKED_URLS + (
+        "*://*.amazon-adsystem.com/*",
+        "*://*.adnxs.com/*",
+        "*://*.criteo.com/*",
+        "*://*.sentry.io/*",
+        "*://*.snowplowanalytics.com/*",
+        "*://telemetry.tradingview.com/*",
+    )
+
+    def __init__(self, default_ticker: str = "BYBIT:BTCUSDT.P", default_interval: str = '15', headless: bool = True, window_size: str = DEFAULT_WINDOW_SIZE, chart_page_id: str = DEFAULT_CHART_PAGE_ID, pool_size: int = 0, chart_ready_timeout: float = NAV_WAIT_TIME, latency_stats_path: Optional[str] = DEFAULT_LATENCY_STATS_PATH, capture_mode: str = CAPTURE_MODE_CLIPBOARD, reuse_chart_page: bool = True, blocked_urls: Optional[Iterable[str]] = DEFAULT_BLOCKED_URLS, report_page_weight: bool = False, disk_cache_dir: Optional[str] = None, disk_cache_size: int = DiskCacheTemplate.DEFAULT_MAX_SIZE, proxy_server: Optional[str] = None, proxy_spki: Optional[str] = None, cache_results: bool = False, result_cache_dir: Optional[str] = DEFAULT_RESULT_CACHE_DIR, result_cache_staleness: float = 0.0, history_path: Optional[str] = None):
+        """
+        Initializes the scraper configuration.
+
+        With reuse_chart_page, a driver already showing the chart page switches
+        symbol and interval inside the running chart instead of reloading the
+        whole TradingView app; a full navigation is only the fallback.
 
-    def __init__(self, default_ticker: str = "BYBIT:BTCUSDT.P", default_interval: str = '15', headless: bool = True, window_size: str = DEFAULT_WINDOW_SIZE, chart_page_id: str = DEFAULT_CHART_PAGE_ID):
-        """Initializes the scraper configuration."""
+        capture_mode selects how the snapshot link is obtained: "clipboard" reads
+        what TradingView copies after Alt+S, "network" takes the id from the
+        snapshot upload response (no clipboard permissions involved, works in
+        headless Chrome), "widget" calls the chart's own snapshot function
+        instead of pressing Alt+S, falling back to "clipboard" if unavailable.
+
+        Clipboard waits are calibrated from latencies observed per exchange and
+        interval, persisted at latency_stats_path (None keeps them in memory).
+
+        chart_ready_timeout caps how long to wait for the chart to become ready
+        after navigation; the wait usually ends as soon as the chart is drawn.
+
+        blocked_urls are URL patterns (CDP wildcards) every driver refuses to
+        load, DEFAULT_BLOCKED_URLS by default; pass None to load everything.
+        With report_page_weight (off by default, as it turns on Chrome's
+        performance log), each chart load is measured from the CDP Network
+        events (bytes, blocked requests, time to ready) and logged; see
+        last_page_report and CaptureResult.page_report. Savings need an
+        unblocked baseline, so until one exists for the exchange (a few loads,
+        kept with the latency statistics) full loads run without the blocklist.
+
+        disk_cache_dir names a DiskCacheTemplate: every driver (pooled or not)
+        starts from a copy of that warm HTTP cache instead of an empty one, so
+        TradingView's static bundles aren't downloaded again. The share of
+        responses served from it is in each page report and disk_cache_hit_ratio;
+        to count it, a disk cache also turns on Chrome's performance log.
+
+        proxy_server (e.g. "http://127.0.0.1:8899") routes every browser through
+        a shared caching proxy such as caching_proxy/main-proxy.py. proxy_spki is
+        the base64 SHA-256 SPKI hash of the proxy's certificate, trusted so it
+        can serve cached HTTPS assets.
+
+        With cache_results (off by default), get_screenshot_link and the interval
+        sweep return the link already captured for the same ticker, interval and
+        chart_page_id during the current bar instead of capturing again
+        (ResultCache: memory, plus result_cache_dir on disk if set).
+        result_cache_staleness lets a link from the previous bar be reused for
+        that many seconds after the bar closes. Only 24/7 crypto tickers are
+        cached: session markets like NASDAQ:AAPL open their bars at the session
+        start, not on the UTC grid the cache works out bar closes from.
+
+        If history_path is set (e.g. DEFAULT_HISTORY_PATH), every browser capture
+        (not cache hits or coalesced calls) is logged with its phase timings to
+        the SQLite CaptureHistory there, which answers queries like latest() or
+        latency_by_exchange(). Off by default.
+
+        If pool_size > 0, entering the context warms a DriverPool of that many
+        authenticated drivers, and get_screenshot_link leases one per call
+        instead of using a single driver.
+        """
+        if capture_mode not in self.CAPTURE_MODES:
+            raise ValueError(f"capture_mode must be one of {self.CAPTURE_MODES}, got {capture_mode!r}.")
         self.headless = headless
         self.window_size = window_size
         self.chart_page_id = chart_page_id
+        self.capture_mode = capture_mode
+        self.reuse_chart_page = reuse_chart_page
+        self.blocked_urls = tuple(blocked_urls or ())
+        self.report_page_weight = report_page_weight
+        self.disk_cache = DiskCacheTemplate(disk_cache_dir, disk_cache_size, prefix="tv-disk-cache-") if disk_cache_dir else None
+        self.proxy_server = proxy_server
+        self.proxy_spki = proxy_spki
+        self.result_cache = ResultCache(cache_dir=result_cache_dir, staleness_tolerance=result_cache_staleness) if cache_results else None
+        self.history = CaptureHistory(history_path) if history_path else None
+        # Network counts summed over all measured loads, for the overall disk cache hit ratio
+        self._network_totals = Counter()
+        self._network_totals_lock = threading.Lock()
         self.default_ticker = default_ticker
         self.default_interval = default_interval
+        self.pool_size = pool_size
+        self.chart_ready_timeout = chart_ready_timeout
+        self.latency_stats = LatencyStats(latency_stats_path)
+        # Driver leased from the pool by the current thread overrides the shared one
+        self._local = threading.local()
         self.driver = None
+        self.pool = None
+        # Per-driver auth state, keyed by WebDriver session id:
+        # {'values': (sessionid, sessionid_sign), 'expiry': epoch seconds or None}
+        self._auth_state = {}
+        self._auth_lock = threading.Lock()
         # self.wait = None
 
         self.logger = logging.getLogger(__name__)
         # Ensure logger is configured if run as script
-        if not self.logger.handlers:
-             logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        _ensure_logging_configured()
 
+    @property
+    def driver(self) -> Optional[webdriver.Chrome]:
+        """The driver for the current thread: its leased/registered driver if any, else the shared driver."""
+        return getattr(self._local, 'driver', None) or self._driver
+
+    @driver.setter
+    def driver(self, value: Optional[webdriver.Chrome]):
+        self._driver = value
+
+    @property
+    def last_page_report(self) -> Optional[PageWeightReport]:
+        """Page weight report of the current thread's most recent chart load, if measured."""
+        return getattr(self._local, 'page_report', None)
+
+    @property
+    def _counts_network(self) -> bool:
+        """True if chart loads are measured from the performance log: for page reports or the disk cache hit ratio."""
+        return self.report_page_weight or self.disk_cache is not None
+
+    @property
+    def disk_cache_hit_ratio(self) -> Optional[float]:
+        """Share of responses served from the HTTP disk cache over all measured loads, None before any."""
+        with self._network_totals_lock:
+            responses, hits = self._network_totals['responses'], self._network_totals['cache_hits']
+        return hits / responses if responses else None
 
     def _setup_driver(self):
-        """Configures and initializes the Chrome WebDriver."""
+        """Initializes the Chrome WebDriver used by this scraper."""
+        self.driver = self._create_driver()
+
+    def _create_driver(self) -> webdriver.Chrome:
+        """Configures and returns a new Chrome WebDriver."""
         self.logger.info("Initializing WebDriver...")
         chrome_options = Options()
         if self.headless:
@@ -62,6 +431,14 @@ class TradingViewScraper:
         chrome_options.add_argument('--force-dark-mode')
         chrome_options.add_argument("--disable-extensions")
         chrome_options.add_argument(f"--window-size={self.window_size}")
+        if self.disk_cache:
+            for argument in self.disk_cache.chrome_arguments(self.disk_cache.new_worker_dir()):
+                chrome_options.add_argument(argument)
+        if self.proxy_server:
+            chrome_options.add_argument(f"--proxy-server={self.proxy_server}")
+            chrome_options.add_argument("--proxy-bypass-list=<-loopback>") # Local fixture sites go through the proxy too
+        if self.proxy_spki:
+            chrome_options.add_argument(f"--ignore-certificate-errors-spki-list={self.proxy_spki}")
 
         prefs = {
             "profile.content_settings.exceptions.clipboard": {
@@ -69,16 +446,40 @@ class TradingViewScraper:
             }
         }
         chrome_options.add_experimental_option("prefs", prefs)
+        if self.capture_mode == self.CAPTURE_MODE_NETWORK or self._counts_network:
+            # Exposes CDP Network.* events through driver.get_log('performance')
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+            chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
 
         try:
-            self.driver = webdriver.Chrome(options=chrome_options)
+            driver = webdriver.Chrome(options=chrome_options)
             self.logger.info("WebDriver initialized successfully.")
         except WebDriverException as e:
             self.logger.error(f"Failed to initialize WebDriver: {e}")
             raise TradingViewScraperError("WebDriver initialization failed") from e
 
-    def _set_auth_cookies(self) -> bool:
+        try:
+            driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": self.CLIPBOARD_HOOK_SCRIPT})
+        except WebDriverException as e:
+            self.logger.warning(f"Could not install clipboard hook, falling back to clipboard polling: {e}")
+        if self.blocked_urls:
+            try:
+                driver.execute_cdp_cmd("Network.enable", {})
+                driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(self.blocked_urls)})
+            except WebDriverException as e:
+                self.logger.warning(f"Could not install the request blocklist, loading pages unfiltered: {e}")
+        return driver
+
+    def _create_authenticated_driver(self) -> webdriver.Chrome:
+        """Driver factory for the pool: a new driver with auth cookies already set."""
+        driver = self._create_driver()
+        if not self._set_auth_cookies(driver):
+            self.logger.warning("Pooled driver created without guaranteed authentication (cookies not set).")
+        return driver
+
+    def _set_auth_cookies(self, driver: Optional[webdriver.Chrome] = None) -> bool:
         """Sets authentication cookies from environment variables."""
+        driver = driver or self.driver
         session_id_value = os.getenv(self.SESSION_ID_ENV_VAR)
         session_id_sign_value = os.getenv(self.SESSION_ID_SIGN_ENV_VAR)
 
@@ -86,18 +487,19 @@ class TradingViewScraper:
             self.logger.warning(f"TradingView session cookies not found. Ensure {self.SESSION_ID_ENV_VAR} and {self.SESSION_ID_SIGN_ENV_VAR} are set in environment.")
             return False # Indicate that auth cookies were not set
 
-        if not self.driver:
+        if not driver:
              self.logger.error("Driver not initialized before setting cookies.")
              return False
 
         try:
             self.logger.info(f"Navigating to {self.TRADINGVIEW_BASE_URL} to set cookies...")
-            self.driver.get(self.TRADINGVIEW_BASE_URL)
-            time.sleep(self.COOKIE_WAIT_TIME) # Allow page load
+            driver.get(self.TRADINGVIEW_BASE_URL)
+            # Cookies only need the document on the domain, not the fully loaded page
+            WebDriverWait(driver, self.COOKIE_WAIT_TIMEOUT, poll_frequency=self.DOCUMENT_READY_POLL_INTERVAL).until(document_ready)
 
             self.logger.info("Adding authentication cookies...")
             if session_id_value:
-                self.driver.add_cookie({
+                driver.add_cookie({
                     'name': self.SESSION_ID_COOKIE,
                     'value': session_id_value,
                     'domain': '.tradingview.com',
@@ -106,7 +508,7 @@ class TradingViewScraper:
                     'httpOnly': True
                 })
             if session_id_sign_value:
-                self.driver.add_cookie({
+                driver.add_cookie({
                     'name': self.SESSION_ID_SIGN_COOKIE,
                     'value': session_id_sign_value,
                     'domain': '.tradingview.com',
@@ -115,32 +517,131 @@ class TradingViewScraper:
                     'httpOnly': True
                 })
             self.logger.info("Authentication cookies added (if found in environment).")
+            expiry = self._auth_cookie_expiry(driver)
+            with self._auth_lock:
+                self._auth_state[driver.session_id] = {
+                    'values': (session_id_value, session_id_sign_value),
+                    'expiry': expiry,
+                }
             return True
         except (WebDriverException, TimeoutException) as e:
             self.logger.error(f"Error setting cookies or navigating to base URL: {e}")
             return False # Indicate failure
 
+    def _auth_cookie_expiry(self, driver: webdriver.Chrome) -> Optional[float]:
+        """Returns the earliest expiry of the auth cookies in the jar (None for session cookies)."""
+        expiries = []
+        for name in (self.SESSION_ID_COOKIE, self.SESSION_ID_SIGN_COOKIE):
+            try:
+                cookie = driver.get_cookie(name)
+            except WebDriverException:
+                cookie = None
+            if cookie and cookie.get('expiry') is not None:
+                expiries.append(cookie['expiry'])
+        return min(expiries) if expiries else None
+
+    def _has_valid_auth_cookies(self, driver: webdriver.Chrome, session_id_value: str, session_id_sign_value: str) -> bool:
+        """Checks the driver's cookie jar for unexpired auth cookies matching the given values."""
+        with self._auth_lock:
+            state = self._auth_state.get(driver.session_id)
+        if not state or state['values'] != (session_id_value, session_id_sign_value):
+            return False
+        if state['expiry'] is not None and state['expiry'] <= time.time():
+            return False
+        try:
+            # Cookies are only readable while on a tradingview.com page
+            if 'tradingview.com' not in driver.current_url:
+                return False
+            for name, expected in ((self.SESSION_ID_COOKIE, session_id_value), (self.SESSION_ID_SIGN_COOKIE, session_id_sign_value)):
+                cookie = driver.get_cookie(name)
+                if not cookie or cookie.get('value') != expected:
+                    return False
+                if cookie.get('expiry') is not None and cookie['expiry'] <= time.time():
+                    return False
+        except WebDriverException as e:
+            self.logger.debug(f"Could not inspect cookie jar: {e}")
+            return False
+        return True
+
+    def _ensure_authenticated(self, driver: Optional[webdriver.Chrome] = None) -> bool:
+        """
+        Sets auth cookies only if the driver doesn't already hold valid ones,
+        saving the base-URL round trip on every capture after the first.
+        """
+        driver = driver or self.driver
+        session_id_value = os.getenv(self.SESSION_ID_ENV_VAR)
+        session_id_sign_value = os.getenv(self.SESSION_ID_SIGN_ENV_VAR)
+        if driver and session_id_value and session_id_sign_value and \
+                self._has_valid_auth_cookies(driver, session_id_value, session_id_sign_value):
+            self.logger.info("Driver already authenticated, skipping cookie setup.")
+            return True
+        return self._set_auth_cookies(driver)
+
+    def _invalidate_auth(self, driver: Optional[webdriver.Chrome] = None):
+        """Forgets the recorded auth state so the next capture re-authenticates."""
+        driver = driver or self.driver
+        if driver:
+            with self._auth_lock:
+                self._auth_state.pop(driver.session_id, None)
+
+    def _is_logged_out(self) -> bool:
+        """Detects a logged-out TradingView page after navigation."""
+        try:
+            return bool(self.driver.execute_script(self.LOGGED_OUT_CHECK_SCRIPT))
+        except WebDriverException as e:
+            self.logger.debug(f"Logged-out check failed: {e}")
+            return False
+
     def _navigate_and_wait(self, url: str):
-        """Navigates to a URL and waits for a fixed duration."""
+        """Navigates to a URL and waits until the chart is ready to be snapshotted."""
         if not self.driver:
             raise TradingViewScraperError("Driver not available for navigation.")
         try:
             self.logger.info(f"Navigating to chart URL: {url}")
             self.driver.get(url)
-            # Replace with WebDriverWait for specific element if possible
-            self.logger.info(f"Waiting {self.NAV_WAIT_TIME}s for page load...")
-            time.sleep(self.NAV_WAIT_TIME)
-            self.logger.info("Wait complete.")
+            self._wait_for_chart_ready()
         except (WebDriverException, TimeoutException) as e:
             self.logger.error(f"Failed to navigate to {url}: {e}")
             raise TradingViewScraperError(f"Navigation to {url} failed") from e
 
+    def _wait_for_chart_ready(self) -> bool:
+        """
+        Polls the page until the chart is ready, up to chart_ready_timeout.
+        On timeout, logs a warning and lets the capture proceed anyway.
+        """
+        start = time.monotonic()
+        try:
+            WebDriverWait(self.driver, self.chart_ready_timeout, poll_frequency=self.CHART_READY_POLL_INTERVAL).until(
+                lambda driver: driver.execute_script(f"return {self.CHART_READY_EXPRESSION};")
+            )
+            self.logger.info(f"Chart ready after {time.monotonic() - start:.2f}s.")
+            return True
+        except TimeoutException:
+            self.logger.warning(f"Chart not detected as ready within {self.chart_ready_timeout}s, proceeding anyway.")
+            return False
+
 
-    def _trigger_screenshot_and_get_link(self) -> Optional[str]:
-        """Triggers screenshot shortcut (Alt+S) and reads clipboard."""
+    def _trigger_screenshot_and_get_link(self, stats_key: Optional[str] = None) -> Optional[str]:
+        """
+        Triggers screenshot shortcut (Alt+S) and returns the copied link.
+
+        With the clipboard hook installed, the link is returned the moment the
+        page writes it. Otherwise the clipboard is polled: first after the
+        learned typical latency for stats_key, then at the learned spacing.
+        Either way Alt+S is pressed again once the CLIPBOARD_WAIT_TIME budget
+        (or the learned p95, if longer) has passed. The clipboard is cleared
+        before each Alt+S, so the previous capture's link is never returned
+        or recorded as a latency sample.
+        """
         if not self.driver:
             raise TradingViewScraperError("Driver not available for triggering screenshot.")
 
+        first_wait, poll_interval = self.latency_stats.suggest(stats_key, self.CLIPBOARD_WAIT_TIME, self.CLIPBOARD_POLL_INTERVAL) if stats_key else (self.CLIPBOARD_WAIT_TIME, self.CLIPBOARD_POLL_INTERVAL)
+        deadline_after = max(self.CLIPBOARD_WAIT_TIME, first_wait + 2 * poll_interval)
+        try:
+            hooked = bool(self.driver.execute_script(self.CLIPBOARD_HOOK_CHECK_SCRIPT))
+        except WebDriverException:
+            hooked = False
         clipboard_content = None
         attempts = 0
         while attempts <= self.MAX_RETRY_ATTEMPTS and not clipboard_content:
@@ -148,20 +649,23 @@ class TradingViewScraper:
                 self.logger.info(f"Retrying Alt+S and clipboard read (Attempt {attempts + 1}/{self.MAX_RETRY_ATTEMPTS + 1})...")
 
             try:
+                if hooked:
+                    self.driver.execute_script(self.CLIPBOARD_HOOK_RESET_SCRIPT)
+                stale_content = self._clear_clipboard()
                 self.logger.info("Attempting to trigger screenshot shortcut (Alt+S)...")
                 ActionChains(self.driver).key_down(Keys.ALT).send_keys('s').key_up(Keys.ALT).perform()
-                self.logger.info(f"Waiting {self.CLIPBOARD_WAIT_TIME}s for clipboard population...")
-                time.sleep(self.CLIPBOARD_WAIT_TIME)
-
-                self.logger.info("Attempting to read clipboard via JavaScript...")
-                clipboard_content = self.driver.execute_script(self.CLIPBOARD_READ_SCRIPT)
-
-                if clipboard_content and isinstance(clipboard_content, str) and clipboard_content.strip():
-                    self.logger.info("Successfully retrieved content from clipboard.")
-                    return clipboard_content.strip()
+                pressed_at = time.monotonic()
+                if hooked:
+                    clipboard_content = self._wait_for_clipboard_write(deadline_after, stale_content)
                 else:
-                    self.logger.warning("Clipboard was empty or returned non-string/empty content.")
-                    clipboard_content = None # Ensure loop continues if content invalid
+                    clipboard_content = self._poll_clipboard(pressed_at, first_wait, poll_interval, deadline_after, stale_content)
+
+                if clipboard_content:
+                    self.logger.info(f"Successfully retrieved content from clipboard after {time.monotonic() - pressed_at:.2f}s.")
+                    if stats_key:
+                        self.latency_stats.record(stats_key, time.monotonic() - pressed_at)
+                    return clipboard_content
+                self.logger.warning("Clipboard was empty or returned non-string/empty content.")
             except (WebDriverException, TimeoutException) as e:
                 self.logger.error(f"Error during screenshot trigger or clipboard read: {e}")
                 # Decide if retry makes sense for this error type
@@ -172,6 +676,167 @@ class TradingViewScraper:
             self.logger.error("Failed to retrieve screenshot link from clipboard after retries.")
         return None
 
+    def _wait_for_clipboard_write(self, timeout: float, stale_content: Optional[str] = None) -> Optional[str]:
+        """
+        Blocks in one script call until the hooked page writes to the clipboard, or the timeout passes.
+        The real clipboard is then checked once, ignoring stale_content left over from before Alt+S.
+        """
+        self.logger.info(f"Waiting up to {timeout:.2f}s for the page to write the clipboard...")
+        self.driver.set_script_timeout(timeout + 5)
+        content = self.driver.execute_async_script(self.CLIPBOARD_HOOK_WAIT_SCRIPT, int(timeout * 1000))
+        if not content:
+            # The copy may have bypassed the hooked APIs, check the real clipboard once
+            content = self.driver.execute_script(self.CLIPBOARD_READ_SCRIPT)
+            if isinstance(content, str) and content.strip() == stale_content:
+                return None
+        return content.strip() if isinstance(content, str) and content.strip() else None
+
+    def _clear_clipboard(self) -> Optional[str]:
+        """
+        Empties the clipboard before Alt+S so a read can't return the previous capture's link.
+        Returns the content left behind if the clipboard could not be cleared, which reads must ignore.
+        """
+        try:
+            if self.driver.execute_script(self.CLIPBOARD_CLEAR_SCRIPT):
+                return None
+            self.logger.warning("Could not clear the clipboard before Alt+S, ignoring its current content instead.")
+            content = self.driver.execute_script(self.CLIPBOARD_READ_SCRIPT)
+        except WebDriverException as e:
+            self.logger.warning(f"Could not clear the clipboard before Alt+S: {e}")
+            return None
+        return content.strip() if isinstance(content, str) and content.strip() else None
+
+    def _poll_clipboard(self, pressed_at: float, first_wait: float, poll_interval: float, deadline_after: float, stale_content: Optional[str] = None) -> Optional[str]:
+        """Reads the clipboard after first_wait, then every poll_interval until the deadline, skipping stale_content."""
+        self.logger.info(f"Waiting {first_wait:.2f}s for clipboard population...")
+        time.sleep(first_wait)
+        self.logger.info("Attempting to read clipboard via JavaScript...")
+        while True:
+            content = self.driver.execute_script(self.CLIPBOARD_READ_SCRIPT)
+            if content and isinstance(content, str) and content.strip() and content.strip() != stale_content:
+                return content.strip()
+            if time.monotonic() - pressed_at + poll_interval > deadline_after:
+                return None
+            time.sleep(poll_interval)
+
+
+    def _trigger_screenshot_and_get_link_from_network(self, stats_key: Optional[str] = None) -> Optional[str]:
+        """
+        Triggers screenshot shortcut (Alt+S) and returns the share link built from
+        the snapshot id in TradingView's upload response, read from CDP Network
+        events in the performance log.
+        """
+        if not self.driver:
+            raise TradingViewScraperError("Driver not available for triggering screenshot.")
+
+        first_wait, poll_interval = self.latency_stats.suggest(stats_key, self.CLIPBOARD_WAIT_TIME, self.CLIPBOARD_POLL_INTERVAL) if stats_key else (self.CLIPBOARD_WAIT_TIME, self.CLIPBOARD_POLL_INTERVAL)
+        deadline_after = max(self.CLIPBOARD_WAIT_TIME, first_wait + 2 * poll_interval)
+        for attempt in range(self.MAX_RETRY_ATTEMPTS + 1):
+            if attempt > 0:
+                self.logger.info(f"Retrying Alt+S and upload capture (Attempt {attempt + 1}/{self.MAX_RETRY_ATTEMPTS + 1})...")
+            try:
+                self.driver.get_log('performance') # Drop events from page load and earlier attempts
+                self.logger.info("Attempting to trigger screenshot shortcut (Alt+S)...")
+                ActionChains(self.driver).key_down(Keys.ALT).send_keys('s').key_up(Keys.ALT).perform()
+                pressed_at = time.monotonic()
+                snapshot_id = self._wait_for_snapshot_upload(pressed_at + deadline_after)
+            except (WebDriverException, TimeoutException) as e:
+                self.logger.error(f"Error during screenshot trigger or upload capture: {e}")
+                break # Stop retrying on general WebDriver errors
+            if snapshot_id:
+                self.logger.info(f"Snapshot id {snapshot_id} captured from upload response after {time.monotonic() - pressed_at:.2f}s.")
+                if stats_key:
+                    self.latency_stats.record(stats_key, time.monotonic() - pressed_at)
+                return self.SNAPSHOT_SHARE_URL.format(snapshot_id=snapshot_id)
+            self.logger.warning("No snapshot upload response seen before the deadline.")
+
+        self.logger.error("Failed to capture snapshot id from network after retries.")
+        return None
+
+    def _wait_for_snapshot_upload(self, deadline: float) -> Optional[str]:
+        """Reads performance log events until the snapshot upload (a POST) finishes, returning its id."""
+        post_request_ids, upload_request_ids = set(), set()
+        while time.monotonic() < deadline:
+            for entry in self.driver.get_log('performance'):
+                try:
+                    message = json.loads(entry['message'])['message']
+                except (KeyError, ValueError):
+                    continue
+                method, params = message.get('method'), message.get('params', {})
+                if method == 'Network.requestWillBeSent':
+                    # Responses carry no method; a GET or preflight of the upload URL holds no new id
+                    if params.get('request', {}).get('method') == 'POST':
+                        post_request_ids.add(params.get('requestId'))
+                elif method == 'Network.responseReceived' and params.get('requestId') in post_request_ids:
+                    response = params.get('response', {})
+                    if self.SNAPSHOT_UPLOAD_URL_PATTERN.match(response.get('url', '')) and response.get('status') == 200:
+                        upload_request_ids.add(params.get('requestId'))
+                elif method == 'Network.loadingFinished' and params.get('requestId') in upload_request_ids:
+                    body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': params['requestId']})
+                    snapshot_id = self.parse_snapshot_id(body.get('body', ''))
+                    if snapshot_id:
+                        return snapshot_id
+            time.sleep(self.NETWORK_POLL_INTERVAL)
+        return None
+
+    def _take_widget_snapshot(self, stats_key: Optional[str] = None):
+        """
+        Takes a server snapshot through the chart's in-page API, without keystrokes or focus.
+
+        Returns:
+            The share link, None if the API is present but produced nothing after
+            retries, or False if the page exposes no snapshot API at all.
+        """
+        if not self.driver:
+            raise TradingViewScraperError("Driver not available for taking a snapshot.")
+
+        first_wait, poll_interval = self.latency_stats.suggest(stats_key, self.CLIPBOARD_WAIT_TIME, self.CLIPBOARD_POLL_INTERVAL) if stats_key else (self.CLIPBOARD_WAIT_TIME, self.CLIPBOARD_POLL_INTERVAL)
+        timeout = max(self.CLIPBOARD_WAIT_TIME, first_wait + 2 * poll_interval)
+        self.driver.set_script_timeout(timeout + 5)
+        for attempt in range(self.MAX_RETRY_ATTEMPTS + 1):
+            if attempt > 0:
+                self.logger.info(f"Retrying chart snapshot API (Attempt {attempt + 1}/{self.MAX_RETRY_ATTEMPTS + 1})...")
+            started_at = time.monotonic()
+            try:
+                result = self.driver.execute_async_script(self.WIDGET_SNAPSHOT_SCRIPT, int(timeout * 1000)) or {}
+            except (WebDriverException, TimeoutException) as e:
+                self.logger.error(f"Error calling the chart snapshot API: {e}")
+                return None
+            if result.get('unavailable'):
+                if result.get('error'):
+                    self.logger.warning(f"Chart snapshot API failed: {result['error']}")
+                return False
+            link = self._snapshot_result_to_link(result)
+            if link:
+                self.logger.info(f"Chart snapshot API returned {link} after {time.monotonic() - started_at:.2f}s.")
+                if stats_key:
+                    self.latency_stats.record(stats_key, time.monotonic() - started_at)
+                return link
+            self.logger.warning("Chart snapshot API produced no id before the deadline.")
+        self.logger.error("Failed to take snapshot via the chart API after retries.")
+        return None
+
+    @classmethod
+    def _snapshot_result_to_link(cls, result: dict) -> Optional[str]:
+        """Turns the widget script result ({link} or {id}) into a share link."""
+        link = (result.get('link') or '').strip()
+        if re.search(r'tradingview\.com/x/', link):
+            return link
+        snapshot_id = cls.parse_snapshot_id(result.get('id') or '')
+        return cls.SNAPSHOT_SHARE_URL.format(snapshot_id=snapshot_id) if snapshot_id else None
+
+    @classmethod
+    def parse_snapshot_id(cls, body: str) -> Optional[str]:
+        """Extracts the snapshot id from an upload response body (plain id or JSON with an 'id')."""
+        text = (body or '').strip()
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = text
+        if isinstance(data, dict):
+            data = data.get('id') or data.get('snapshot_id') or ''
+        data = str(data).strip().strip('"')
+        return data if cls.SNAPSHOT_ID_PATTERN.match(data) else None
 
     def get_screenshot_link(self, ticker: str, interval: str) -> Optional[str]:
         """
@@ -187,24 +852,204 @@ class TradingViewScraper:
             The raw TradingView share URL string (e.g., https://www.tradingview.com/x/...)
             if successful, otherwise None.
         """
-        if not self.driver:
+        if not self.driver and not self.pool:
             raise TradingViewScraperError("Driver not initialized. Use within a 'with' statement.")
         if not ticker or not interval:
              raise ValueError("Ticker and Interval must be provided.")
+        # Concurrent requests for the same chart share one capture
+        return _CAPTURE_FLIGHTS.do(self._flight_key(ticker, interval), self._cached_screenshot_link, ticker, interval)
 
+    def _flight_key(self, ticker: str, interval: str) -> str:
+        return f"tradingview|{self.chart_page_id}|{ticker}|{interval}"
+
+    def _cached_screenshot_link(self, ticker: str, interval: str, capture: Optional[Callable] = None) -> Optional[str]:
+        """
+        Answers from the result cache, or captures and caches the link. capture(phases)
+        takes the screenshot; by default on a driver leased for this call.
+        """
+        # Session markets (NASDAQ:AAPL) open their bars off the UTC grid the cache is keyed on
+        cacheable = self.result_cache is not None and ResultCache.is_continuous(ticker)
+        if cacheable:
+            cached_link = self.result_cache.get("tradingview", ticker, interval, variant=self.chart_page_id)
+            if cached_link:
+                self.logger.info(f"Using link captured earlier in the current bar for {ticker} ({interval}).")
+                return cached_link
+        phases: Dict[str, float] = {}
+        captured_at, started_at = time.time(), time.monotonic()
+        link, error = None, None
         try:
-            # Attempt to set auth cookies, proceed even if it fails but log warning
-            if not self._set_auth_cookies():
-                self.logger.warning("Proceeding without guaranteed authentication (cookies not set).")
+            if capture:
+                link = capture(phases)
+            else:
+                link = self._with_driver(self._capture_screenshot_link, ticker, interval, phases)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if self.history:
+                self.history.record("tradingview", ticker, interval, link, self._snapshot_image_url(link), captured_at, time.monotonic() - started_at, phases, error)
+        if link and cacheable:
+            self.result_cache.put("tradingview", ticker, interval, link, variant=self.chart_page_id)
+        return link
+
+    def get_chart_png(self, ticker: str, interval: str) -> Optional[bytes]:
+        """
+        Renders the chart locally and returns it as PNG bytes.
+
+        Skips TradingView's server-side snapshot (Alt+S, upload, s3 URL) entirely:
+        the chart element is clipped straight out of the browser with CDP
+        Page.captureScreenshot. Use when a public link isn't needed.
+
+        Returns:
+            The PNG bytes, or None if the chart element could not be found.
+        """
+        if not self.driver and not self.pool:
+            raise TradingViewScraperError("Driver not initialized. Use within a 'with' statement.")
+        if not ticker or not interval:
+             raise ValueError("Ticker and Interval must be provided.")
+        phases: Dict[str, float] = {}
+        captured_at, started_at = time.time(), time.monotonic()
+        png, error = None, None
+        try:
+            png = self._with_driver(self._capture_chart_png, ticker, interval, phases)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if self.history: # Local renders have no link or image URL
+                self.history.record("tradingview", ticker, interval, None, None, captured_at, time.monotonic() - started_at, phases, error)
+        return png
+
+    def _with_driver(self, capture: Callable, *args):
+        """Runs capture(*args) on a driver leased from the pool, or on the shared driver."""
+        if not self.pool:
+            return capture(*args)
+        with self.pool.driver() as driver:
+            self._local.driver = driver
+            try:
+                return capture(*args)
+            finally:
+                self._local.driver = None
+
+    def _load_chart(self, ticker: str, interval: str, in_place: bool = True):
+        """
+        Authenticates if needed, opens the chart and waits until it is ready.
+        With in_place=False the page is always navigated, even if reuse_chart_page
+        could switch the chart already open.
+        """
+        started_at = time.monotonic()
+        if self._counts_network:
+            read_network_totals(self.driver) # The report covers this load only
+        if in_place and self.reuse_chart_page and self._is_on_chart_page() and self._switch_symbol_in_place(ticker, interval):
+            self._report_page_weight(ticker, started_at, full_load=False)
+            return
+
+        # Attempt to set auth cookies, proceed even if it fails but log warning
+        if not self._ensure_authenticated():
+            self.logger.warning("Proceeding without guaranteed authentication (cookies not set).")
 
-            chart_base_url = f"{self.TRADINGVIEW_CHART_BASE_URL}{self.chart_page_id}/"
-            url = f"{chart_base_url}?symbol={ticker}&interval={interval}"
+        chart_base_url = f"{self.TRADINGVIEW_CHART_BASE_URL}{self.chart_page_id}/"
+        url = f"{chart_base_url}?symbol={ticker}&interval={interval}"
 
+        # One-off unblocked loads give blocked loads a baseline to report savings against
+        baseline = bool(self.report_page_weight and self.blocked_urls and PageWeightReport.needs_baseline(self.latency_stats, "tradingview", ticker))
+        if baseline:
+            set_request_blocking(self.driver, self.blocked_urls, False)
+        try:
             self._navigate_and_wait(url)
 
-            clipboard_link = self._trigger_screenshot_and_get_link()
-            return clipboard_link
+            if self._is_logged_out() and self._auth_state.get(self.driver.session_id):
+                self.logger.warning("Chart page loaded logged out, re-authenticating...")
+                self._invalidate_auth()
+                if self._set_auth_cookies():
+                    self._navigate_and_wait(url)
+        finally:
+            if baseline:
+                set_request_blocking(self.driver, self.blocked_urls, True)
+        self._report_page_weight(ticker, started_at, full_load=True, blocking=not baseline)
+
+    def _report_page_weight(self, ticker: str, started_at: float, full_load: bool, blocking: bool = True):
+        """
+        Measures the load that began at started_at, logs it and keeps it as the thread's last_page_report.
+        Pass blocking=False for a load made with the blocklist lifted. Without
+        report_page_weight, only the disk cache hit ratio totals are updated.
+        """
+        if not self._counts_network:
+            return
+        try:
+            counts = read_network_totals(self.driver)
+        except WebDriverException as e:
+            self.logger.warning(f"Could not read network events for the page weight report: {e}")
+            return
+        with self._network_totals_lock:
+            self._network_totals.update(counts)
+        if not self.report_page_weight:
+            return
+        report = PageWeightReport.measure(self.latency_stats, "tradingview", ticker, counts, time.monotonic() - started_at, bool(self.blocked_urls) and blocking, full_load)
+        self._local.page_report = report
+        self.logger.info(f"Page weight for {ticker}: {report}")
+
+    def _is_on_chart_page(self) -> bool:
+        """True if the driver is already showing this scraper's chart layout."""
+        try:
+            return f"/chart/{self.chart_page_id}/" in self.driver.current_url
+        except WebDriverException:
+            return False
+
+    def _switch_symbol_in_place(self, ticker: str, interval: str) -> bool:
+        """
+        Changes symbol and interval in the loaded chart through its API, then waits
+        for readiness. Returns False if the caller should fall back to navigation.
+        """
+        start = time.monotonic()
+        try:
+            self.driver.set_script_timeout(self.chart_ready_timeout + 5)
+            result = self.driver.execute_async_script(self.SET_SYMBOL_SCRIPT, ticker, interval, int(self.chart_ready_timeout * 1000)) or {}
+        except WebDriverException as e:
+            self.logger.warning(f"In-place symbol switch failed, falling back to navigation: {e}")
+            return False
+        if not result.get('ok'):
+            self.logger.info(f"In-place symbol switch unavailable ({result}), falling back to navigation.")
+            return False
+        if not self._wait_for_chart_ready():
+            return False
+        self.logger.info(f"Switched chart to {ticker} ({interval}) in place in {time.monotonic() - start:.2f}s.")
+        return True
 
+    def _capture_chart_png(self, ticker: str, interval: str, phases: Optional[Dict[str, float]] = None) -> Optional[bytes]:
+        """Runs the local rendering flow on self.driver, adding the load and snapshot times to phases."""
+        try:
+            with timed_phase(phases, "load"):
+                self._load_chart(ticker, interval)
+            with timed_phase(phases, "snapshot"):
+                rect = self.driver.execute_script(ELEMENT_RECT_SCRIPT, self.CHART_ELEMENT_SELECTOR)
+                if not rect or not rect.get('width') or not rect.get('height'):
+                    self.logger.error("Chart element not found for local rendering.")
+                    return None
+                result = self.driver.execute_cdp_cmd("Page.captureScreenshot", {
+                    "format": "png",
+                    "clip": {**rect, "scale": 1},
+                    "captureBeyondViewport": True,
+                })
+            png = base64.b64decode(result["data"])
+            self.logger.info(f"Captured chart locally ({len(png)} bytes).")
+            return png
+        except TradingViewScraperError:
+            raise
+        except (WebDriverException, TimeoutException) as e:
+            self.logger.error(f"An unexpected WebDriver error occurred: {e}")
+            raise TradingViewScraperError("Local chart capture failed due to WebDriver error") from e
+        except Exception as e:
+            self.logger.error(f"An unexpected general error occurred: {e}", exc_info=True)
+            raise TradingViewScraperError("An unexpected error occurred during local chart capture") from e
+
+    def _capture_screenshot_link(self, ticker: str, interval: str, phases: Optional[Dict[str, float]] = None) -> Optional[str]:
+        """Runs the capture flow on self.driver, adding the load and snapshot times to phases."""
+        try:
+            with timed_phase(phases, "load"):
+                self._load_chart(ticker, interval)
+            with timed_phase(phases, "snapshot"):
+                return self._snapshot_loaded_chart(ticker, interval)
         except TradingViewScraperError:
             # Re-raise known scraper errors
             raise
@@ -215,6 +1060,125 @@ class TradingViewScraper:
             self.logger.error(f"An unexpected general error occurred: {e}", exc_info=True)
             raise TradingViewScraperError("An unexpected error occurred during screenshot capture") from e
 
+    def _snapshot_loaded_chart(self, ticker: str, interval: str) -> Optional[str]:
+        """Takes the snapshot of the chart currently shown, using the configured capture mode."""
+        if self.capture_mode == self.CAPTURE_MODE_NETWORK:
+            stats_key = LatencyStats.make_key("tradingview", "upload", ticker, interval)
+            return self._trigger_screenshot_and_get_link_from_network(stats_key)
+        if self.capture_mode == self.CAPTURE_MODE_WIDGET:
+            stats_key = LatencyStats.make_key("tradingview", "widget", ticker, interval)
+            widget_link = self._take_widget_snapshot(stats_key)
+            if widget_link is not False:
+                return widget_link
+            self.logger.warning("Chart snapshot API not available on this page, falling back to Alt+S.")
+        stats_key = LatencyStats.make_key("tradingview", "clipboard", ticker, interval)
+        clipboard_link = self._trigger_screenshot_and_get_link(stats_key)
+        return clipboard_link
+
+    def get_screenshot_links_for_intervals(self, ticker: str, intervals: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Captures one ticker at several intervals (e.g. '5', '15', '60', '240', 'D')
+        with a single page load, changing the resolution in place between snapshots.
+        Each interval goes through the result cache and is shared with concurrent
+        get_screenshot_link calls for it, like a single capture.
+
+        Returns:
+            Mapping of interval -> raw share link (None for intervals that failed).
+        """
+        if not self.driver and not self.pool:
+            raise TradingViewScraperError("Driver not initialized. Use within a 'with' statement.")
+        intervals = list(intervals)
+        if not ticker or not intervals or not all(intervals):
+             raise ValueError("Ticker and Intervals must be provided.")
+        return self._with_driver(self._capture_interval_sweep, ticker, intervals)
+
+    def _capture_interval_sweep(self, ticker: str, intervals: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Runs the interval sweep on self.driver. The sweep holds its driver, so it
+        never waits on another capture of the same interval (that one may need
+        this driver); it leads the flight or captures alongside it.
+
+        A failed interval maps to None and the sweep goes on; the next interval
+        reloads the page, since the failure may have left the chart mid-switch.
+        """
+        links = {}
+        full_load = False
+        try:
+            for interval in intervals:
+                capture = functools.partial(self._capture_sweep_interval, ticker, interval, full_load=full_load)
+                try:
+                    links[interval] = _CAPTURE_FLIGHTS.lead(self._flight_key(ticker, interval), self._cached_screenshot_link, ticker, interval, capture)
+                    full_load = False
+                except TradingViewScraperError as e:
+                    self.logger.error(f"Interval sweep failed for {ticker} ({interval}): {e}")
+                    links[interval] = None
+                    full_load = True
+            return links
+        except (WebDriverException, TimeoutException) as e:
+            self.logger.error(f"An unexpected WebDriver error occurred during interval sweep: {e}")
+            raise TradingViewScraperError("Interval sweep failed due to WebDriver error") from e
+        except Exception as e:
+            self.logger.error(f"An unexpected general error occurred: {e}", exc_info=True)
+            raise TradingViewScraperError("An unexpected error occurred during interval sweep") from e
+
+    def _capture_sweep_interval(self, ticker: str, interval: str, phases: Dict[str, float], full_load: bool = False) -> Optional[str]:
+        """
+        One sweep step: switches the chart already loaded on self.driver to interval
+        (or loads it, always with full_load) and snapshots it.
+        """
+        with timed_phase(phases, "load"):
+            if full_load:
+                self._load_chart(ticker, interval, in_place=False)
+            # With reuse_chart_page, _load_chart tries the in-place switch itself
+            elif self.reuse_chart_page or not (self._is_on_chart_page() and self._switch_symbol_in_place(ticker, interval)):
+                self._load_chart(ticker, interval)
+        with timed_phase(phases, "snapshot"):
+            return self._snapshot_loaded_chart(ticker, interval)
+
+    def get_screenshot_links(self, jobs: Iterable[Tuple[str, str]], concurrency: Optional[int] = None) -> List[CaptureResult]:
+        """
+        Captures screenshot links for many (ticker, interval) jobs.
+
+        Args:
+            jobs: Iterable of (ticker, interval) tuples.
+            concurrency: Max captures in flight. Defaults to, and is capped at, the
+                         pool size, since every capture holds a pooled driver.
+                         Without a driver pool there is only one driver, so jobs
+                         run serially.
+
+        Returns:
+            One CaptureResult per job, in the same order as `jobs`. Failures are
+            reported on the result instead of raising.
+        """
+        jobs = list(jobs)
+        if not self.pool:
+            if concurrency and concurrency > 1:
+                self.logger.warning("Concurrent batch capture requires pool_size > 0, running jobs serially.")
+            return [self._run_job(ticker, interval) for ticker, interval in jobs]
+
+        # Threads beyond the pool size would only queue in lease() and could hit its timeout
+        workers = max(1, min(concurrency or self.pool.size, self.pool.size, len(jobs)))
+        if concurrency and concurrency > self.pool.size:
+            self.logger.warning(f"Concurrency {concurrency} exceeds the pool size, capturing with {self.pool.size}.")
+        self.logger.info(f"Capturing {len(jobs)} job(s) with concurrency {workers}...")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tv-capture") as executor:
+            return list(executor.map(lambda job: self._run_job(*job), jobs))
+
+    def _run_job(self, ticker: str, interval: str) -> CaptureResult:
+        """Runs one capture and wraps its outcome in a CaptureResult."""
+        result = CaptureResult(ticker=ticker, interval=interval)
+        start = time.monotonic()
+        self._local.page_report = None
+        try:
+            result.link = self.get_screenshot_link(ticker, interval)
+            if not result.link:
+                result.error = TradingViewScraperError("Failed to retrieve screenshot link from clipboard.")
+        except (TradingViewScraperError, ValueError) as e:
+            result.error = e
+        result.duration = time.monotonic() - start
+        result.page_report = self.last_page_report
+        return result
+
     @staticmethod
     def convert_link_to_image_url(input_string: Optional[str]) -> Optional[str]:
         """Converts TradingView share links (e.g., /x/) to direct snapshot image links."""
@@ -250,22 +1214,48 @@ class TradingViewScraper:
 
         return output_string
 
+    @classmethod
+    def _snapshot_image_url(cls, link: Optional[str]) -> Optional[str]:
+        """The snapshot image URL of a share link, None if the link doesn't convert to one."""
+        image_url = cls.convert_link_to_image_url(link)
+        return image_url if image_url != link else None
+
 
     def close(self):
-        """Safely quits the WebDriver."""
+        """Safely quits the WebDriver (or the driver pool), persists latency statistics, refreshes the disk cache template and flushes the capture history."""
+        self.latency_stats.save()
+        if self.pool:
+            self.pool.close()
+            self.pool = None
         if self.driver:
             try:
                 self.logger.info("Quitting WebDriver...")
+                self._invalidate_auth()
                 self.driver.quit()
                 self.logger.info("WebDriver quit successfully.")
                 self.driver = None
             except (WebDriverException, NoSuchWindowException) as e:
                 self.logger.warning(f"Error quitting WebDriver (might be already closed): {e}")
+        if self.result_cache and self.result_cache.counters:
+            self.logger.info(f"Result cache: {dict(self.result_cache.counters)}.")
+        if _CAPTURE_FLIGHTS.counters['coalesced']:
+            self.logger.info(f"Coalesced {_CAPTURE_FLIGHTS.counters['coalesced']} duplicate concurrent capture(s) so far in this process.")
+        hit_ratio = self.disk_cache_hit_ratio
+        if hit_ratio is not None:
+            self.logger.info(f"Disk cache hit ratio: {hit_ratio:.1%} of {self._network_totals['responses']} response(s).")
+        if self.disk_cache:
+            self.disk_cache.close()
+        if self.history:
+            self.history.close()
 
     # --- Context Manager Support ---
     def __enter__(self):
-        """Initializes the WebDriver when entering the context."""
-        self._setup_driver()
+        """Initializes the WebDriver (or warms the driver pool) when entering the context."""
+        if self.pool_size > 0:
+            self.pool = DriverPool(self._create_authenticated_driver, size=self.pool_size)
+            self.pool.start()
+        else:
+            self._setup_driver()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -273,6 +1263,440 @@ class TradingViewScraper:
         self.close()
 
 
+class AsyncTradingViewScraper:
+    """
+    asyncio-native counterpart of TradingViewScraper built on Playwright's async API.
+    One browser is shared and each capture runs in its own page, so many captures
+    can run concurrently on a single event loop without blocking it.
+    """
+    CHART_SELECTOR = "div.chart-container canvas"
+    CHART_LOAD_TIMEOUT = 30 # Seconds to wait for the chart canvas
+
+    def __init__(self, headless: bool = True, window_size: str = TradingViewScraper.DEFAULT_WINDOW_SIZE, chart_page_id: str = TradingViewScraper.DEFAULT_CHART_PAGE_ID, max_concurrent_pages: int = 4, chart_ready_timeout: float = TradingViewScraper.NAV_WAIT_TIME, capture_mode: str = TradingViewScraper.CAPTURE_MODE_CLIPBOARD, blocked_urls: Optional[Iterable[str]] = TradingViewScraper.DEFAULT_BLOCKED_URLS, report_page_weight: bool = False, latency_stats_path: Optional[str] = TradingViewScraper.DEFAULT_LATENCY_STATS_PATH, proxy_server: Optional[str] = None, proxy_spki: Optional[str] = None, cache_results: bool = False, result_cache_dir: Optional[str] = TradingViewScraper.DEFAULT_RESULT_CACHE_DIR, result_cache_staleness: float = 0.0, history_path: Optional[str] = None):
+        """
+        Initializes the scraper configuration. The browser starts on `async with`.
+
+        blocked_urls, report_page_weight, proxy_server, proxy_spki, the result
+        cache options and history_path behave as in TradingViewScraper; blocked requests are aborted through a context route,
+        and the unblocked baseline is kept in the latency statistics at
+        latency_stats_path.
+        """
+        if async_playwright is None:
+            raise TradingViewScraperError("playwright is required for AsyncTradingViewScraper (pip install playwright).")
+        if capture_mode not in TradingViewScraper.CAPTURE_MODES:
+            raise ValueError(f"capture_mode must be one of {TradingViewScraper.CAPTURE_MODES}, got {capture_mode!r}.")
+        self.capture_mode = capture_mode
+        self.headless = headless
+        self.window_size = window_size
+        self.chart_page_id = chart_page_id
+        self.max_concurrent_pages = max_concurrent_pages
+        self.chart_ready_timeout = chart_ready_timeout
+        self.blocked_urls = tuple(blocked_urls or ())
+        self.report_page_weight = report_page_weight
+        self.latency_stats = LatencyStats(latency_stats_path)
+        self.proxy_server = proxy_server
+        self.proxy_spki = proxy_spki
+        self.result_cache = ResultCache(cache_dir=result_cache_dir, staleness_tolerance=result_cache_staleness) if cache_results else None
+        self.history = CaptureHistory(history_path) if history_path else None
+        self._playwright = None
+        self.browser = None
+        self.context = None
+        self._semaphore = None
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def last_page_report(self) -> Optional[PageWeightReport]:
+        """Page weight report of the current task's most recent chart load, if measured."""
+        return _ASYNC_PAGE_REPORT.get()
+
+    async def start(self):
+        """Launches the shared browser and an authenticated context."""
+        self.logger.info("Launching Playwright browser...")
+        width, height = (int(v) for v in self.window_size.split(","))
+        try:
+            self._playwright = await async_playwright().start()
+            args = ['--no-sandbox', '--disable-dev-shm-usage', '--force-dark-mode', '--disable-extensions']
+            if self.proxy_spki:
+                args.append(f"--ignore-certificate-errors-spki-list={self.proxy_spki}")
+            self.browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                args=args,
+                proxy={'server': self.proxy_server, 'bypass': '<-loopback>'} if self.proxy_server else None,
+            )
+            self.context = await self.browser.new_context(
+                viewport={'width': width, 'height': height},
+                permissions=['clipboard-read', 'clipboard-write'],
+            )
+            await self.context.add_init_script(TradingViewScraper.CLIPBOARD_HOOK_SCRIPT)
+            if self.blocked_urls:
+                await self.context.route(blocked_url_regex(self.blocked_urls), abort_blocked_request)
+            await self._add_auth_cookies()
+        except PlaywrightError as e:
+            await self.close()
+            raise TradingViewScraperError("Playwright browser initialization failed") from e
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_pages)
+        self.logger.info("Playwright browser ready.")
+
+    async def _open_chart(self, page, url: str, ticker: str, selector: str):
+        """
+        Navigates the page to the chart and waits until it is ready, measuring the
+        load for the page weight report. Returns the locator for `selector`.
+        """
+        counts = Counter()
+        session = None
+        baseline = bool(self.report_page_weight and self.blocked_urls and PageWeightReport.needs_baseline(self.latency_stats, "tradingview", ticker))
+        if baseline:
+            # Page routes take precedence over the context's blocklist route
+            await page.route(blocked_url_regex(self.blocked_urls), allow_request)
+        if self.report_page_weight:
+            session = await open_network_counter(self.context, page, counts)
+        started_at = time.monotonic()
+        self.logger.info(f"Navigating to chart URL: {url}")
+        await page.goto(url, wait_until='domcontentloaded')
+        chart = page.locator(selector).first
+        await chart.wait_for(state='visible', timeout=self.CHART_LOAD_TIMEOUT * 1000)
+        await self._wait_for_chart_ready(page)
+        if baseline:
+            await page.unroute(blocked_url_regex(self.blocked_urls), allow_request)
+        if session:
+            await session.detach()
+            report = PageWeightReport.measure(self.latency_stats, "tradingview", ticker, counts, time.monotonic() - started_at, bool(self.blocked_urls) and not baseline)
+            _ASYNC_PAGE_REPORT.set(report)
+            self.logger.info(f"Page weight for {ticker}: {report}")
+        return chart
+
+    async def _add_auth_cookies(self) -> bool:
+        """Adds auth cookies to the context directly, no base-URL navigation needed."""
+        session_id_value = os.getenv(TradingViewScraper.SESSION_ID_ENV_VAR)
+        session_id_sign_value = os.getenv(TradingViewScraper.SESSION_ID_SIGN_ENV_VAR)
+        if not session_id_value or not session_id_sign_value:
+            self.logger.warning(f"TradingView session cookies not found. Ensure {TradingViewScraper.SESSION_ID_ENV_VAR} and {TradingViewScraper.SESSION_ID_SIGN_ENV_VAR} are set in environment.")
+            return False
+        await self.context.add_cookies([
+            {'name': name, 'value': value, 'domain': '.tradingview.com', 'path': '/', 'secure': True, 'httpOnly': True}
+            for name, value in ((TradingViewScraper.SESSION_ID_COOKIE, session_id_value),
+                                (TradingViewScraper.SESSION_ID_SIGN_COOKIE, session_id_sign_value))
+        ])
+        self.logger.info("Authentication cookies added to browser context.")
+        return True
+
+    async def get_screenshot_link(self, ticker: str, interval: str) -> Optional[str]:
+        """
+        Captures a TradingView chart screenshot link in a fresh page.
+
+        Returns:
+            The raw TradingView share URL string if successful, otherwise None.
+        """
+        if not self.context:
+            raise TradingViewScraperError("Browser not initialized. Use within an 'async with' statement.")
+        if not ticker or not interval:
+             raise ValueError("Ticker and Interval must be provided.")
+        flight_key = f"tradingview|{self.chart_page_id}|{ticker}|{interval}"
+        return await _CAPTURE_FLIGHTS.do_async(flight_key, self._cached_screenshot_link, ticker, interval)
+
+    async def _cached_screenshot_link(self, ticker: str, interval: str) -> Optional[str]:
+        """Answers from the result cache, or captures in a fresh page and caches the link."""
+        # Session markets (NASDAQ:AAPL) open their bars off the UTC grid the cache is keyed on
+        cacheable = self.result_cache is not None and ResultCache.is_continuous(ticker)
+        if cacheable:
+            cached_link = self.result_cache.get("tradingview", ticker, interval, variant=self.chart_page_id)
+            if cached_link:
+                self.logger.info(f"Using link captured earlier in the current bar for {ticker} ({interval}).")
+                return cached_link
+        phases: Dict[str, float] = {}
+        captured_at, started_at = time.time(), time.monotonic()
+        link, error = None, None
+        try:
+            link = await self._capture_screenshot_link(ticker, interval, phases)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if self.history:
+                self.history.record("tradingview", ticker, interval, link, TradingViewScraper._snapshot_image_url(link), captured_at, time.monotonic() - started_at, phases, error)
+        if link and cacheable:
+            self.result_cache.put("tradingview", ticker, interval, link, variant=self.chart_page_id)
+        return link
+
+    async def _capture_screenshot_link(self, ticker: str, interval: str, phases: Optional[Dict[str, float]] = None) -> Optional[str]:
+        """Runs the capture flow in a fresh page, adding the load and snapshot times to phases."""
+        url = f"{TradingViewScraper.TRADINGVIEW_CHART_BASE_URL}{self.chart_page_id}/?symbol={ticker}&interval={interval}"
+        async with self._semaphore:
+            page = await self.context.new_page()
+            try:
+                with timed_phase(phases, "load"):
+                    chart = await self._open_chart(page, url, ticker, self.CHART_SELECTOR)
+                with timed_phase(phases, "snapshot"):
+                    if self.capture_mode == TradingViewScraper.CAPTURE_MODE_NETWORK:
+                        return await self._trigger_screenshot_and_get_link_from_network(page, chart)
+                    if self.capture_mode == TradingViewScraper.CAPTURE_MODE_WIDGET:
+                        widget_link = await self._take_widget_snapshot(page)
+                        if widget_link is not False:
+                            return widget_link
+                        self.logger.warning("Chart snapshot API not available on this page, falling back to Alt+S.")
+                    return await self._trigger_screenshot_and_get_link(page, chart)
+            except PlaywrightError as e:
+                self.logger.error(f"Playwright error during capture of {ticker} ({interval}): {e}")
+                raise TradingViewScraperError("Screenshot capture failed due to Playwright error") from e
+            finally:
+                await page.close()
+
+    async def get_chart_png(self, ticker: str, interval: str) -> Optional[bytes]:
+        """Renders the chart locally in a fresh page and returns it as PNG bytes (no server snapshot)."""
+        if not self.context:
+            raise TradingViewScraperError("Browser not initialized. Use within an 'async with' statement.")
+        if not ticker or not interval:
+             raise ValueError("Ticker and Interval must be provided.")
+
+        phases: Dict[str, float] = {}
+        captured_at, started_at = time.time(), time.monotonic()
+        png, error = None, None
+        try:
+            png = await self._capture_chart_png(ticker, interval, phases)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if self.history: # Local renders have no link or image URL
+                self.history.record("tradingview", ticker, interval, None, None, captured_at, time.monotonic() - started_at, phases, error)
+        return png
+
+    async def _capture_chart_png(self, ticker: str, interval: str, phases: Optional[Dict[str, float]] = None) -> Optional[bytes]:
+        """Runs the local rendering flow in a fresh page, adding the load and snapshot times to phases."""
+        url = f"{TradingViewScraper.TRADINGVIEW_CHART_BASE_URL}{self.chart_page_id}/?symbol={ticker}&interval={interval}"
+        async with self._semaphore:
+            page = await self.context.new_page()
+            try:
+                with timed_phase(phases, "load"):
+                    chart = await self._open_chart(page, url, ticker, TradingViewScraper.CHART_ELEMENT_SELECTOR)
+                with timed_phase(phases, "snapshot"):
+                    return await chart.screenshot(type='png')
+            except PlaywrightError as e:
+                self.logger.error(f"Playwright error during local capture of {ticker} ({interval}): {e}")
+                raise TradingViewScraperError("Local chart capture failed due to Playwright error") from e
+            finally:
+                await page.close()
+
+    async def _wait_for_chart_ready(self, page) -> bool:
+        """Waits for the same readiness probe as TradingViewScraper, proceeding on timeout."""
+        try:
+            await page.wait_for_function(
+                TradingViewScraper.CHART_READY_EXPRESSION,
+                timeout=self.chart_ready_timeout * 1000,
+                polling=int(TradingViewScraper.CHART_READY_POLL_INTERVAL * 1000),
+            )
+            return True
+        except PlaywrightTimeoutError:
+            self.logger.warning(f"Chart not detected as ready within {self.chart_ready_timeout}s, proceeding anyway.")
+            return False
+
+    async def _trigger_screenshot_and_get_link(self, page, chart) -> Optional[str]:
+        """Presses Alt+S on the chart and returns as soon as the page records the copied link."""
+        for attempt in range(TradingViewScraper.MAX_RETRY_ATTEMPTS + 1):
+            if attempt > 0:
+                self.logger.info(f"Retrying Alt+S (Attempt {attempt + 1}/{TradingViewScraper.MAX_RETRY_ATTEMPTS + 1})...")
+            await page.evaluate("() => { window.__tvClipboardText = null; }")
+            await chart.click()
+            await page.keyboard.press("Alt+s")
+            try:
+                handle = await page.wait_for_function("() => window.__tvClipboardText", timeout=TradingViewScraper.CLIPBOARD_WAIT_TIME * 1000)
+                link = await handle.json_value()
+            except PlaywrightTimeoutError:
+                link = None
+            if link and link.strip():
+                self.logger.info("Successfully retrieved screenshot link.")
+                return link.strip()
+            self.logger.warning("No clipboard write recorded yet.")
+        self.logger.error("Failed to retrieve screenshot link after retries.")
+        return None
+
+    async def _take_widget_snapshot(self, page):
+        """Async counterpart of TradingViewScraper._take_widget_snapshot (same return contract)."""
+        # Run the execute_async_script-style snippet with (timeoutMs, done) as its arguments
+        script = f"(timeoutMs) => new Promise((done) => (function () {{ {TradingViewScraper.WIDGET_SNAPSHOT_SCRIPT} }})(timeoutMs, done))"
+        for attempt in range(TradingViewScraper.MAX_RETRY_ATTEMPTS + 1):
+            if attempt > 0:
+                self.logger.info(f"Retrying chart snapshot API (Attempt {attempt + 1}/{TradingViewScraper.MAX_RETRY_ATTEMPTS + 1})...")
+            result = await page.evaluate(script, int(TradingViewScraper.CLIPBOARD_WAIT_TIME * 1000)) or {}
+            if result.get('unavailable'):
+                return False
+            link = TradingViewScraper._snapshot_result_to_link(result)
+            if link:
+                return link
+            self.logger.warning("Chart snapshot API produced no id before the deadline.")
+        self.logger.error("Failed to take snapshot via the chart API after retries.")
+        return None
+
+    async def _trigger_screenshot_and_get_link_from_network(self, page, chart) -> Optional[str]:
+        """Presses Alt+S and returns the share link built from the snapshot upload response."""
+        def is_upload(response):
+            return response.request.method == "POST" and bool(TradingViewScraper.SNAPSHOT_UPLOAD_URL_PATTERN.match(response.url))
+
+        for attempt in range(TradingViewScraper.MAX_RETRY_ATTEMPTS + 1):
+            if attempt > 0:
+                self.logger.info(f"Retrying Alt+S (Attempt {attempt + 1}/{TradingViewScraper.MAX_RETRY_ATTEMPTS + 1})...")
+            try:
+                async with page.expect_response(is_upload, timeout=TradingViewScraper.CLIPBOARD_WAIT_TIME * 1000) as response_info:
+                    await chart.click()
+                    await page.keyboard.press("Alt+s")
+                response = await response_info.value
+                snapshot_id = TradingViewScraper.parse_snapshot_id(await response.text()) if response.ok else None
+            except PlaywrightTimeoutError:
+                snapshot_id = None
+            if snapshot_id:
+                self.logger.info(f"Snapshot id {snapshot_id} captured from upload response.")
+                return TradingViewScraper.SNAPSHOT_SHARE_URL.format(snapshot_id=snapshot_id)
+            self.logger.warning("No snapshot upload response seen before the deadline.")
+        self.logger.error("Failed to capture snapshot id from network after retries.")
+        return None
+
+    async def close(self):
+        """Closes the browser, stops Playwright, persists latency statistics and flushes the capture history."""
+        self.latency_stats.save()
+        if self.browser:
+            try:
+                await self.browser.close()
+            except PlaywrightError as e:
+                self.logger.warning(f"Error closing browser (might be already closed): {e}")
+            self.browser = None
+            self.context = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        if self.history:
+            await asyncio.to_thread(self.history.close)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class DriverRegistry:
+    """
+    Thread-safe registry giving each thread its own WebDriver, created lazily
+    on the thread's first get() and reused for all of its later captures.
+    """
+
+    def __init__(self, driver_factory: Callable[[], webdriver.Chrome]):
+        self.driver_factory = driver_factory
+        self._drivers = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def get(self) -> webdriver.Chrome:
+        """Returns the calling thread's driver, creating it on first use."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            driver = self._drivers.get(thread_id)
+        if driver is None:
+            # Create outside the lock so threads start their browsers in parallel
+            driver = self.driver_factory()
+            with self._lock:
+                self._drivers[thread_id] = driver
+        return driver
+
+    def discard(self):
+        """Quits the calling thread's driver, e.g. after it broke. The next get() creates a new one."""
+        with self._lock:
+            driver = self._drivers.pop(threading.get_ident(), None)
+        if driver:
+            self._quit_driver(driver)
+
+    def _quit_driver(self, driver: webdriver.Chrome):
+        try:
+            driver.quit()
+        except (WebDriverException, NoSuchWindowException) as e:
+            self.logger.debug(f"Error quitting registered driver (might be already closed): {e}")
+
+    def close_all(self):
+        """Quits every registered driver."""
+        with self._lock:
+            drivers = list(self._drivers.values())
+            self._drivers.clear()
+        for driver in drivers:
+            self._quit_driver(driver)
+
+
+class ThreadedCaptureRunner:
+    """
+    ThreadPoolExecutor-backed capture runner for hosts that can't use
+    multiprocessing (e.g. embedded in a web server). Worker threads share one
+    TradingViewScraper configuration and each gets its own driver from a
+    DriverRegistry.
+    """
+
+    def __init__(self, workers: int = 4, **scraper_kwargs):
+        """
+        Args:
+            workers: Number of worker threads (and therefore browsers).
+            **scraper_kwargs: Passed to the shared TradingViewScraper.
+        """
+        self.workers = workers
+        self.scraper = TradingViewScraper(**scraper_kwargs)
+        self.registry = DriverRegistry(self.scraper._create_authenticated_driver)
+        self.executor = None
+        self.logger = logging.getLogger(__name__)
+
+    def submit(self, ticker: str, interval: str):
+        """Schedules one capture and returns a Future resolving to its CaptureResult."""
+        if not self.executor:
+            raise TradingViewScraperError("Runner not started. Use within a 'with' statement.")
+        return self.executor.submit(self._capture, ticker, interval)
+
+    def run(self, jobs: Iterable[Tuple[str, str]]) -> List[CaptureResult]:
+        """Captures all (ticker, interval) jobs and returns results in input order."""
+        futures = [self.submit(ticker, interval) for ticker, interval in jobs]
+        return [future.result() for future in futures]
+
+    def _capture(self, ticker: str, interval: str) -> CaptureResult:
+        """Runs on a worker thread with that thread's registered driver."""
+        try:
+            driver = self.registry.get()
+        except TradingViewScraperError as e:
+            return CaptureResult(ticker=ticker, interval=interval, error=e)
+        self.scraper._local.driver = driver
+        try:
+            result = self.scraper._run_job(ticker, interval)
+        finally:
+            self.scraper._local.driver = None
+        if isinstance(result.error, TradingViewScraperError) and isinstance(result.error.__cause__, WebDriverException):
+            self.logger.warning("Worker driver failed, it will be replaced on the next capture.")
+            self.scraper._invalidate_auth(driver)
+            self.registry.discard()
+        return result
+
+    def close(self):
+        """Stops the worker threads, quits their drivers and closes the shared scraper."""
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        self.registry.close_all()
+        self.scraper.close()
+
+    def __enter__(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tv-thread-capture")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ProcessCaptureRunner(BaseProcessCaptureRunner):
+    """
+    Fans (ticker, interval) jobs out to worker processes, each owning its own
+    TradingViewScraper; scraper_kwargs are passed to every worker's scraper.
+    """
+    scraper_class = TradingViewScraper
+    error_class = TradingViewScraperError
+
+    def _failed_result(self, job: Tuple[str, str], error: Exception) -> CaptureResult:
+        ticker, interval = job
+        return CaptureResult(ticker=ticker, interval=interval, error=error)
+
+
 # --- Main Execution Example ---
 if __name__ == "__main__":
     # Configure logging for script execution